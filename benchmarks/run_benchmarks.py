@@ -0,0 +1,523 @@
+# Contents subject to LICENSE.txt at project root
+
+"""
+Time the metrics, the predictions validators, the end-to-end scoring on synthetic data and the
+startup of the command line.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--sizes 1e3 1e5]
+        [--groups metrics validators scoring startup] [--match text] [-o results.json]
+        [--baseline benchmarks/baseline.json] [--tolerance 0.5]
+
+Every benchmark is run on generated data of every size:
+
+* metrics: every entry of METRICS_DICT, on binary and 128 classes labels, class probabilities,
+  regression values, real vectors, rankings or object detection boxes,
+* validators: every validator of dval.validation_type_checks, on typed and string columns,
+* scoring: score_predictions_file on a generated SCORE directory, with the peak memory traced by
+  tracemalloc in a separate run.
+
+The startup benchmarks are run once, whatever the sizes: a fresh interpreter running
+`dval version`, and `dval valid_predictions` on a generated SCORE directory of STARTUP_SIZE rows.
+
+The results are written in JSON, as {"environment": {...}, "results": {name: {"seconds": ...}}},
+with the best wall time of the runs of every benchmark. With --baseline, the results are compared
+to those of a previous run: the command fails if a benchmark is slower, or uses more memory, than
+its baseline by more than the tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas
+
+import dval
+from dval.metrics import METRICS_DICT
+from dval.predictions import score_predictions_file
+from dval import validation_type_checks
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+NUM_CLASSES = 128
+# class probabilities are only generated up to this number of matrix entries
+MAX_PROBABILITY_ENTRIES = 2 ** 26
+BOXES_PER_IMAGE = 4
+TOP_K = [20, 100]
+# differences shorter than this are timer noise
+MIN_SECONDS = 0.001
+DEFAULT_TOLERANCE = 0.5
+SEED = 0
+STARTUP_SIZE = 1000
+GROUPS = ["metrics", "validators", "scoring", "startup"]
+
+
+def binary_labels(size, rng):
+    """
+    :return: dict of binary ground truth and predicted labels, and predicted scores
+    """
+    ground_truth = rng.integers(0, 2, size)
+    scores = np.clip(ground_truth * 0.3 + rng.random(size) * 0.7, 0, 1)
+    return dict(
+        ground_truth=ground_truth, predicted=(scores > 0.5).astype(int), scores=scores
+    )
+
+
+def multiclass_labels(size, rng, num_classes=NUM_CLASSES):
+    """
+    :return: dict of ground truth and predicted labels of num_classes classes, right 60% of the
+    time, and of the class probabilities if they fit in MAX_PROBABILITY_ENTRIES
+    """
+    ground_truth = rng.integers(0, num_classes, size)
+    predicted = np.where(
+        rng.random(size) < 0.6, ground_truth, rng.integers(0, num_classes, size)
+    )
+    data = dict(ground_truth=ground_truth, predicted=predicted)
+    if size * num_classes <= MAX_PROBABILITY_ENTRIES:
+        probabilities = rng.random((size, num_classes))
+        probabilities[np.arange(size), predicted] += num_classes / 4
+        data["probabilities"] = probabilities / probabilities.sum(axis=1, keepdims=True)
+        data["classes"] = np.arange(num_classes)
+    return data
+
+
+def regression_values(size, rng):
+    ground_truth = rng.normal(0, 10, size)
+    return dict(
+        ground_truth=ground_truth, predicted=ground_truth + rng.normal(0, 1, size)
+    )
+
+
+def real_vectors(size, rng, dimension=4):
+    ground_truth = rng.normal(0, 10, (size, dimension))
+    return dict(
+        ground_truth=ground_truth,
+        predicted=ground_truth + rng.normal(0, 1, (size, dimension)),
+    )
+
+
+def rankings(size, rng):
+    ground_truth = rng.random(size)
+    return dict(ground_truth=ground_truth, predicted=ground_truth + rng.random(size))
+
+
+def object_detection_boxes(size, rng):
+    """
+    :return: dict of size ground truth boxes, BOXES_PER_IMAGE per image, and of as many
+    detections with a confidence, jittered ground truth boxes and false positives
+    """
+    images = np.char.add("image_", (np.arange(size) // BOXES_PER_IMAGE).astype(str))
+    corners = rng.random((size, 2)) * 500
+    extents = 20 + rng.random((size, 2)) * 80
+    ground_truth = pandas.DataFrame(
+        np.hstack([corners, corners + extents]),
+        columns=["x_min", "y_min", "x_max", "y_max"],
+    )
+    ground_truth.insert(0, "image", images)
+
+    detections = ground_truth.copy()
+    jitter = rng.normal(0, 5, (size, 4))
+    false_positives = rng.random(size) < 0.3
+    jitter[false_positives] += 200
+    detections.iloc[:, 1:] += jitter
+    detections["confidence"] = np.where(
+        false_positives, rng.random(size) * 0.6, 0.4 + rng.random(size) * 0.6
+    )
+    return dict(ground_truth=ground_truth, predicted=detections)
+
+
+DATASETS = {
+    "binary": binary_labels,
+    "multiclass": multiclass_labels,
+    "regression": regression_values,
+    "realVector": real_vectors,
+    "ranking": rankings,
+    "objectDetection": object_detection_boxes,
+}
+
+
+def _labels(metric, **kwargs):
+    return lambda data: metric(data["ground_truth"], data["predicted"], **kwargs)
+
+
+def _scores(metric):
+    return lambda data: metric(data["ground_truth"], data["scores"])
+
+
+def _probabilities(metric):
+    return lambda data: metric(
+        data["ground_truth"], data["probabilities"], data["classes"]
+    )
+
+
+def _boxes(metric):
+    # the detections come first
+    return lambda data: metric(data["predicted"], data["ground_truth"])
+
+
+def metric_cases():
+    """
+    :return: dict of {metric name: {dataset name: function of the dataset}}, for every metric of
+    METRICS_DICT
+    """
+    labels = ["binary", "multiclass"]
+    cases = dict()
+    for name, metric in METRICS_DICT.items():
+        if name in ["f1", "precision", "recall"]:
+            cases[name] = {"binary": _labels(metric, pos_label=1)}
+        elif name == "rocAuc":
+            cases[name] = {"binary": _scores(metric)}
+        elif name == "crossEntropy":
+            cases[name] = {"multiclass": _probabilities(metric)}
+        elif name in [
+            "meanSquaredError",
+            "rootMeanSquaredError",
+            "meanAbsoluteError",
+            "rSquared",
+        ]:
+            cases[name] = {"regression": _labels(metric)}
+        elif name == "rootMeanSquaredErrorAvg":
+            cases[name] = {"realVector": _labels(metric)}
+        elif name == "precisionAtTopK":
+            cases[name] = {"ranking": _labels(metric, K=TOP_K)}
+        elif "objectDetection" in name or "object_detection" in name:
+            cases[name] = {"objectDetection": _boxes(metric)}
+        else:
+            cases[name] = {dataset: _labels(metric) for dataset in labels}
+    return cases
+
+
+def validator_cases(size, rng):
+    """
+    :return: dict of {validator name: {column kind: function}}, for every validator of
+    dval.validation_type_checks, on columns as read with and without the data schema types
+    """
+    integers = pandas.Series(np.arange(size))
+    reals = pandas.Series(rng.normal(0, 10, size))
+    labels = pandas.Series(rng.integers(0, NUM_CLASSES, size))
+    words = pandas.Series(np.char.add("label_", labels.to_numpy().astype(str)))
+    dates = pandas.Series(
+        pandas.Timestamp("2000-01-01")
+        + pandas.to_timedelta(rng.integers(0, 10000, size), unit="D")
+    ).dt.strftime("%Y-%m-%d")
+    booleans = pandas.Series(rng.integers(0, 2, size))
+    # as read without the types of the data schema
+    integer_strings = integers.astype(str)
+    real_strings = reals.astype(str)
+    boolean_strings = booleans.map({0: "no", 1: "yes"})
+    categories = labels.astype("category")
+    classes = np.arange(NUM_CLASSES)
+    word_labels = words.unique()
+    v = validation_type_checks
+    return {
+        "valid_index": {
+            "int64": lambda: v.valid_index(integers),
+            "str": lambda: v.valid_index(integer_strings),
+        },
+        "valid_boolean": {
+            "int64": lambda: v.valid_boolean(booleans),
+            "str": lambda: v.valid_boolean(boolean_strings),
+        },
+        "valid_real": {
+            "float64": lambda: v.valid_real(reals),
+            "str": lambda: v.valid_real(real_strings),
+        },
+        "valid_integer": {
+            "int64": lambda: v.valid_integer(integers),
+            "str": lambda: v.valid_integer(integer_strings),
+        },
+        "valid_string": {"str": lambda: v.valid_string(words)},
+        "valid_categorical": {
+            "int64": lambda: v.valid_categorical(labels, authorized_labels=classes),
+            "category": lambda: v.valid_categorical(
+                categories, authorized_labels=classes
+            ),
+            "str": lambda: v.valid_categorical(words, authorized_labels=word_labels),
+        },
+        "valid_datetime": {"str": lambda: v.valid_datetime(dates)},
+    }
+
+
+def write_score_dir(path, task, size, rng):
+    """
+    Write a SCORE directory and a predictions file of size rows.
+
+    :param task: "binary", "multiclass" or "regression"
+    :return: path to the predictions file
+    """
+    task_types = {
+        "binary": ("classification", "binary", "f1", "categorical"),
+        "multiclass": ("classification", "multiClass", "f1Macro", "categorical"),
+        "regression": ("regression", "univariate", "rootMeanSquaredError", "real"),
+    }
+    task_type, task_subtype, metric, column_type = task_types[task]
+    data = DATASETS[task](size, rng)
+
+    dataset_doc = {
+        "about": {"datasetID": "benchmark_dataset_TEST", "datasetSchemaVersion": "3.0"},
+        "dataResources": [
+            {
+                "resID": "0",
+                "resPath": "tables/learningData.csv",
+                "resType": "table",
+                "resFormat": ["text/csv"],
+                "isCollection": False,
+                "columns": [
+                    {
+                        "colIndex": 0,
+                        "colName": "d3mIndex",
+                        "colType": "integer",
+                        "role": ["index"],
+                    },
+                    {
+                        "colIndex": 1,
+                        "colName": "target",
+                        "colType": column_type,
+                        "role": ["suggestedTarget"],
+                    },
+                ],
+            }
+        ],
+    }
+    problem_doc = {
+        "about": {
+            "problemID": "benchmark_problem_TEST",
+            "problemName": "benchmark",
+            "taskType": task_type,
+            "taskSubType": task_subtype,
+        },
+        "inputs": {
+            "data": [
+                {
+                    "datasetID": "benchmark_dataset_TEST",
+                    "targets": [
+                        {
+                            "targetIndex": 0,
+                            "resID": "0",
+                            "colIndex": 1,
+                            "colName": "target",
+                        }
+                    ],
+                }
+            ],
+            "performanceMetrics": [{"metric": metric}],
+        },
+    }
+
+    for directory in ["dataset_TEST/tables", "problem_TEST"]:
+        os.makedirs(os.path.join(path, directory), exist_ok=True)
+    with open(os.path.join(path, "dataset_TEST/datasetDoc.json"), "w") as f:
+        json.dump(dataset_doc, f)
+    with open(os.path.join(path, "problem_TEST/problemDoc.json"), "w") as f:
+        json.dump(problem_doc, f)
+
+    index = rng.permutation(size)
+    pandas.DataFrame({"d3mIndex": np.arange(size), "target": ""}).to_csv(
+        os.path.join(path, "dataset_TEST/tables/learningData.csv"), index=False
+    )
+    pandas.DataFrame({"d3mIndex": index, "target": data["ground_truth"]}).to_csv(
+        os.path.join(path, "targets.csv"), index=False
+    )
+    predictions_file = os.path.join(path, "predictions.csv")
+    pandas.DataFrame({"d3mIndex": index, "target": data["predicted"]}).to_csv(
+        predictions_file, index=False
+    )
+    return predictions_file
+
+
+def run_cli(*args):
+    """
+    Run `python -m dval.cli *args` in a fresh interpreter.
+
+    :raises: subprocess.CalledProcessError if the command fails
+    """
+    subprocess.run(
+        [sys.executable, "-m", "dval.cli", *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+
+
+def best_time(func, repeat):
+    """
+    :return: the shortest wall time in seconds of repeat calls of func
+    """
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def peak_memory(func):
+    """
+    :return: peak memory in bytes allocated by func, as traced by tracemalloc
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(sizes=None, groups=None, match=None, repeat=3):
+    """
+    :param groups: benchmark groups to run among GROUPS, all by default
+    :param match: only run the benchmarks whose name contains this text
+    :param repeat: runs of every benchmark below 1e6 rows, a single run beyond
+    :return: dict of {benchmark name: {"seconds": best wall time(, "peak_memory": bytes)}}
+    """
+    sizes = sizes or DEFAULT_SIZES
+    groups = groups or GROUPS
+    results = dict()
+
+    def run(name, func, size, memory=False):
+        if match is not None and match not in name:
+            return
+        try:
+            result = dict(seconds=best_time(func, repeat if size < 10 ** 6 else 1))
+            if memory:
+                result["peak_memory"] = peak_memory(func)
+        except Exception as e:
+            print(f"{name:<60} failed: {e!r}", file=sys.stderr)
+            return
+        results[name] = result
+        print(f"{name:<60} {result['seconds']:.6f}s", file=sys.stderr)
+
+    for size in sizes:
+        rng = np.random.default_rng(SEED)
+        if "metrics" in groups:
+            datasets = dict()
+            for metric, cases in metric_cases().items():
+                for dataset, func in cases.items():
+                    if dataset not in datasets:
+                        datasets[dataset] = DATASETS[dataset](size, rng)
+                    if (
+                        metric == "crossEntropy"
+                        and "probabilities" not in datasets[dataset]
+                    ):
+                        # too large a matrix of class probabilities
+                        continue
+                    run(
+                        f"metrics/{metric}/{dataset}/{size}",
+                        lambda: func(datasets[dataset]),
+                        size,
+                    )
+
+        if "validators" in groups:
+            for validator, cases in validator_cases(size, rng).items():
+                for kind, func in cases.items():
+                    run(f"validators/{validator}/{kind}/{size}", func, size)
+
+        if "scoring" in groups:
+            for task in ["binary", "multiclass", "regression"]:
+                with tempfile.TemporaryDirectory() as score_dir:
+                    predictions_file = write_score_dir(score_dir, task, size, rng)
+                    run(
+                        f"scoring/score_predictions_file/{task}/{size}",
+                        lambda: score_predictions_file(
+                            predictions_file, score_dir, None
+                        ),
+                        size,
+                        memory=True,
+                    )
+
+    if "startup" in groups:
+        run("startup/version", lambda: run_cli("version"), 0)
+        with tempfile.TemporaryDirectory() as score_dir:
+            rng = np.random.default_rng(SEED)
+            predictions_file = write_score_dir(score_dir, "binary", STARTUP_SIZE, rng)
+            run(
+                "startup/valid_predictions",
+                lambda: run_cli("valid_predictions", "-d", score_dir, predictions_file),
+                0,
+            )
+    return results
+
+
+def environment():
+    return dict(
+        python=platform.python_version(),
+        platform=platform.platform(),
+        numpy=np.__version__,
+        pandas=pandas.__version__,
+        dval=dval.__version__,
+    )
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    :param results: benchmark results, as returned by run_benchmarks
+    :param baseline: results of a previous run
+    :param tolerance: relative slowdown, or memory increase, accepted
+    :return: list of (benchmark name, measure, baseline value, value) beyond the tolerance, for
+    the benchmarks of both results
+    """
+    regressions = list()
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        for measure, value in result.items():
+            reference = baseline[name].get(measure)
+            if reference is None:
+                continue
+            slack = MIN_SECONDS if measure == "seconds" else 0
+            if value > reference * (1 + tolerance) + slack:
+                regressions.append((name, measure, reference, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=lambda size: int(float(size)),
+        default=DEFAULT_SIZES,
+        help="Numbers of rows of the generated data, e.g. 1e3 1e7",
+    )
+    parser.add_argument("--groups", nargs="+", choices=GROUPS)
+    parser.add_argument("--match", help="Only run the benchmarks containing this text")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of every benchmark")
+    parser.add_argument("-o", "--output", help="Write the results in JSON to a file")
+    parser.add_argument("--baseline", help="JSON results to compare the results to")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Relative slowdown accepted against the baseline",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.groups, args.match, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                dict(environment=environment(), results=results),
+                f,
+                sort_keys=True,
+                indent=4,
+            )
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for name, measure, reference, value in regressions:
+            print(f"{name:<60} {measure}: {reference:.6g} -> {value:.6g}")
+        if regressions:
+            sys.exit(f"ERROR: {len(regressions)} benchmarks regressed")
+        print(f"No regression beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,17 @@
 USAGE
 
 version
-valid_predictions     -d score_dir predictions_file
-valid_pipelines        pipeline_log_file
-score                 -d score_dir [-g ground_truth_file] [--validation | --no-validation] predictions_file
+valid_predictions     -d score_dir [-j jobs] [--server address] predictions_file
+valid_pipelines       [--no-cache] [--cache-dir dir] [-j jobs] pipeline_log_file
+valid_generated_problems  [-o output_file] [-j jobs] [--manifest manifest_file] problems_directory
+score                 -d score_dir [-g ground_truth_file] [--validation | --no-validation] [--stream]
+                      [--bootstrap N] [-j jobs] [--server address] [--profile] [--profile-trace trace_file]
+                      predictions_file
+serve                 [--host host] [--port port] [--socket path] [--max-memory MB]
 """
 
 import argparse
+import functools
 import json
 import logging
 import os
@@ -75,13 +80,29 @@ def cli_parser():
         ["predictions_file"],
         dict(help="path to predictions file to validate or score", nargs="+"),
     ]
+    opt_jobs = [
+        ["-j", "--jobs"],
+        dict(
+            help="Number of processes handling the predictions files, 0 for one per CPU",
+            type=int,
+            default=1,
+        ),
+    ]
+    opt_server = [
+        ["--server"],
+        dict(
+            help="Forward the predictions files to a running `dval serve`, at host:port or unix:path "
+            "(default: $DVAL_SERVER)",
+            default=os.environ.get("DVAL_SERVER"),
+        ),
+    ]
 
     # valid_predictions -d score_dir predictions_file
     add_protocol_subparser(
         "valid_predictions",
         dict(help="Validate a predictions file against the d3m data directory."),
         func=cmd_valid_predictions,
-        arguments=[opt_pred_file, opt_score_dir],
+        arguments=[opt_pred_file, opt_score_dir, opt_jobs, opt_server],
     )
 
     vpipeline_args = [
@@ -104,14 +125,28 @@ def cli_parser():
             ["--no-check-bare-2018-format"],
             dict(help="Toggles primitive registration checks off", action="store_true"),
         ],
+        [
+            ["--no-cache"],
+            dict(
+                help="Validate every pipeline log, without reading nor storing verdicts in the cache",
+                action="store_true",
+            ),
+        ],
+        [
+            ["--cache-dir"],
+            dict(
+                help="directory of the cached verdicts, $DVAL_CACHE_DIR or ~/.cache/dval/pipelines by default"
+            ),
+        ],
     ]
 
-    # valid_pipelines [--allow-2017-format|--no-enforce-full-2018-format|--no-check-bare-2018-format] pipeline_log_file
+    # valid_pipelines [--allow-2017-format|--no-enforce-full-2018-format|--no-check-bare-2018-format]
+    #                 [--no-cache] [--cache-dir dir] [-j jobs] pipeline_log_file
     add_protocol_subparser(
         "valid_pipelines",
         dict(help="Validate a pipeline log file."),
         func=cmd_valid_pipeline,
-        arguments=vpipeline_args,
+        arguments=vpipeline_args + [opt_jobs],
     )
 
     vgenproblems_args = [
@@ -123,13 +158,20 @@ def cli_parser():
             ["-o", "--output_file"],
             dict(help="path to csv file containing valid problem ids"),
         ],
+        [
+            ["--manifest"],
+            dict(
+                help="path to a manifest of the problem subdirectories, created if missing, "
+                "to only check those changed since the previous run"
+            ),
+        ],
     ]
 
     add_protocol_subparser(
         "valid_generated_problems",
         dict(help="Validate a generated problems directory."),
         func=cmd_valid_gen_problems,
-        arguments=vgenproblems_args,
+        arguments=vgenproblems_args + [opt_jobs],
     )
 
     args_score = [
@@ -168,6 +210,47 @@ def cli_parser():
                 action="store_true",
             ),
         ],
+        [
+            ["--stream"],
+            dict(
+                help="Score files larger than memory, reading them in chunks.",
+                action="store_true",
+            ),
+        ],
+        [
+            ["--chunksize"],
+            dict(
+                help="Number of rows read at once with --stream",
+                type=int,
+                default=None,
+            ),
+        ],
+        [
+            ["--bootstrap"],
+            dict(
+                help="Number of bootstrap resamples used to report a 95%% confidence interval of every score",
+                type=int,
+                default=0,
+            ),
+        ],
+        [
+            ["--seed"],
+            dict(help="Seed of the bootstrap resamples", type=int, default=None),
+        ],
+        [
+            ["--profile"],
+            dict(
+                help="Report the wall time, CPU time and peak memory of every phase of the scoring",
+                action="store_true",
+            ),
+        ],
+        [
+            ["--profile-trace"],
+            dict(
+                help="Write the profiled phases to a Chrome trace file, implies --profile",
+                type=argparse.FileType("w"),
+            ),
+        ],
         [
             ["--subset-indices"],
             dict(
@@ -182,14 +265,40 @@ def cli_parser():
         "score",
         dict(help="Score a predictions file."),
         func=cmd_score,
-        arguments=[opt_pred_file, opt_score_dir] + args_score,
+        arguments=[opt_pred_file, opt_score_dir, opt_jobs, opt_server] + args_score,
     )
     score_parser.set_defaults(validation=True)
 
+    args_serve = [
+        [["--host"], dict(help="Host to listen on", default="127.0.0.1")],
+        [["--port"], dict(help="Port to listen on", type=int, default=8765)],
+        [
+            ["--socket"],
+            dict(help="Path to a Unix socket to listen on instead of host:port"),
+        ],
+        [
+            ["--max-memory"],
+            dict(
+                help="Memory in MB of the SCORE directories kept loaded",
+                type=int,
+                default=1024,
+            ),
+        ],
+    ]
+
+    # serve [--host host] [--port port] [--socket path] [--max-memory MB]
+    add_protocol_subparser(
+        "serve",
+        dict(help="Validate and score predictions files sent to a local server."),
+        func=cmd_serve,
+        arguments=args_serve,
+    )
+
     return parser
 
 
 def catch_fnf(func):
+    @functools.wraps(func)
     def wrapped_func(*args, **kwargs):
         try:
             return func(*args, **kwargs)
@@ -204,21 +313,143 @@ def catch_fnf(func):
     return wrapped_func
 
 
+def load_scoring_context(score_dir, *args, **kwargs):
+    """
+    :return: the scoring context of a SCORE directory, exiting if it cannot be loaded
+    """
+    from .predictions import ScoringContext
+
+    try:
+        return ScoringContext(score_dir, *args, **kwargs)
+    except FileNotFoundError:
+        raise
+    except Exception:
+        logging.exception(f"SCORE directory {score_dir} could not be loaded")
+        sys.exit(f"ERROR: Could not load the SCORE directory {score_dir}")
+
+
+# Scoring context of the tasks run by map_predictions_files. Forked worker processes inherit
+# the context loaded by the main process, the other ones load their own once.
+_task_context = None
+
+
+def map_predictions_files(
+    task, predictions_files, jobs=1, context_args=None, profiler=None
+):
+    """
+    Run a task on every predictions file, or pipeline log, in a pool of processes if there are
+    several jobs.
+
+    :param task: function of (scoring context, file), catching its own errors
+    :param jobs: number of processes, 0 for one per CPU
+    :param context_args: arguments of the ScoringContext shared by the tasks of a process,
+    None for no context
+    :param profiler: dval.profiling.Profiler recording the loading of the scoring context
+    :return: iterator of the task results, in the order of the predictions files
+    """
+    global _task_context
+    _task_context = None
+    if context_args is not None:
+        # loaded by the main process first, to report an invalid SCORE directory once
+        if profiler is None:
+            _task_context = load_scoring_context(*context_args)
+        else:
+            with profiler:
+                _task_context = load_scoring_context(*context_args)
+
+    if jobs == 1 or len(predictions_files) == 1:
+        for predictions_file in predictions_files:
+            yield task(_task_context, predictions_file)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # the context is loaded by the first task of every process: ProcessPoolExecutor takes no
+    # initializer in Python 3.6, which the pinned d3m releases run on
+    with ProcessPoolExecutor(max_workers=jobs or None) as executor:
+        yield from executor.map(
+            functools.partial(_run_task, task, context_args), predictions_files
+        )
+
+
+def _init_task_context(context_args):
+    global _task_context
+    if _task_context is None and context_args is not None:
+        from .predictions import ScoringContext
+
+        _task_context = ScoringContext(*context_args)
+
+
+def _run_task(task, context_args, predictions_file):
+    _init_task_context(context_args)
+    return task(_task_context, predictions_file)
+
+
+def _valid_predictions_task(context, predictions_file):
+    try:
+        return context.is_valid(predictions_file)
+    except Exception as e:
+        logging.exception(e)
+    return False
+
+
+def _score_task(options, context, predictions_file):
+    """
+    Score a predictions file with the scoring context, or without context with
+    score_predictions_file and the options
+    """
+    from .predictions import score_predictions_file
+
+    try:
+        if context is None:
+            return score_predictions_file(predictions_file, **options)
+        return context.score(predictions_file, **options)
+    except Exception:
+        logging.exception(
+            f"Predictions file {predictions_file} could not be scored. try validating your file first"
+        )
+
+
+def connect_server(address):
+    """
+    :return: Client of a running server, exiting if it cannot be reached
+    """
+    from .server import Client
+
+    client = Client(address)
+    try:
+        client.status()
+    except (OSError, ValueError) as e:
+        sys.exit(f"ERROR: Could not reach the dval server at {address}: {e}")
+    return client
+
+
+def _forward_valid_predictions_task(client, score_dir, context, predictions_file):
+    return client.is_valid(score_dir, predictions_file)
+
+
+def _forward_score_task(client, score_dir, options, context, predictions_file):
+    return client.score(score_dir, predictions_file, **options)
+
+
 @catch_fnf
 def cmd_valid_predictions(args):
-    from .predictions import is_predictions_file_valid
-
-    @catch_fnf
-    def single_valid_predictions(predictions_file, score_dir):
-        try:
-            return is_predictions_file_valid(predictions_file, score_dir)
-        except Exception as e:
-            logging.exception(e)
-        return False
+    if args.server:
+        task = functools.partial(
+            _forward_valid_predictions_task,
+            connect_server(args.server),
+            args.score_dir,
+        )
+        context_args = None
+    else:
+        task = _valid_predictions_task
+        context_args = (args.score_dir,)
 
     valid = True
-    for predictions_file in args.predictions_file:
-        s = single_valid_predictions(predictions_file, args.score_dir)
+    results = map_predictions_files(
+        task, args.predictions_file, jobs=args.jobs, context_args=context_args
+    )
+    for predictions_file, s in zip(args.predictions_file, results):
         valid &= s
         print("{0: <50} valid={1}".format(predictions_file, s))
 
@@ -228,18 +459,23 @@ def cmd_valid_predictions(args):
     return valid
 
 
-@catch_fnf
-def cmd_valid_pipeline(args):
-    from .pipeline_logs_validator import is_pipeline_valid
+def _valid_pipeline_task(kwargs, cache, context, pipeline_file):
+    try:
+        if cache is not None:
+            from .pipeline_cache import is_pipeline_valid_cached
 
-    @catch_fnf
-    def single_valid_pipeline(pipeline_file, **kwargs):
-        try:
-            return is_pipeline_valid(pipeline_file, **kwargs)
-        except Exception as e:
-            logging.exception(e)
-        return False
+            return is_pipeline_valid_cached(pipeline_file, cache, **kwargs)
 
+        from .pipeline_logs_validator import is_pipeline_valid
+
+        return is_pipeline_valid(pipeline_file, **kwargs)
+    except Exception as e:
+        logging.exception(e)
+    return False
+
+
+@catch_fnf
+def cmd_valid_pipeline(args):
     kwargs = dict()
 
     if "allow_2017_format" in args and args.allow_2017_format is not None:
@@ -255,12 +491,33 @@ def cmd_valid_pipeline(args):
     ):
         kwargs["enforce_2018_format"] = not args.no_enforce_full_2018_format
 
-    valid = True
-    for pipeline_f in args.pipeline_log_file:
-        s = single_valid_pipeline(pipeline_f, **kwargs)
-        valid &= s
+    cache = None
+    if not args.no_cache:
+        from .pipeline_cache import VerdictCache
+
+        cache = VerdictCache(args.cache_dir)
+
+    results = map_predictions_files(
+        functools.partial(_valid_pipeline_task, kwargs, cache),
+        args.pipeline_log_file,
+        jobs=args.jobs,
+    )
+
+    num_valid = 0
+    for pipeline_f, s in zip(args.pipeline_log_file, results):
+        num_valid += s
         print("{0: <50} valid={1}".format(pipeline_f, s))
 
+    if cache is not None:
+        cache.evict()
+
+    valid = num_valid == len(args.pipeline_log_file)
+    if len(args.pipeline_log_file) > 1:
+        print(
+            f"{num_valid} valid and {len(args.pipeline_log_file) - num_valid} invalid "
+            f"pipeline logs out of {len(args.pipeline_log_file)}"
+        )
+
     if not valid:
         sys.exit("ERROR: At least one pipeline log is invalid. ")
 
@@ -270,7 +527,10 @@ def cmd_valid_gen_problems(args):
     from .generated_problems import check_generated_problems_directory
 
     is_valid = check_generated_problems_directory(
-        args.problems_directory, args.output_file
+        args.problems_directory,
+        args.output_file,
+        jobs=args.jobs,
+        manifest_file=args.manifest,
     )
 
     if is_valid:
@@ -283,44 +543,135 @@ def cmd_valid_gen_problems(args):
 
 @catch_fnf
 def cmd_score(args):
-    from .predictions import score_predictions_file
-
-    if args.outfile is not None and len(args.predictions_file) > 1:
-        sys.exit(
-            "Writing JSON scores only supported for one predictions file at the time"
-        )
-
     if "ground_truth_file" in args and args.ground_truth_file is not None:
         # if ground truth is not set, will default to the `targets.csv` present in the SCORE directory
         args.ground_truth_file = os.path.join(args.score_dir, "targets.csv")
 
-    @catch_fnf
-    def single_score_predictions(predictions_file):
-        try:
-            scores = score_predictions_file(
-                predictions_file,
-                args.score_dir,
-                args.ground_truth_file,
-                check_valid=args.validation,
-                score_mxe=args.mxe,
-                indices_file=args.subset_indices[0] if args.subset_indices else None,
+    indices_file = args.subset_indices[0] if args.subset_indices else None
+    profile = args.profile or args.profile_trace is not None
+    options = dict(
+        check_valid=args.validation,
+        score_mxe=args.mxe,
+        bootstrap=args.bootstrap,
+        seed=args.seed,
+    )
+    if profile:
+        options.update(profile=True)
+    if args.server:
+        if args.stream or profile:
+            sys.exit("ERROR: --stream and --profile cannot be forwarded to a server")
+        options = dict(
+            validation=args.validation,
+            mxe=args.mxe,
+            bootstrap=args.bootstrap,
+            seed=args.seed,
+            ground_truth_file=args.ground_truth_file,
+            subset_indices=indices_file,
+        )
+        task = functools.partial(
+            _forward_score_task, connect_server(args.server), args.score_dir, options
+        )
+        context_args = None
+    elif args.stream:
+        if indices_file:
+            sys.exit("ERROR: --subset-indices is not supported with --stream")
+        # the streaming scorer reads the SCORE directory itself
+        options.update(
+            score_dir_path=args.score_dir,
+            groundtruth_path=args.ground_truth_file,
+            indices_file=indices_file,
+            stream=True,
+            chunksize=args.chunksize,
+        )
+        task = functools.partial(_score_task, options)
+        context_args = None
+    else:
+        task = functools.partial(_score_task, options)
+        context_args = (args.score_dir, args.ground_truth_file, indices_file)
+
+    profiler = None
+    if profile:
+        from .profiling import Profiler
+
+        profiler = Profiler()
+
+    results = map_predictions_files(
+        task,
+        args.predictions_file,
+        jobs=args.jobs,
+        context_args=context_args,
+        profiler=profiler,
+    )
+
+    to_dump = list()
+    profiles = list()
+    if profiler is not None and context_args is not None:
+        profiles.append(("SCORE directory", profiler.phases))
+    for predictions_file, scores in zip(args.predictions_file, results):
+        scores_profile = getattr(scores, "profile", None)
+        if scores and not isinstance(scores, list):
+            # forwarded scores are already decoded from their JSON
+            scores = [s.__dict__ for s in scores]
+        if scores and args.outfile is None:
+            print(
+                "{0: <50} scores={1}".format(
+                    predictions_file, json.dumps(scores, sort_keys=True, indent=4)
+                )
             )
-            return scores
-        except Exception:
-            logging.exception(
-                f"Predictions file {predictions_file} could not be scored. try validating your file first"
+        elif args.outfile is not None:
+            to_dump.append(
+                dict(predictions_file=predictions_file, scores=scores or None)
             )
+            if profile:
+                to_dump[-1]["profile"] = scores_profile
+        if scores_profile is not None:
+            profiles.append((predictions_file, scores_profile))
 
-    for predictions_file in args.predictions_file:
-        scores = single_score_predictions(predictions_file)
+    for name, phases in profiles:
+        print_profile(name, phases)
 
-        if scores and args.outfile is None:
-            print("{0: <50} scores={1}".format(predictions_file, scores.to_json()))
-        else:
-            if scores and args.outfile is not None:
-                to_dump = [s.__dict__ for s in scores]
-                json.dump(to_dump, args.outfile, sort_keys=True, indent=4)
-                print(f"Scores written to {args.outfile.name}")
+    if args.outfile is not None and to_dump:
+        if profile:
+            # the phases of every file next to its scores
+            to_dump = dict(score_dir_profile=profiler.to_json(), results=to_dump)
+        elif len(args.predictions_file) == 1:
+            # the scores of a single file
+            to_dump = to_dump[0]["scores"]
+        if to_dump is not None:
+            json.dump(to_dump, args.outfile, sort_keys=True, indent=4)
+            print(f"Scores written to {args.outfile.name}")
+
+    if args.profile_trace is not None:
+        from .profiling import chrome_trace
+
+        json.dump(chrome_trace(profiles), args.profile_trace)
+        print(f"Profile trace written to {args.profile_trace.name}")
+
+
+def print_profile(name, phases):
+    """
+    Print the wall time, CPU time and peak memory of profiled phases
+    """
+    print(f"Profile of {name}:")
+    print(f"  {'phase': <50} {'wall (s)': >10} {'cpu (s)': >10} {'peak (MB)': >10}")
+    for record in sorted(phases, key=lambda record: record["start"]):
+        label = "  " * record["depth"] + record["name"]
+        peak = record["peak_memory"]
+        peak = "-" if peak is None else f"{peak / 2 ** 20:.2f}"
+        print(
+            f"  {label: <50} {record['wall_time']: >10.4f} {record['cpu_time']: >10.4f} {peak: >10}"
+        )
+
+
+def cmd_serve(args):
+    from .server import serve
+
+    serve(
+        host=args.host,
+        port=args.port,
+        socket_path=args.socket,
+        max_memory=args.max_memory * 2 ** 20,
+    )
 
 
 def print_package_version(_):
@@ -25,17 +25,26 @@ Checks that your/problems/dir/labels.csv exists with
 """
 
 import glob
+import json
 import logging
 import os
+import stat
+
 import pandas as pd
 
+from . import __version__
 from .file_checker import FileChecker
-from .schemas import ProblemSchema
+from .schemas import ProblemSchema, validate_problem_doc
+
+SCHEMA_FILE = "schema.json"
+SSAPI_PREFIX = "ssapi"
 
 logger = logging.Logger(__name__)
 
 
-def check_generated_problems_directory(directory_path, output_file):
+def check_generated_problems_directory(
+    directory_path, output_file, jobs=1, manifest_file=None
+):
     """
     Checks that a directory contains a labels.csv file, with
     the ['problem_id', 'system', 'meaningful'] columns.
@@ -47,9 +56,20 @@ def check_generated_problems_directory(directory_path, output_file):
 
     Returns false if any of the execution returns False
 
+    The subdirectories are indexed in one pass of os.scandir, and
+    their problem schemas are parsed in a pool of processes if there
+    are several jobs.
+
     Parameters:
     -----------
     directory_path: path to a directory
+    output_file: path to the copy of the labels file, with a
+        'correct' column
+    jobs: number of processes validating the problem schemas, 0 for
+        one per CPU
+    manifest_file: path to a manifest of the subdirectories, to only
+        check those changed since the previous run. None to check
+        them all.
 
     Returns:
     --------
@@ -85,24 +105,43 @@ def check_generated_problems_directory(directory_path, output_file):
 
         return False
 
-    # Define a function to call on each subdirectory
-    def check_all_generated_problems_subdirectories(root_dir, sub_dir):
-        full_path = os.path.join(root_dir, sub_dir)
+    problem_ids = gen_problems_md_df["problem_id"].astype(str)
+    index = check_problem_subdirectories(
+        directory_path, problem_ids, jobs, manifest_file
+    )
 
-        if not os.path.isdir(full_path):
+    # Log the errors of the subdirectories in the order of the labels file
+    for problem_id, is_dir, has_schema, has_ssapi, schema_error in zip(
+        problem_ids,
+        index["is_dir"],
+        index["has_schema"],
+        index["has_ssapi"],
+        index["schema_error"],
+    ):
+        full_path = os.path.join(directory_path, problem_id)
+        if not is_dir:
             logger.error(
-                "Cannot find subdirectory named {} at {}".format(sub_dir, root_dir)
+                "Cannot find subdirectory named {} at {}".format(
+                    problem_id, directory_path
+                )
             )
-            return False
-
-        return check_generated_problems_subdirectory(full_path)
+            continue
+        schema_path = os.path.join(full_path, SCHEMA_FILE)
+        if not has_schema:
+            logger.error("Cannot find {}".format(schema_path))
+            continue
+        if schema_error is not None:
+            logger.warning(
+                "Invalid problem schema at {}. The following error occured: {}".format(
+                    schema_path, schema_error
+                )
+            )
+        if not has_ssapi:
+            logger.error("Cannot find any ssapi file at {}".format(full_path))
 
     # Gather the results in a boolean array
-    gen_problems_md_df["correct"] = gen_problems_md_df.apply(
-        lambda row: check_all_generated_problems_subdirectories(
-            directory_path, row["problem_id"]
-        ),
-        axis=1,
+    gen_problems_md_df["correct"] = (
+        index["is_dir"] & index["has_schema"] & index["has_ssapi"]
     )
 
     # Look for the False booleans
@@ -122,6 +161,264 @@ def check_generated_problems_directory(directory_path, output_file):
     return True
 
 
+def check_problem_subdirectories(
+    directory_path, problem_ids, jobs=1, manifest_file=None
+):
+    """
+    Check the subdirectories of the problems, and parse their problem
+    schemas.
+
+    With a manifest, the subdirectories whose fingerprint did not
+    change since the manifest was written are not checked again:
+    their results are read from the manifest. The manifest is then
+    rewritten with the results of the current subdirectories.
+
+    Parameters:
+    -----------
+    directory_path: path to a directory
+    problem_ids: pandas.Series of the names of the subdirectories
+    jobs: number of processes validating the problem schemas, 0 for
+        one per CPU
+    manifest_file: path to a manifest, created if missing, or None
+
+    Returns:
+    --------
+    index: pandas.DataFrame
+        indexed like problem_ids, with the columns of
+        scan_problem_subdirectories and 'schema_error', the message of
+        the error raised by the parsing of the problem schema or None
+    """
+    manifest = previous_manifest = dict()
+    if manifest_file is not None:
+        previous_manifest = load_manifest(manifest_file)
+        # fingerprinted before the checks, a change made meanwhile is seen by the next run
+        fingerprints = {
+            problem_id: fingerprint_problem_subdirectory(
+                os.path.join(directory_path, problem_id)
+            )
+            for problem_id in set(problem_ids)
+        }
+        manifest = {
+            problem_id: entry
+            for problem_id, entry in previous_manifest.items()
+            if fingerprints.get(problem_id) is not None
+            and entry["fingerprint"] == fingerprints[problem_id]
+        }
+
+    changed_ids = problem_ids[~problem_ids.isin(set(manifest))]
+    changed = scan_problem_subdirectories(directory_path, changed_ids)
+
+    # Check the schemas of the subdirectories having one, which does not change the verdict
+    schema_ids = changed_ids[changed["has_schema"]].unique()
+    schema_paths = [
+        os.path.join(directory_path, problem_id, SCHEMA_FILE)
+        for problem_id in schema_ids
+    ]
+    schema_errors = dict(zip(schema_ids, map_schema_errors(schema_paths, jobs)))
+
+    results = {
+        problem_id: (
+            True,
+            entry["has_schema"],
+            entry["has_ssapi"],
+            entry["schema_error"],
+        )
+        for problem_id, entry in manifest.items()
+    }
+    for problem_id, is_dir, has_schema, has_ssapi in zip(
+        changed_ids, changed["is_dir"], changed["has_schema"], changed["has_ssapi"]
+    ):
+        results[problem_id] = (
+            bool(is_dir),
+            bool(has_schema),
+            bool(has_ssapi),
+            schema_errors.get(problem_id),
+        )
+        if manifest_file is not None and is_dir and fingerprints[problem_id]:
+            manifest[problem_id] = dict(
+                fingerprint=fingerprints[problem_id],
+                has_schema=bool(has_schema),
+                has_ssapi=bool(has_ssapi),
+                schema_error=schema_errors.get(problem_id),
+                correct=bool(has_schema and has_ssapi),
+            )
+
+    if manifest_file is not None and manifest != previous_manifest:
+        save_manifest(manifest_file, manifest)
+
+    index = pd.DataFrame(
+        [results[problem_id] for problem_id in problem_ids],
+        columns=["is_dir", "has_schema", "has_ssapi", "schema_error"],
+        index=problem_ids.index,
+        dtype=object,
+    )
+    return index.astype(dict(is_dir=bool, has_schema=bool, has_ssapi=bool))
+
+
+def fingerprint_problem_subdirectory(directory_path):
+    """
+    Fingerprint of a problem subdirectory, which changes when a file
+    is added to it or removed from it, or when its 'schema.json' file
+    is modified.
+
+    Returns:
+    --------
+    fingerprint: list or None
+        inode and modification time of the subdirectory, modification
+        time and size of its 'schema.json' file. None if the
+        subdirectory does not exist.
+    """
+    try:
+        directory_stat = os.stat(directory_path)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(directory_stat.st_mode):
+        return None
+
+    fingerprint = [directory_stat.st_ino, directory_stat.st_mtime_ns]
+    try:
+        schema_stat = os.stat(os.path.join(directory_path, SCHEMA_FILE))
+        fingerprint += [schema_stat.st_mtime_ns, schema_stat.st_size]
+    except OSError:
+        fingerprint += [None, None]
+    return fingerprint
+
+
+def load_manifest(manifest_file):
+    """
+    Returns:
+    --------
+    problems: dict
+        entries of the manifest by problem id. Empty if the manifest
+        does not exist, is not valid, or was written by another
+        version of dval.
+    """
+    try:
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return dict()
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring the manifest {}: {}".format(manifest_file, e))
+        return dict()
+
+    if not isinstance(manifest, dict) or manifest.get("version") != __version__:
+        return dict()
+    return manifest.get("problems", dict())
+
+
+def save_manifest(manifest_file, problems):
+    """
+    Write the manifest, to a temporary file first so that an
+    interrupted run leaves the previous manifest.
+    """
+    tmp_path = manifest_file + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            # json.dumps encodes large manifests much faster than json.dump
+            f.write(json.dumps(dict(version=__version__, problems=problems)))
+        os.replace(tmp_path, manifest_file)
+    except OSError as e:
+        logger.warning("Could not write the manifest {}: {}".format(manifest_file, e))
+
+
+def scan_problem_subdirectories(directory_path, problem_ids):
+    """
+    Index the subdirectories of the problems with one os.scandir pass
+    of the directory and of every problem subdirectory.
+
+    Parameters:
+    -----------
+    directory_path: path to a directory
+    problem_ids: pandas.Series of the names of the subdirectories
+
+    Returns:
+    --------
+    index: pandas.DataFrame
+        indexed like problem_ids, with the boolean columns 'is_dir',
+        'has_schema' (a 'schema.json' file) and 'has_ssapi' (a
+        'ssapi*' file)
+    """
+    with os.scandir(directory_path) as entries:
+        subdirectories = {entry.name for entry in entries if entry.is_dir()}
+
+    # Problem ids like '.' or 'a/b' are not listed by the directory
+    for problem_id in set(problem_ids) - subdirectories:
+        if os.path.isdir(os.path.join(directory_path, problem_id)):
+            subdirectories.add(problem_id)
+
+    with_schema, with_ssapi = set(), set()
+    for problem_id in subdirectories.intersection(problem_ids):
+        try:
+            with os.scandir(os.path.join(directory_path, problem_id)) as entries:
+                for entry in entries:
+                    if entry.name == SCHEMA_FILE and entry.is_file():
+                        with_schema.add(problem_id)
+                    elif entry.name.startswith(SSAPI_PREFIX):
+                        with_ssapi.add(problem_id)
+        except OSError:
+            # an unreadable subdirectory has neither file
+            pass
+
+    return pd.DataFrame(
+        dict(
+            is_dir=problem_ids.isin(subdirectories),
+            has_schema=problem_ids.isin(with_schema),
+            has_ssapi=problem_ids.isin(with_ssapi),
+        ),
+        index=problem_ids.index,
+    )
+
+
+def map_schema_errors(schema_paths, jobs=1):
+    """
+    Validate and parse problem schemas, in a pool of processes if
+    there are several jobs. The pool pays off on large directories
+    only: every process imports d3m, whose schema validation is much
+    slower than the parsing of a schema.
+
+    Parameters:
+    -----------
+    schema_paths: list of paths to 'schema.json' files
+    jobs: number of processes, 0 for one per CPU
+
+    Returns:
+    --------
+    errors: list
+        for every schema, None if it is valid, otherwise the message of
+        the error raised by its parsing
+    """
+    if jobs == 1 or len(schema_paths) < 2:
+        return [problem_schema_error(path) for path in schema_paths]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = jobs or os.cpu_count() or 1
+    # large chunks, to pickle few tasks
+    chunksize = max(1, len(schema_paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(problem_schema_error, schema_paths, chunksize=chunksize)
+        )
+
+
+def problem_schema_error(schema_path):
+    """
+    Returns:
+    --------
+    error: str or None
+        message of the error raised by the validation of the problem
+        schema against the d3m problem schema, or by its parsing, None
+        if it is valid
+    """
+    try:
+        validate_problem_doc(schema_path)
+        ProblemSchema(schema_path)
+    except Exception as e:
+        return "{}".format(e)
+    return None
+
+
 def check_generated_problems_subdirectory(directory_path):
     """
     Checks that a directory contains a 'schema.json' file,
@@ -155,6 +452,7 @@ def check_generated_problems_subdirectory(directory_path):
 
     # Check schema structure
     try:
+        validate_problem_doc(gen_problem_schema_file_path)
         _ = ProblemSchema(gen_problem_schema_file_path)
     except Exception as e:
         logger.warning(
@@ -11,49 +11,47 @@ All metrics used in the D3M Program, mapped to their function.
 """
 
 import math
-from collections import defaultdict
+import warnings
 
 import numpy as np
-import sklearn.metrics as skm
-from sklearn.preprocessing import LabelBinarizer
 
-from dval.object_detection_ap import objectDetectionAP
+from dval.object_detection_ap import (
+    objectDetectionAP,
+    objectDetectionAPs,
+    objectDetectionMAP,
+)
 
 
 def accuracy(ground_truth, predicted):
-    return skm.accuracy_score(ground_truth, predicted)
+    return ClassificationContext(ground_truth, predicted).accuracy()
 
 
 def f1(ground_truth, predicted, pos_label=1):
-    return skm.f1_score(ground_truth, predicted, pos_label=pos_label)
+    return ClassificationContext(ground_truth, predicted).f1(pos_label=pos_label)
 
 
 def f1_micro(ground_truth, predicted):
-    return skm.f1_score(ground_truth, predicted, average="micro")
+    return ClassificationContext(ground_truth, predicted).f1_micro()
 
 
 def f1_macro(ground_truth, predicted):
-    return skm.f1_score(ground_truth, predicted, average="macro")
+    return ClassificationContext(ground_truth, predicted).f1_macro()
 
 
 def roc_auc(ground_truth, predicted, pos_label=None):
-    if pos_label is not None:
-        ground_truth, predicted, _ = _binarize(ground_truth, predicted, pos_label)
-    return skm.roc_auc_score(ground_truth, predicted)
+    return RocAucContext(ground_truth, predicted).roc_auc(pos_label=pos_label)
 
 
 def roc_auc_micro(ground_truth, predicted):
-    ground_truth, predicted, _ = _binarize(ground_truth, predicted)
-    return skm.roc_auc_score(ground_truth, predicted, average="micro")
+    return RocAucContext(ground_truth, predicted).roc_auc_micro()
 
 
 def roc_auc_macro(ground_truth, predicted):
-    ground_truth, predicted, _ = _binarize(ground_truth, predicted)
-    return skm.roc_auc_score(ground_truth, predicted, average="macro")
+    return RocAucContext(ground_truth, predicted).roc_auc_macro()
 
 
 def l2(ground_truth, predicted):
-    return skm.mean_squared_error(ground_truth, predicted) ** 0.5
+    return RegressionContext(ground_truth, predicted).root_mean_squared_error()
 
 
 def avg_l2(ground_truth_l, predicted_l):
@@ -62,15 +60,13 @@ def avg_l2(ground_truth_l, predicted_l):
     of predicted vectors and calculates the average L2 metrics between
     them.
 
-    The vectors are transposed because the skm.mse(multioutputs='raw_values')
-    Will compute the following:
-
-        >>> import sklearn.metrics as skm
+    The vectors are transposed because the regression sums are computed
+    column by column, e.g. the mean squared errors of the columns are:
 
         >>> y_true = [[0.5, 1],[-1, 1],[7, -6]]
         >>> y_pred = [[0, 2],[-1, 2],[8, -5]]
 
-        >>> skm.mean_squared_error(y_true, y_pred, multioutput='raw_values')
+        >>> RegressionSums(y_true, y_pred).squared_error / 3
         array([0.41666667, 1.        ])
 
     Parameters:
@@ -91,132 +87,141 @@ def avg_l2(ground_truth_l, predicted_l):
 
     """
 
-    return np.mean(
-        skm.mean_squared_error(ground_truth_l, predicted_l, multioutput="raw_values")
-        ** 0.5
-    )
+    return RegressionContext(ground_truth_l, predicted_l).root_mean_squared_error_avg()
 
 
 def mean_se(ground_truth, predicted):
-    return skm.mean_squared_error(ground_truth, predicted)
+    return RegressionContext(ground_truth, predicted).mean_squared_error()
 
 
 def l1(ground_truth, predicted):
-    return skm.mean_absolute_error(ground_truth, predicted)
+    return RegressionContext(ground_truth, predicted).mean_absolute_error()
 
 
 def r2(ground_truth, predicted):
-    return skm.r2_score(ground_truth, predicted)
+    return RegressionContext(ground_truth, predicted).r_squared()
 
 
 def norm_mut_info(ground_truth, predicted):
+    import sklearn.metrics as skm
+
     return skm.normalized_mutual_info_score(ground_truth, predicted)
 
 
 def jacc_sim(ground_truth, predicted):
+    if np.ndim(ground_truth) == 1:
+        # For binary and multiclass labels, the jaccard similarity is the accuracy
+        return ClassificationContext(ground_truth, predicted).accuracy()
+    import sklearn.metrics as skm
+
     return skm.jaccard_similarity_score(ground_truth, predicted)
 
 
-def _binarize(ground, pred, pos_label=None):
+def precision_at_top_K_meta(gt, preds, K=20):
     """
-    Binarize a prediction according to the classes
-    available in the ground truth
+    This function examines the K entries with the highest values
+    in the ground truth vector (gt) and in the predictions (preds)
+    and determines how many entries are shared between them.
+    The result is then scaled by K to get the precision at top K.
+
+    The top entries are found with one partial sort (np.argpartition) for the
+    greatest K. Ties are broken in favour of the later entry, the order given by
+    reversing a stable argsort, so the top K of every K is a prefix of that top.
 
     Parameters:
     -----------
-    ground: 1d array
-        Array of ground truth labels.
+    gt: 1d array-like
+        Array of ground truth values.
 
-    pred: 1d array
-        Array of predicted labels.
+    preds: 1d array-like
+        Array of predicted values.
+
+    K: int or list of int, 20 by default
+        The number of samples to use when computing the precision.
 
     Returns:
     --------
-    (binary_ground, binary_pred, classes): tuples
-        Tuple composed of binarized ground truth, binarized predictions and associated classes.
+    prec_at_top_K: float or list of float
+        The number of entries shared between the top K of the ground truth and
+        the top K of the predictions divided by K, for every K if K is a list.
+
 
     Example:
-        >>> ground = [0, 1, 2, 1]
-        >>> pred = [0, 0, 2, 1]
+        >>> gt = [4, 3, 2, 1, 0]
+        >>> pred = [0, 4, 2, 3, 1]
 
-        binary_ground = [[1,0,0], [0,1,0], [0,0,1], [0,1,0]]
-        binary_pred = [[1,0,0], [1,0,0], [0,0,1], [0,1,0]]
-        classes = [0, 1, 2]
+        >>> precision_at_top_K_meta(gt, pred, K=[3, 4])
+        [0.6666666666666666, 0.75]
     """
-    lb = LabelBinarizer()
-    binary_ground = lb.fit_transform(ground)
-    classes = lb.classes_
-    binary_pred = lb.transform(pred)
-
-    if pos_label is not None and lb.classes_[0] == pos_label:
-        return 1 - binary_ground, 1 - binary_pred, classes
-    else:
-        return binary_ground, binary_pred, classes
+    gt = np.asarray(gt)
+    Ks = np.atleast_1d(K).astype(int)
+    max_K = int(Ks.max())
 
+    gt_top = _top_k_indices(gt, max_K)
+    pred_top = _top_k_indices(preds, max_K)
 
-def precision_at_top_K_meta(gt, preds, K=20):
-    def precision_at_top_K(gt, preds, K):
-        """
-        This function examines the first K entries of a
-        ground truth vector (gt) and predicted labels (preds)
-        and determines how many values are shared between them.
-        The result is then scaled by K to get the accuracy at top K.
-
-        Parameters:
-        -----------
-        gt: 1d array-like
-            Array of ground truth labels.
-
-        preds: 1d array-like
-            Array of predicted labels.
-
-        K: int, 20 by default
-            The number of samples to use when computing the accuracy.
-
-        Returns:
-        --------
-        prec_at_top_K: float
-            The number of labels shared between the ground truth and
-            the predictions divided by K.
+    prec_at_top_K = _precision_at_top_k(gt_top, pred_top, Ks)
+    return prec_at_top_K if np.ndim(K) > 0 else prec_at_top_K[0]
 
 
-        Example:
-            >>> gt = [0, 1, 2, 3, 4]
-            >>> pred = [1, 3, 2, 4, 0]
+def _precision_at_top_k(gt_top, pred_top, Ks):
+    """
+    :return: the precision at top k for every k of Ks, from the positions of the top entries
+    of the ground truth and of the predictions, both in decreasing order
+    """
+    if len(gt_top) == 0:
+        return [0.0 for _ in Ks.tolist()]
 
-            >>> precision_at_top_K(gt, pred, K=3)
-            0.667
+    # rank of every predicted top entry in the ground truth top, len(gt_top) if it is not in it
+    order = np.argsort(gt_top)
+    found = np.minimum(np.searchsorted(gt_top[order], pred_top), len(gt_top) - 1)
+    gt_rank = np.where(gt_top[order][found] == pred_top, order[found], len(gt_top))
 
-            >>> precision_at_top_K(gt, pred, K=4)
-            0.75
-        """
+    return [float(np.count_nonzero(gt_rank[:k] < k)) / k for k in Ks.tolist()]
 
-        gt = gt[0:K]
-        preds = preds[0:K]
-        prec_at_top_K = np.float(len(np.intersect1d(gt, preds))) / K
-        return prec_at_top_K
 
-    # sort preds indice
-    pred_indices = np.argsort(preds)[::-1]
-    # sort gt indices
-    gt_indices = np.argsort(gt)[::-1]
+def _top_k_indices(values, k):
+    """
+    Indices of the k greatest values, in decreasing order of value then of indice,
+    selected with one np.argpartition: O(n + k log k) instead of a full sort.
+    """
+    values = np.asarray(values)
+    n = len(values)
+    k = min(k, n)
+    if k == 0:
+        return np.array([], dtype=np.intp)
+
+    if k < n:
+        candidates = np.argpartition(values, n - k)[n - k :]
+        threshold = values[candidates].min()
+
+        # all the entries above the threshold, and the latest entries at the threshold
+        above = np.flatnonzero(values > threshold)
+        tied = np.flatnonzero(values == threshold)
+        candidates = np.concatenate([above, tied[len(tied) - (k - len(above)) :]])
+    else:
+        candidates = np.arange(n)
 
-    return precision_at_top_K(gt_indices, pred_indices, K=K)
+    order = np.lexsort((candidates, values[candidates]))[::-1]
+    return candidates[order]
 
 
-def precision(ground_truth, predicted):
-    return skm.precision_score(ground_truth, predicted)
+def precision(ground_truth, predicted, pos_label=1):
+    return ClassificationContext(ground_truth, predicted).precision(pos_label=pos_label)
 
 
-def recall(ground_truth, predicted):
-    return skm.recall_score(ground_truth, predicted)
+def recall(ground_truth, predicted, pos_label=1):
+    return ClassificationContext(ground_truth, predicted).recall(pos_label=pos_label)
 
 
-def mxe_non_bin(ground_truth, predicted):
+def mxe_non_bin(ground_truth, predicted, counts=None):
     """
     This function converts non-binarized predicted values
     and pass them to the crossEntropy function
 
+    The one-hot probability matrix is built directly in NumPy, with the classes
+    available in the ground truth as columns. Predicted labels which do not appear
+    in the ground truth get an all-zero row.
 
     Parameters:
     -----------
@@ -226,6 +231,10 @@ def mxe_non_bin(ground_truth, predicted):
     predicted: array
         Array of non-binarized predicted vectors.
 
+    counts: array, optional
+        Number of occurrences of every (ground truth, predicted) pair, when the
+        pairs are given as distinct values with their counts.
+
     Returns:
     --------
     cross_entropy:
@@ -239,64 +248,83 @@ def mxe_non_bin(ground_truth, predicted):
         bin_predicted = [[1, 0, 0], [0, 1, 0], [0, 0, 1], [0, 0, 1], [0, 1, 0]]
         classes = [0, 1, 2]
     """
-    _, bin_predicted, classes = _binarize(ground_truth, predicted)
-    return apply_metric("crossEntropy", ground_truth, bin_predicted, classes)
+    classes, ground_truth_codes = np.unique(
+        np.asarray(ground_truth), return_inverse=True
+    )
+    predicted_codes = _encode_labels(predicted, classes)
 
+    known = predicted_codes >= 0
+    bin_predicted = np.zeros((len(predicted_codes), len(classes)))
+    bin_predicted[np.flatnonzero(known), predicted_codes[known]] = 1.0
 
-def _normalize_ground_truth(ground_truth, classes):
+    return _cross_entropy(ground_truth_codes.ravel(), bin_predicted, counts=counts)
+
+
+def _encode_labels(values, classes):
     """
-    Convert the ground truth list into a list of classe indices.
-    First it transforms the list of classes into a dictionary where
-    the key is the class name and the value is its indice in the list.
-    The order of the classes in the list is mapped to the order of the
-    confidence factors in the predictions.
-    Then, it replace every class value in the ground truth by its indice.
+    Map every value to the indice of its class in ``classes`` with a single
+    vectorized lookup (one sort of the classes, one binary search of the values).
 
     Parameters:
     -----------
-    ground_truth: 1d array
-        Array of ground truth.
+    values: 1d array-like
+        Array of labels to encode.
 
-    classes: 1d array
-        Array of the classes available in the ground truth.
+    classes: 1d array-like
+        Array of the known classes. The order of the classes defines the codes.
 
     Return:
     -------
-    ground_truth_normalized: array
-        Array of class indices.
+    codes: 1d array of int
+        Array of class indices, -1 for the values not found in ``classes``.
 
     Example:
-        >>> ground_truth = ['val_a', 'val_c', 'val_b', 'val_c']
-        >>> classes = ['val_a', 'val_b', 'val_c']
-
-        ground_truth_classes = {'val_a': 0, 'val_b': 1, 'val_c': 2}
-        ground_truth_normalized = [0, 2, 1, 2]
-    """
-    # Build dictionary based on ground_truth classes order
-    i = 0
-    ground_truth_classes = {}
-    for gt_class in classes:
-        ground_truth_classes[gt_class] = i
-        i += 1
-
-    # Process the ground truth
-    ground_truth_normalized = []
-    for value in ground_truth:
-        ground_truth_normalized.append(ground_truth_classes[value])
-    return ground_truth_normalized
-
-
-def _normalize_predicted(predicted, eps_value=2 ** -100):
-    norm_predicted = []
-    for trial in predicted:
-        t = []
-        for pd in trial:
-            # Here, we convert any value less than eps_value to eps_value
-            if pd == 0 or (pd < eps_value):
-                pd = eps_value
-            t.append(math.log(pd))
-        norm_predicted.append(t)
-    return norm_predicted
+        >>> _encode_labels(['val_a', 'val_c', 'val_d'], ['val_a', 'val_b', 'val_c'])
+        array([ 0,  2, -1])
+    """
+    classes = np.asarray(classes)
+    values = np.asarray(values)
+    if len(classes) == 0:
+        return np.full(values.shape, -1, dtype=np.intp)
+
+    order = np.argsort(classes, kind="mergesort")
+    positions = np.searchsorted(classes[order], values)
+    codes = order[np.minimum(positions, len(classes) - 1)]
+    return np.where(classes[codes] == values, codes, -1)
+
+
+def _cross_entropy(ground_truth_codes, predicted, eps_value=2 ** -100, counts=None):
+    """
+    Multiclass Cross Entropy (MXE) engine working on class indices and a
+    (n_samples, n_classes) probability matrix.
+
+    Probabilities lower than ``eps_value`` are clipped to ``eps_value``, the loss
+    of every trial, log2(sum(p) / p[true class]), is computed with a stable log-sum-exp,
+    then averaged per class and over the classes present in the ground truth.
+    Every row stands for ``counts`` trials if the counts are given.
+    """
+    log_base = 2
+    log_predicted = np.log(
+        np.maximum(np.asarray(predicted, dtype=np.float64), eps_value)
+    )
+
+    # log(sum(p)) computed as a log-sum-exp, shifted by the row maximum
+    row_max = log_predicted.max(axis=1)
+    log_sum = row_max + np.log(
+        np.exp(log_predicted - row_max[:, np.newaxis]).sum(axis=1)
+    )
+    log_true = log_predicted[np.arange(len(ground_truth_codes)), ground_truth_codes]
+    trial_loss = (log_sum - log_true) / math.log(log_base)
+
+    num_classes = log_predicted.shape[1]
+    if counts is not None:
+        trial_loss = trial_loss * counts
+    class_loss = np.bincount(
+        ground_truth_codes, weights=trial_loss, minlength=num_classes
+    )
+    class_trials = _count(ground_truth_codes, counts, minlength=num_classes)
+    present = class_trials > 0
+    return float(np.mean(class_loss[present] / class_trials[present]))
 
 
 def mxe(ground_truth, predicted, classes):
@@ -308,8 +336,8 @@ def mxe(ground_truth, predicted, classes):
     ground_truth: 1d array
         Array of ground truth
 
-    predicted: 1d array
-        Array of predictions
+    predicted: 2d array
+        Array of predictions, one row of class probabilities per trial
 
     classes: 1d array
         Array of classes composing the ground truth. The order of the class values
@@ -319,26 +347,596 @@ def mxe(ground_truth, predicted, classes):
     -------
         mxe_score
     """
-    log_base = 2
-    ground_truth = _normalize_ground_truth(ground_truth, classes)
-    predicted = _normalize_predicted(predicted)
-    class_to_trials = defaultdict(list)
-    for gt, pd in zip(ground_truth, predicted):
-        class_to_trials[gt].append(pd)
-    numerator = 0
-    for gt_cls, trials in class_to_trials.items():
-        class_loss = sum(
-            [
-                math.log(
-                    sum([math.e ** (pd) for pd in trial]) / math.e ** (trial[gt_cls]),
-                    log_base,
+    ground_truth_codes = _encode_labels(ground_truth, classes)
+    if (ground_truth_codes < 0).any():
+        unknown = np.asarray(ground_truth)[ground_truth_codes < 0]
+        raise KeyError(unknown[0])
+
+    return _cross_entropy(ground_truth_codes, predicted)
+
+
+class ClassificationContext:
+    """
+    Scoring context for the label-based classification metrics.
+
+    The ground truth and the predicted labels are encoded once, over the union of their labels,
+    and counted into a single integer confusion matrix with np.bincount. Every metric which can
+    be read from the confusion matrix is derived from it, so scoring several metrics on the same
+    target costs one pass over the data.
+
+    The metric derivations broadcast over any leading dimension of the confusion matrix.
+
+    The samples can also be given as distinct (ground truth, predicted) pairs with their
+    ``counts``, e.g. as accumulated over the chunks of a file too large to be loaded at once.
+    A 2d array of counts, e.g. the multiplicities of bootstrap resamples of the samples, gives
+    one confusion matrix and one score per row.
+
+    >>> context = ClassificationContext(['a', 'b', 'a'], ['a', 'a', 'a'])
+    >>> context.confusion_matrix
+    array([[2, 0],
+           [1, 0]])
+    >>> context.apply_metric('accuracy')
+    0.6666666666666666
+    """
+
+    def __init__(self, ground_truth, predicted, counts=None):
+        ground_truth = np.asarray(ground_truth)
+        predicted = np.asarray(predicted)
+
+        self.labels, codes = np.unique(
+            np.concatenate([ground_truth, predicted]), return_inverse=True
+        )
+        codes = codes.ravel()
+        self.ground_truth_codes = codes[: len(ground_truth)]
+        self.predicted_codes = codes[len(ground_truth) :]
+
+        num_labels = len(self.labels)
+        confusion_counts = _count(
+            self.ground_truth_codes * num_labels + self.predicted_codes,
+            counts,
+            minlength=num_labels * num_labels,
+        )
+        self.confusion_matrix = confusion_counts.reshape(
+            confusion_counts.shape[:-1] + (num_labels, num_labels)
+        )
+
+    def apply_metric(self, metric, **kwargs):
+        return find_metric(metric, self.METRICS)(self, **kwargs)
+
+    def _label_code(self, pos_label):
+        """
+        :return: the code of the positive label, -1 if it is absent of the labels.
+        The label is matched on its value first, then on its string representation,
+        so that a '1' read from a problem schema matches an integer label.
+        """
+        matches = np.flatnonzero(self.labels == pos_label)
+        if len(matches) == 0:
+            matches = np.flatnonzero(self.labels.astype(str) == str(pos_label))
+        return matches[0] if len(matches) > 0 else -1
+
+    def _binary_counts(self, pos_label):
+        """
+        :return: the (true positives, predicted positives, true positives + false negatives) counts
+        for the positive label
+        :raises: ValueError if the labels are not binary, or if pos_label is not one of them
+        """
+        if len(self.labels) > 2:
+            raise ValueError(
+                f"Target is multiclass but the metric is binary. Labels: {self.labels.tolist()}"
+            )
+
+        pos = self._label_code(pos_label)
+        if pos < 0:
+            if len(self.labels) == 2:
+                raise ValueError(
+                    f"pos_label={pos_label} is not a valid label: {self.labels.tolist()}"
                 )
-                for trial in trials
-            ]
+            zeros = np.zeros(self.confusion_matrix.shape[:-2], dtype=np.int64)
+            return zeros, zeros, zeros
+
+        cm = self.confusion_matrix
+        return (
+            cm[..., pos, pos],
+            cm[..., :, pos].sum(axis=-1),
+            cm[..., pos, :].sum(axis=-1),
+        )
+
+    def accuracy(self):
+        cm = self.confusion_matrix
+        correct = np.trace(cm, axis1=-2, axis2=-1)
+        return _as_score(correct / cm.sum(axis=(-2, -1)))
+
+    def precision(self, pos_label=1):
+        tp, predicted_pos, _ = self._binary_counts(pos_label)
+        return _as_score(_safe_divide(tp, predicted_pos))
+
+    def recall(self, pos_label=1):
+        tp, _, true_pos = self._binary_counts(pos_label)
+        return _as_score(_safe_divide(tp, true_pos))
+
+    def f1(self, pos_label=1):
+        tp, predicted_pos, true_pos = self._binary_counts(pos_label)
+        return _as_score(_f1_score(tp, predicted_pos, true_pos))
+
+    def f1_micro(self):
+        cm = self.confusion_matrix
+        tp = np.trace(cm, axis1=-2, axis2=-1)
+        total = cm.sum(axis=(-2, -1))
+        return _as_score(_f1_score(tp, total, total))
+
+    def f1_macro(self):
+        cm = self.confusion_matrix
+        tp = np.diagonal(cm, axis1=-2, axis2=-1)
+        predicted_pos = cm.sum(axis=-2)
+        true_pos = cm.sum(axis=-1)
+        scores = _f1_score(tp, predicted_pos, true_pos)
+
+        # mean over the labels of the ground truth and the predictions, which may be a subset
+        # of the labels for weighted counts
+        present = (predicted_pos + true_pos) > 0
+        return _as_score(
+            np.sum(np.where(present, scores, 0.0), axis=-1) / present.sum(axis=-1)
         )
-        numerator += class_loss / len(trials)
-    num_classes = len(class_to_trials)
-    return numerator / num_classes
+
+    METRICS = {
+        "accuracy": accuracy,
+        "f1": f1,
+        "f1Micro": f1_micro,
+        "f1Macro": f1_macro,
+        "jaccardSimilarityScore": accuracy,
+        "precision": precision,
+        "recall": recall,
+    }
+
+
+class RocAucContext:
+    """
+    Scoring context for the ROC AUC metrics family.
+
+    The ground truth is binarized once, as codes of the classes it contains. The AUC of a score
+    column is read from the counts of positive and negative samples at every distinct score
+    (the Mann-Whitney rank sum, ties counted as half), so the binary, micro and macro variants
+    share the same counts:
+
+    * real-valued scores are argsorted once,
+    * binarized label predictions are indicator columns, whose counts are all read from
+      one joint count of the (true class, predicted class) pairs.
+
+    As for ClassificationContext, the samples can be given as distinct pairs with their ``counts``,
+    a 2d array of counts giving one score per row. A row without positive or negative sample
+    scores NaN.
+
+    >>> context = RocAucContext([0, 1, 1, 0], [0.1, 0.4, 0.35, 0.8])
+    >>> context.apply_metric('rocAuc')
+    0.5
+    """
+
+    def __init__(self, ground_truth, predicted, counts=None):
+        self.classes, self.ground_truth_codes = np.unique(
+            np.asarray(ground_truth), return_inverse=True
+        )
+        self.ground_truth_codes = self.ground_truth_codes.ravel()
+        self.predicted = np.asarray(predicted)
+        self.counts = counts
+
+        self._score_counts = None
+        self._indicator_counts = None
+
+    def apply_metric(self, metric, **kwargs):
+        return find_metric(metric, self.METRICS)(self, **kwargs)
+
+    def _positive_class(self):
+        """
+        :return: the code of the positive class of a binary ground truth, its greater class
+        :raises: ValueError if the ground truth is not binary
+        """
+        if len(self.classes) < 2:
+            raise ValueError(
+                "Only one class present in y_true. ROC AUC score is not defined in that case."
+            )
+        if len(self.classes) > 2:
+            raise ValueError(
+                f"Target is multiclass but the metric is binary. Labels: {self.classes.tolist()}"
+            )
+        return 1
+
+    @property
+    def score_counts(self):
+        """
+        :return: (distinct scores, positive counts, negative counts) of the predicted scores,
+        the positive class being the greater ground truth class
+        """
+        if self._score_counts is None:
+            positive = self.ground_truth_codes == self._positive_class()
+            self._score_counts = _ranked_counts(self.predicted, positive, self.counts)
+        return self._score_counts
+
+    @property
+    def indicator_counts(self):
+        """
+        :return: list of (distinct scores, positive counts, negative counts) for the binarized
+        predictions of every ground truth class. Predicted labels absent of the ground truth
+        binarize to all-zero rows.
+        """
+        if self._indicator_counts is None:
+            num_classes = len(self.classes)
+            predicted_codes = _encode_labels(self.predicted, self.classes)
+            joint = _count(
+                self.ground_truth_codes * (num_classes + 1) + predicted_codes + 1,
+                self.counts,
+                minlength=num_classes * (num_classes + 1),
+            )
+            joint = joint.reshape(joint.shape[:-1] + (num_classes, num_classes + 1))
+            joint = joint[..., 1:]
+
+            true_count = _count(
+                self.ground_truth_codes, self.counts, minlength=num_classes
+            )
+            predicted_count = joint.sum(axis=-2)
+            total = true_count.sum(axis=-1)
+            self._indicator_counts = []
+            for c in range(num_classes):
+                true_positive = joint[..., c, c]
+                positive = np.stack(
+                    [true_count[..., c] - true_positive, true_positive], axis=-1
+                )
+                predicted_c = np.stack(
+                    [total - predicted_count[..., c], predicted_count[..., c]], axis=-1
+                )
+                self._indicator_counts.append(
+                    (np.array([0, 1]), positive, predicted_c - positive)
+                )
+        return self._indicator_counts
+
+    def _binarized_columns(self):
+        """
+        :return: the counts of the binarized prediction columns. Like sklearn's LabelBinarizer,
+        a binary ground truth binarizes to the column of its greater class only.
+
+        For a 2d array of counts, the classes are those present in every row of counts, and the
+        counts of the other columns are zeroed.
+        """
+        if np.ndim(self.counts) < 2:
+            if len(self.classes) == 2:
+                return self.indicator_counts[1:]
+            return self.indicator_counts
+
+        present = np.stack(
+            [positive.sum(axis=-1) > 0 for _, positive, _ in self.indicator_counts],
+            axis=-1,
+        )
+        num_present = present.sum(axis=-1, keepdims=True)
+        greatest = present & (np.cumsum(present[..., ::-1], axis=-1)[..., ::-1] == 1)
+        binarized = np.where(num_present == 2, greatest, present)
+        return [
+            (scores, positive * binarized[..., [c]], negative * binarized[..., [c]])
+            for c, (scores, positive, negative) in enumerate(self.indicator_counts)
+        ]
+
+    def roc_auc(self, pos_label=None):
+        if pos_label is None:
+            _, positive, negative = self.score_counts
+        else:
+            # AUC is unchanged when both the labels and the scores are flipped, so the positive
+            # label only selects the binarization of the binary classes.
+            _, positive, negative = self.indicator_counts[self._positive_class()]
+        return _roc_auc_from_counts(positive, negative)
+
+    def roc_auc_micro(self):
+        _, positive, negative = _merge_counts(self._binarized_columns())
+        return _roc_auc_from_counts(positive, negative)
+
+    def roc_auc_macro(self):
+        scores = [
+            _roc_auc_from_counts(positive, negative)
+            for _, positive, negative in self._binarized_columns()
+        ]
+        if np.ndim(self.counts) < 2:
+            return float(np.mean(scores))
+
+        # the columns zeroed in a row of counts score NaN
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            return np.nanmean(scores, axis=0)
+
+    METRICS = {
+        "rocAuc": roc_auc,
+        "rocAucMicro": roc_auc_micro,
+        "rocAucMacro": roc_auc_macro,
+    }
+
+
+class RegressionSums:
+    """
+    Sufficient statistics of the regression metrics, computed column by column in one
+    fused pass over float64 buffers: the number of rows, the sums of squared and absolute
+    errors, and the mean and centered sum of squares of the ground truth.
+
+    The rows are processed in blocks of BLOCK_SIZE so that the temporary arrays stay small,
+    and blocks are merged with the parallel update of Chan et al., which keeps the sum of
+    squares of the ground truth accurate where sum(y ** 2) - sum(y) ** 2 / n would cancel.
+    Further rows can be accumulated with ``update``.
+
+    Every statistic is an array with one value per column. Given ``counts``, the number of
+    occurrences of every row, the sums are weighted with matrix products. A 2d array of counts,
+    e.g. the multiplicities of bootstrap resamples, gives one row of statistics per row of counts.
+    """
+
+    BLOCK_SIZE = 2 ** 16
+    # Relative rounding error of the weighted sums: a centered sum of squares below it, e.g.
+    # of a resample drawing rows of the same ground truth only, is 0
+    ROUNDING_TOLERANCE = 2 ** 8 * np.finfo(np.float64).eps
+
+    def __init__(self, ground_truth=None, predicted=None, counts=None):
+        self.count = 0
+        self.squared_error = 0.0
+        self.absolute_error = 0.0
+        self.mean = 0.0
+        self.centered_squares = 0.0
+
+        if ground_truth is not None:
+            self.update(ground_truth, predicted, counts)
+
+    def update(self, ground_truth, predicted, counts=None):
+        ground_truth = _as_columns(ground_truth)
+        predicted = _as_columns(predicted)
+        if ground_truth.shape != predicted.shape:
+            raise ValueError(
+                f"Inconsistent shapes: ground truth {ground_truth.shape}, predictions {predicted.shape}"
+            )
+
+        if counts is not None:
+            self._update_weighted(ground_truth, predicted, counts)
+            return self
+
+        for start in range(0, len(ground_truth), self.BLOCK_SIZE):
+            y_true = ground_truth[start : start + self.BLOCK_SIZE]
+            error = predicted[start : start + self.BLOCK_SIZE] - y_true
+
+            block_count = len(y_true)
+            block_mean = y_true.sum(axis=0) / block_count
+            centered = y_true - block_mean
+            self._merge(
+                block_count,
+                (error * error).sum(axis=0),
+                np.abs(error).sum(axis=0),
+                block_mean,
+                (centered * centered).sum(axis=0),
+            )
+        return self
+
+    def _update_weighted(self, ground_truth, predicted, counts):
+        counts = np.asarray(counts, dtype=np.float64)
+        for start in range(0, len(ground_truth), self.BLOCK_SIZE):
+            weights = counts[..., start : start + self.BLOCK_SIZE]
+            y_true = ground_truth[start : start + self.BLOCK_SIZE]
+            error = predicted[start : start + self.BLOCK_SIZE] - y_true
+
+            # Weighted sums of the ground truth shifted by its unweighted mean, which keeps
+            # the sum of squares accurate
+            block_count = weights.sum(axis=-1)[..., np.newaxis]
+            shift = y_true.mean(axis=0)
+            shifted = y_true - shift
+            shifted_sum = weights @ shifted
+            shifted_squares = weights @ (shifted * shifted)
+            centered_squares = shifted_squares - shifted_sum * _safe_divide(
+                shifted_sum, block_count
+            )
+            centered_squares[
+                centered_squares <= self.ROUNDING_TOLERANCE * shifted_squares
+            ] = 0.0
+            self._merge(
+                block_count,
+                weights @ (error * error),
+                weights @ np.abs(error),
+                shift + _safe_divide(shifted_sum, block_count),
+                centered_squares,
+            )
+
+    def _merge(self, count, squared_error, absolute_error, mean, centered_squares):
+        total = self.count + count
+        delta = mean - self.mean
+        # means differing by their rounding only, e.g. of blocks of the same ground truth
+        delta = np.where(
+            np.abs(delta)
+            <= self.ROUNDING_TOLERANCE * np.maximum(np.abs(mean), np.abs(self.mean)),
+            0.0,
+            delta,
+        )
+        self.centered_squares = (
+            self.centered_squares
+            + centered_squares
+            + delta * delta * _safe_divide(self.count * count, total)
+        )
+        self.mean = self.mean + delta * _safe_divide(count, total)
+        self.squared_error = self.squared_error + squared_error
+        self.absolute_error = self.absolute_error + absolute_error
+        self.count = total
+
+
+def _as_columns(values):
+    """:return: a float64 array of shape (n_samples, n_columns)"""
+    values = np.asarray(values, dtype=np.float64)
+    return values.reshape(len(values), -1)
+
+
+class RegressionContext:
+    """
+    Scoring context for the regression metrics.
+
+    The regression sums of the target are computed once (see RegressionSums) and every
+    regression metric of the problem is derived from them.
+
+    >>> context = RegressionContext([3, -0.5, 2, 7], [2.5, 0.0, 2, 8])
+    >>> context.apply_metric('meanSquaredError')
+    0.375
+    """
+
+    def __init__(self, ground_truth, predicted, counts=None):
+        self.sums = RegressionSums(ground_truth, predicted, counts)
+
+    @classmethod
+    def from_sums(cls, sums):
+        """:return: the context of already accumulated regression sums"""
+        context = cls.__new__(cls)
+        context.sums = sums
+        return context
+
+    def apply_metric(self, metric, **kwargs):
+        return find_metric(metric, self.METRICS)(self, **kwargs)
+
+    def _column_mean_squared_errors(self):
+        return self.sums.squared_error / self.sums.count
+
+    def mean_squared_error(self):
+        return _as_score(np.mean(self._column_mean_squared_errors(), axis=-1))
+
+    def root_mean_squared_error(self):
+        return _as_score(np.mean(self._column_mean_squared_errors(), axis=-1) ** 0.5)
+
+    def root_mean_squared_error_avg(self):
+        return _as_score(np.mean(self._column_mean_squared_errors() ** 0.5, axis=-1))
+
+    def mean_absolute_error(self):
+        return _as_score(np.mean(self.sums.absolute_error / self.sums.count, axis=-1))
+
+    def r_squared(self):
+        numerator = self.sums.squared_error
+        denominator = self.sums.centered_squares
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = 1 - numerator / denominator
+        # A constant ground truth scores 1.0 if perfectly predicted, 0.0 otherwise
+        scores = np.where(denominator == 0, np.where(numerator == 0, 1.0, 0.0), scores)
+        return _as_score(np.mean(scores, axis=-1))
+
+    METRICS = {
+        "meanSquaredError": mean_squared_error,
+        "rootMeanSquaredError": root_mean_squared_error,
+        "rootMeanSquaredErrorAvg": root_mean_squared_error_avg,
+        "meanAbsoluteError": mean_absolute_error,
+        "rSquared": r_squared,
+    }
+
+
+def _ranked_counts(scores, positive, counts=None):
+    """
+    Sort the scores once and count the positive and negative samples of every distinct score.
+    Every sample stands for ``counts`` samples if the counts are given, along the last axis
+    of the counts.
+
+    :return: (distinct scores in ascending order, positive counts, negative counts)
+    """
+    order = np.argsort(scores, kind="mergesort")
+    sorted_scores = scores[order]
+    sorted_positive = positive[order].astype(np.int64)
+
+    starts = np.flatnonzero(np.r_[True, sorted_scores[1:] != sorted_scores[:-1]])
+    if counts is None:
+        positive_counts = np.add.reduceat(sorted_positive, starts)
+        score_counts = np.diff(np.r_[starts, len(sorted_scores)])
+    else:
+        sorted_counts = np.asarray(counts, dtype=np.int64)[..., order]
+        positive_counts = np.add.reduceat(
+            sorted_positive * sorted_counts, starts, axis=-1
+        )
+        score_counts = np.add.reduceat(sorted_counts, starts, axis=-1)
+    return sorted_scores[starts], positive_counts, score_counts - positive_counts
+
+
+def _merge_counts(counts_list):
+    """Pool several (distinct scores, positive counts, negative counts) triplets"""
+    scores, codes = np.unique(
+        np.concatenate([scores for scores, _, _ in counts_list]), return_inverse=True
+    )
+    codes = codes.ravel()
+    positive = _count(
+        codes,
+        np.concatenate([p for _, p, _ in counts_list], axis=-1),
+        minlength=len(scores),
+    )
+    negative = _count(
+        codes,
+        np.concatenate([n for _, _, n in counts_list], axis=-1),
+        minlength=len(scores),
+    )
+    return scores, positive, negative
+
+
+def _roc_auc_from_counts(positive_counts, negative_counts):
+    """
+    Area under the ROC curve from the positive and negative counts of every distinct score,
+    in ascending score order: the rank sum of the positive samples (Mann-Whitney U) with
+    tied samples counted as half, normalized by the number of (positive, negative) pairs.
+
+    The counts are batched along their leading dimensions, a batch without positive or negative
+    sample scoring NaN.
+    """
+    num_positive = positive_counts.sum(axis=-1)
+    num_negative = negative_counts.sum(axis=-1)
+    negatives_below = np.cumsum(negative_counts, axis=-1) - negative_counts
+    twice_u = np.sum(positive_counts * (2 * negatives_below + negative_counts), axis=-1)
+
+    if np.ndim(twice_u) > 0:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return twice_u / (2.0 * num_positive * num_negative)
+
+    if num_positive == 0 or num_negative == 0:
+        raise ValueError(
+            "Only one class present in y_true. ROC AUC score is not defined in that case."
+        )
+    return int(twice_u) / (2 * int(num_positive) * int(num_negative))
+
+
+def _count(codes, counts=None, minlength=0):
+    """
+    :return: the number of occurrences of every code as int64, every element standing for
+    ``counts`` occurrences if the counts are given
+    """
+    if counts is None:
+        return np.bincount(codes, minlength=minlength)
+    return _bincount(codes, counts, minlength).astype(np.int64)
+
+
+def _bincount(codes, weights, minlength=0):
+    """
+    np.bincount of the codes with weights, batched over the leading dimensions of the weights:
+    the last dimension of the weights matches the codes.
+
+    :return: array of shape weights.shape[:-1] + (max(minlength, max(codes) + 1),)
+    """
+    weights = np.asarray(weights)
+    if weights.ndim <= 1:
+        return np.bincount(codes, weights=weights, minlength=minlength)
+
+    minlength = max(minlength, int(codes.max(initial=-1)) + 1)
+    batch_shape = weights.shape[:-1]
+    offsets = np.arange(int(np.prod(batch_shape)))[:, np.newaxis] * minlength
+    return np.bincount(
+        (codes + offsets).ravel(),
+        weights=weights.reshape(-1, weights.shape[-1]).ravel(),
+        minlength=offsets.size * minlength,
+    ).reshape(batch_shape + (minlength,))
+
+
+def _safe_divide(numerator, denominator):
+    """Element-wise division, 0.0 where the denominator is 0"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.true_divide(numerator, denominator)
+    return np.where(denominator == 0, 0.0, ratio)
+
+
+def _f1_score(tp, predicted_pos, true_pos):
+    """F1 as the harmonic mean of precision and recall, 0.0 where there is no true positive"""
+    precision_ = _safe_divide(tp, predicted_pos)
+    recall_ = _safe_divide(tp, true_pos)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f_score = 2 * precision_ * recall_ / (precision_ + recall_)
+    return np.where(tp == 0, 0.0, f_score)
+
+
+def _as_score(value):
+    """Scalar scores are returned as python floats, batched scores as arrays"""
+    return float(value) if np.ndim(value) == 0 else value
 
 
 METRICS_DICT = {
@@ -359,6 +957,8 @@ METRICS_DICT = {
     "precisionAtTopK": precision_at_top_K_meta,
     "objectDetectionAP": objectDetectionAP,
     "object_detection_average_precision": objectDetectionAP,
+    "objectDetectionAPs": objectDetectionAPs,
+    "objectDetectionMAP": objectDetectionMAP,
     "precision": precision,
     "recall": recall,
     "crossEntropy": mxe,
@@ -384,3 +984,98 @@ def valid_metric(metric):
 
 def apply_metric(metric, *args, **kwargs):
     return find_metric(metric)(*args, **kwargs)
+
+
+METRIC_CONTEXTS = [ClassificationContext, RocAucContext, RegressionContext]
+
+
+def find_metric_context(metric):
+    """
+    :return: the scoring context class which computes the metric, None if the metric
+    is computed by a standalone function only
+    """
+    for context in METRIC_CONTEXTS:
+        try:
+            _ = find_metric(metric, context.METRICS)
+        except KeyError:
+            continue
+        return context
+    return None
+
+
+# Maximum number of (resample, sample) multiplicities drawn at once by the bootstrap
+BOOTSTRAP_BATCH_SIZE = 2 ** 24
+
+
+def bootstrap_counts(num_samples, num_resamples, seed=None):
+    """
+    Draw bootstrap resamples of ``num_samples`` samples, as the multiplicity of every sample in
+    every resample: the resample indices are drawn as one integer matrix and counted with a
+    single np.bincount.
+
+    The resamples are generated in batches of at most BOOTSTRAP_BATCH_SIZE multiplicities, and
+    the same seed gives the same resamples.
+
+    :return: generator of (batch size, num_samples) arrays of multiplicities
+    """
+    rng = np.random.RandomState(seed)
+    batch_size = max(1, BOOTSTRAP_BATCH_SIZE // max(num_samples, 1))
+    for start in range(0, num_resamples, batch_size):
+        size = min(batch_size, num_resamples - start)
+        indices = rng.randint(0, num_samples, size=(size, num_samples))
+        offsets = np.arange(size)[:, np.newaxis] * num_samples
+        yield np.bincount(
+            (indices + offsets).ravel(), minlength=size * num_samples
+        ).reshape(size, num_samples)
+
+
+def bootstrap_metric(metric, ground_truth, predicted, counts, **kwargs):
+    """
+    Compute a metric on bootstrap resamples of the samples.
+
+    The metrics of the scoring contexts are computed for all the resamples at once, from counts
+    weighted by the multiplicities (batched confusion matrices, rank counts and regression sums).
+    The other metrics are computed resample by resample. A resample on which the metric is not
+    defined, e.g. with a single class for the ROC AUC, scores NaN.
+
+    Parameters:
+    -----------
+    counts: 2d array
+        Multiplicities of the samples in every resample, see bootstrap_counts.
+
+    Returns:
+    --------
+    scores: array
+        Score of every resample, along the first axis.
+    """
+    context_class = find_metric_context(metric)
+    if context_class is not None:
+        context = context_class(ground_truth, predicted, counts=counts)
+        return np.asarray(context.apply_metric(metric, **kwargs), dtype=np.float64)
+
+    ground_truth = np.asarray(ground_truth)
+    predicted = np.asarray(predicted)
+    scores = list()
+    for multiplicities in counts:
+        rows = np.repeat(np.arange(len(multiplicities)), multiplicities)
+        try:
+            scores.append(
+                apply_metric(metric, ground_truth[rows], predicted[rows], **kwargs)
+            )
+        except ValueError:
+            scores.append(np.nan)
+    return np.asarray(scores, dtype=np.float64)
+
+
+def confidence_interval(scores, confidence_level=0.95):
+    """
+    Percentile confidence interval of bootstrap scores, ignoring the resamples scoring NaN.
+
+    :return: array of shape scores.shape[1:] + (2,) of the (lower, upper) bounds
+    """
+    alpha = (1 - confidence_level) / 2
+    with warnings.catch_warnings():
+        # all-NaN scores give NaN bounds
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        bounds = np.nanpercentile(scores, [100 * alpha, 100 * (1 - alpha)], axis=0)
+    return np.moveaxis(bounds, 0, -1)
@@ -3,6 +3,7 @@
 import logging
 
 import numpy as np
+import pandas
 
 
 def group_gt_boxes_by_image_name(gt_boxes):
@@ -110,9 +111,8 @@ def voc_ap(rec, prec, use_07_metric=False):
         mrec = np.concatenate(([0.0], rec, [1.0]))
         mpre = np.concatenate(([0.0], prec, [0.0]))
 
-        # compute the precision envelope
-        for i in range(mpre.size - 1, 0, -1):
-            mpre[i - 1] = np.maximum(mpre[i - 1], mpre[i])
+        # compute the precision envelope, the running maximum from the right
+        mpre = np.maximum.accumulate(mpre[::-1])[::-1]
 
         # to calculate area under PR curve, look for points
         # where X axis (recall) changes value
@@ -131,9 +131,9 @@ def objectDetectionAP(dets, gts, ovthresh=0.5, use_07_metric=False):
 
     Parameters:
     -----------
-    dets: list
-     List of bounding box detections. Each box is represented as a list
-     with format:
+    dets: list or pandas.DataFrame
+     List of bounding box detections, or DataFrame with the same columns (see parse_boxes).
+     Each box is represented as a list with format:
          Case 1 (confidence provided):
              ['image_name', 'x_min', 'y_min', 'x_max', 'y_max', 'confidence']
          Case 2 (confidence not provided):
@@ -143,7 +143,7 @@ def objectDetectionAP(dets, gts, ovthresh=0.5, use_07_metric=False):
          Case 4 (confidence not provided, coordinates as string):
              ['image_name', 'x_min, 'y_min, x_max, y_max']
 
-    gts: list
+    gts: list or pandas.DataFrame
      List of ground truth boxes. Each box is represented as a list with the
      following format: [image_name, x_min, y_min, x_max, y_max].
 
@@ -209,100 +209,285 @@ def objectDetectionAP(dets, gts, ovthresh=0.5, use_07_metric=False):
 
     """
 
-    # Unvectorize the detected bounding boxes
-    dets = unvectorize(dets)
-    gts = unvectorize(gts)
+    ovmax, jmax, npos = _detection_overlaps(dets, gts)
+
+    # go down dets and mark TPs and FPs
+    tp, fp = _greedy_matches(ovmax, jmax, ovthresh)
+
+    rec, prec = _precision_recall(tp, fp, npos)
+    ap = voc_ap(rec, prec, use_07_metric)
 
-    # Load ground truth
-    gt_dict = group_gt_boxes_by_image_name(gts)
+    return rec, prec, ap
 
-    # extract gt objects for this class
-    recs = {}
-    npos = 0
 
-    imagenames = sorted(gt_dict.keys())
-    for imagename in imagenames:
-        R = [obj for obj in gt_dict[imagename]]
-        bbox = np.array([x["bbox"] for x in R])
-        det = [False] * len(R)
-        npos = npos + len(R)
-        recs[imagename] = {"bbox": bbox, "det": det}
+# IoU thresholds of the COCO mAP@[.5:.95]
+COCO_THRESHOLDS = np.linspace(0.5, 0.95, 10)
 
-    # Load detections
-    det_length = len(dets[0])
 
-    # Check that all boxes are the same size
-    for det in dets:
-        assert len(det) == det_length, "Not all boxes have the same dimensions."
+def objectDetectionAPs(dets, gts, ovthresh=COCO_THRESHOLDS, use_07_metric=False):
+    """
+    This function computes the average precision of the detections for several overlap
+    thresholds, from a single computation of the overlaps between the detected boxes and the
+    ground truth boxes.
+
+    Parameters:
+    -----------
+    dets: list
+     List of bounding box detections, see objectDetectionAP.
+
+    gts: list
+     List of ground truth boxes, see objectDetectionAP.
+
+    [ovthresh]: 1d array-like
+     Overlap thresholds (default = COCO_THRESHOLDS, 0.5 to 0.95 by steps of 0.05)
+
+    [use_07_metric]: boolean
+     Whether to use VOC07's 11 point AP computation (default False)
+
+    Returns:
+    --------
+    aps: list of float
+     Average precision for every overlap threshold, as objectDetectionAP computes it, in the
+     order of the thresholds. The mean of the list is objectDetectionMAP for the default
+     thresholds.
+    """
+    ovmax, jmax, npos = _detection_overlaps(dets, gts)
+
+    tp, fp = _greedy_matches(ovmax, jmax, np.atleast_1d(ovthresh))
+    rec, prec = _precision_recall(tp, fp, npos)
+    return [float(voc_ap(r, p, use_07_metric)) for r, p in zip(rec, prec)]
+
+
+def objectDetectionMAP(dets, gts, use_07_metric=False):
+    """
+    Mean of the average precisions for the overlap thresholds of the COCO mAP@[.5:.95]
+    """
+    return float(np.mean(objectDetectionAPs(dets, gts, COCO_THRESHOLDS, use_07_metric)))
+
+
+def parse_boxes(boxes):
+    """
+    Columnar parsing of bounding boxes into arrays.
+
+    Parameters:
+    -----------
+    boxes: pandas.DataFrame or list
+     Bounding boxes, one row per box, with the columns of the lists of objectDetectionAP:
+        ['image_name', 'x_min, y_min, x_max, y_max'(, 'confidence')] or
+        ['image_name', 'x_min', 'y_min', 'x_max', 'y_max'(, 'confidence')]
+
+    Returns:
+    --------
+    image_ids: 1d array
+     Image name of every box.
+
+    bbox: 2d array
+     (n, 4) float64 array of the [x_min, y_min, x_max, y_max] coordinates. Coordinates given
+     as a string are split with one vectorized string split of the column.
+
+    confidence: 1d array or None
+     Confidence of every box, None if the boxes have no confidence column.
+    """
+    if not isinstance(boxes, pandas.DataFrame):
+        box_length = len(boxes[0])
+        # Check that all boxes are the same size
+        for box in boxes:
+            assert len(box) == box_length, "Not all boxes have the same dimensions."
+        boxes = pandas.DataFrame(boxes)
+
+    image_ids = boxes.iloc[:, 0].to_numpy()
+    if boxes.shape[1] <= 3:
+        coordinates = boxes.iloc[:, 1].astype(str).str.split(",", expand=True)
+        others = boxes.iloc[:, 2:]
+    else:
+        coordinates = boxes.iloc[:, 1:5]
+        others = boxes.iloc[:, 5:]
+    if coordinates.shape[1] != 4:
+        raise ValueError(
+            f"Bounding boxes must have 4 coordinates, found {coordinates.shape[1]}"
+        )
+    bbox = coordinates.to_numpy(dtype=object).astype(np.float64)
+
+    confidence = None
+    if others.shape[1] == 1:
+        confidence = others.iloc[:, 0].to_numpy(dtype=object).astype(np.float64)
+    return image_ids, bbox, confidence
+
+
+def _detection_overlaps(dets, gts):
+    """
+    Parse the detections and the ground truth boxes, and find the ground truth box that every
+    detection overlaps the most, the detections being in decreasing confidence order.
+
+    :return: (ovmax, jmax, npos): the greatest overlap of every detection, the index of that
+    ground truth box, and the number of ground truth boxes
+    """
+    gt_image_ids, BBGT, _ = parse_boxes(gts)
+    image_ids, BB, confidence = parse_boxes(dets)
+    npos = len(BBGT)
+
+    # Image names to integer codes, with one factorization of the ground truth and
+    # detection image names
+    codes, imagenames = pandas.factorize(np.concatenate([gt_image_ids, image_ids]))
+    gt_images, det_images = codes[:npos], codes[npos:]
 
-    image_ids = [x[0] for x in dets]
-    BB = np.array([[float(z) for z in x[1:5]] for x in dets])
+    # Load ground truth, grouped by image with one stable sort of the image codes, the boxes of
+    # every image in their original order
+    gt_counts = np.bincount(gt_images, minlength=len(imagenames))
+    BBGT = BBGT[np.argsort(gt_images, kind="mergesort")]
+    gt_offsets = np.concatenate(([0], np.cumsum(gt_counts)))
 
-    if det_length == 6:
+    # Load detections
+    if confidence is not None:
         logging.info("confidence scores are present")
-        confidence = np.array([float(x[-1]) for x in dets])
         # sort by confidence
         sorted_ind = np.argsort(-confidence)
 
     else:
         logging.info("confidence scores are not present")
-        num_dets = len(dets)
+        num_dets = len(BB)
         sorted_ind = np.arange(num_dets)
 
     BB = BB[sorted_ind, :]
-    image_ids = [image_ids[x] for x in sorted_ind]
+    det_images = det_images[sorted_ind]
 
-    # go down dets and mark TPs and FPs
-    nd = len(image_ids)
-    tp = np.zeros(nd)
-    fp = np.zeros(nd)
-    for d in range(nd):
-        R = recs[image_ids[d]]
-        bb = BB[d, :].astype(float)
-        ovmax = -np.inf
-        BBGT = R["bbox"].astype(float)
-
-        if BBGT.size > 0:
-            # compute overlaps
-            # intersection
-            ixmin = np.maximum(BBGT[:, 0], bb[0])
-            iymin = np.maximum(BBGT[:, 1], bb[1])
-            ixmax = np.minimum(BBGT[:, 2], bb[2])
-            iymax = np.minimum(BBGT[:, 3], bb[3])
-            iw = np.maximum(ixmax - ixmin + 1.0, 0.0)
-            ih = np.maximum(iymax - iymin + 1.0, 0.0)
-            inters = iw * ih
-
-            # union
-            uni = (
-                (bb[2] - bb[0] + 1.0) * (bb[3] - bb[1] + 1.0)
-                + (BBGT[:, 2] - BBGT[:, 0] + 1.0) * (BBGT[:, 3] - BBGT[:, 1] + 1.0)
-                - inters
-            )
-
-            overlaps = inters / uni
-            ovmax = np.max(overlaps)
-            jmax = np.argmax(overlaps)
-
-        if ovmax > ovthresh:
-            if not R["det"][jmax]:
-                # print('Box matched!')
-                tp[d] = 1.0
-                R["det"][jmax] = 1
-            else:
-                # print('Box was already taken!')
-                fp[d] = 1.0
-        else:
-            # print('No match with sufficient overlap!')
-            fp[d] = 1.0
+    missing = np.flatnonzero(gt_counts[det_images] == 0)
+    if len(missing) > 0:
+        raise KeyError(image_ids[sorted_ind[missing[0]]])
+
+    ovmax, jmax = _best_overlaps(BB, det_images, BBGT, gt_offsets)
+    return ovmax, jmax, npos
 
-    # compute precision recall
-    fp = np.cumsum(fp)
-    tp = np.cumsum(tp)
+
+def _precision_recall(tp, fp, npos):
+    """
+    :return: (rec, prec), the recall and the precision after every detection, along the last axis
+    """
+    fp = np.cumsum(fp, axis=-1)
+    tp = np.cumsum(tp, axis=-1)
     rec = tp / float(npos)
     # avoid divide by zero in case the first detection matches a difficult
     # ground truth
     prec = tp / np.maximum(tp + fp, np.finfo(np.float64).eps)
-    ap = voc_ap(rec, prec, use_07_metric)
+    return rec, prec
 
-    return rec, prec, ap
+
+# Maximum number of (detection, ground truth box) pairs whose overlaps are computed at once
+MAX_PAIRS = 2 ** 20
+
+
+def _overlaps(bb, BBGT):
+    """
+    Overlaps (intersection over union) of the boxes of two (n, 4) arrays, row by row.
+    The boxes include their edges, hence the +1 in the widths and heights.
+    """
+    # intersection
+    ixmin = np.maximum(BBGT[:, 0], bb[:, 0])
+    iymin = np.maximum(BBGT[:, 1], bb[:, 1])
+    ixmax = np.minimum(BBGT[:, 2], bb[:, 2])
+    iymax = np.minimum(BBGT[:, 3], bb[:, 3])
+    iw = np.maximum(ixmax - ixmin + 1.0, 0.0)
+    ih = np.maximum(iymax - iymin + 1.0, 0.0)
+    inters = iw * ih
+
+    # union
+    uni = (
+        (bb[:, 2] - bb[:, 0] + 1.0) * (bb[:, 3] - bb[:, 1] + 1.0)
+        + (BBGT[:, 2] - BBGT[:, 0] + 1.0) * (BBGT[:, 3] - BBGT[:, 1] + 1.0)
+        - inters
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return inters / uni
+
+
+def _best_overlaps(BB, det_images, BBGT, gt_offsets):
+    """
+    Find the ground truth box of its image that every detection overlaps the most.
+
+    The overlaps of all the (detection, ground truth box of the same image) pairs are computed
+    at once, in batches of about MAX_PAIRS pairs.
+
+    Parameters:
+    -----------
+    BB: 2d array
+     Detected boxes, one [x_min, y_min, x_max, y_max] row per detection.
+
+    det_images: 1d array
+     Image index of every detection.
+
+    BBGT: 2d array
+     Ground truth boxes, grouped by image.
+
+    gt_offsets: 1d array
+     Offsets of the boxes of every image in BBGT, with a final offset len(BBGT).
+
+    Returns:
+    --------
+    ovmax: 1d array
+     Greatest overlap of every detection.
+
+    jmax: 1d array
+     Index in BBGT of the first box with the greatest overlap.
+    """
+    nd = len(det_images)
+    starts = gt_offsets[det_images]
+    counts = gt_offsets[det_images + 1] - starts
+    cumulative_counts = np.cumsum(counts)
+
+    ovmax = np.empty(nd)
+    jmax = np.empty(nd, dtype=np.intp)
+    begin = 0
+    while begin < nd:
+        first_pair = cumulative_counts[begin] - counts[begin]
+        end = max(
+            begin + 1,
+            np.searchsorted(cumulative_counts, first_pair + MAX_PAIRS, side="right"),
+        )
+
+        batch_counts = counts[begin:end]
+        segments = cumulative_counts[begin:end] - batch_counts - first_pair
+        pair_det = np.repeat(np.arange(begin, end), batch_counts)
+        pair_gt = (
+            np.arange(len(pair_det))
+            - np.repeat(segments, batch_counts)
+            + np.repeat(starts[begin:end], batch_counts)
+        )
+
+        overlaps = _overlaps(BB[pair_det], BBGT[pair_gt])
+
+        # np.max and np.argmax of every detection: the maximum propagates NaN, and the first
+        # pair equal to the maximum, or the first NaN, is the argmax
+        best = np.maximum.reduceat(overlaps, segments)
+        pair_best = np.repeat(best, batch_counts)
+        is_best = (overlaps == pair_best) | (np.isnan(overlaps) & np.isnan(pair_best))
+        first_best = np.minimum.reduceat(
+            np.where(is_best, np.arange(len(pair_det)), len(pair_det)), segments
+        )
+
+        ovmax[begin:end] = best
+        jmax[begin:end] = pair_gt[first_best]
+        begin = end
+
+    return ovmax, jmax
+
+
+def _greedy_matches(ovmax, jmax, ovthresh):
+    """
+    Mark the detections, in decreasing confidence order, as true or false positives: a detection
+    is a true positive if it overlaps a ground truth box more than ``ovthresh`` and is the first
+    detection to do so for that box.
+
+    For an array of thresholds, the detections are matched for all of them at once, each
+    (threshold, ground truth box) pair being matched once.
+
+    :return: (tp, fp) arrays of 0. and 1., of shape ovthresh.shape + ovmax.shape
+    """
+    nd = len(ovmax)
+    candidates = np.flatnonzero(ovmax > np.asarray(ovthresh)[..., np.newaxis])
+    keys = (candidates // nd) * (int(jmax.max(initial=0)) + 1) + jmax[candidates % nd]
+    _, first = np.unique(keys, return_index=True)
+
+    tp = np.zeros(np.shape(ovthresh) + (nd,))
+    tp.ravel()[candidates[first]] = 1.0
+    return tp, 1.0 - tp
@@ -0,0 +1,252 @@
+# Contents subject to LICENSE.txt at project root
+
+"""
+On-disk cache of the verdicts of pipeline log validations.
+
+A verdict is stored under a hash of the content of the pipeline log, the validation flags and
+the versions of dval and d3m. Validating an unchanged log again returns its stored verdict and replays the
+messages logged by its validation, without parsing the pipeline nor calling Pipeline.check:
+
+>>> from dval.pipeline_cache import VerdictCache, is_pipeline_valid_cached
+>>> is_pipeline_valid_cached('path/to/my.json', VerdictCache())
+True
+
+Every verdict is a small JSON file of the cache directory, which is shared by concurrent
+validations. The least recently used verdicts are evicted beyond max_size bytes.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from . import __version__
+
+DEFAULT_MAX_SIZE = 64 * 2 ** 20
+FLAG_NAMES = ["allow_2017_format", "check_bare_2018_format", "enforce_2018_format"]
+
+
+def default_cache_dir():
+    """
+    :return: $DVAL_CACHE_DIR, or the pipelines directory of the dval user cache
+    """
+    if os.environ.get("DVAL_CACHE_DIR"):
+        return os.environ["DVAL_CACHE_DIR"]
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "dval", "pipelines")
+
+
+def d3m_version():
+    import d3m
+
+    return d3m.__version__
+
+
+class VerdictCache:
+    """
+    Verdicts of pipeline log validations stored in a directory, created on first write.
+
+    :param directory: cache directory, default_cache_dir() if None
+    :param max_size: size in bytes of the verdicts kept by evict()
+    """
+
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+        self.directory = default_cache_dir() if directory is None else directory
+        self.max_size = max_size
+
+    def key(self, content, flags):
+        """
+        :param content: bytes of the pipeline log
+        :param flags: effective validation flags, by name
+        :return: hexadecimal key of the verdict
+        """
+        digest = hashlib.blake2b(content, digest_size=20)
+        digest.update(
+            json.dumps(
+                dict(flags={name: bool(flags[name]) for name in FLAG_NAMES}),
+                sort_keys=True,
+            ).encode()
+        )
+        digest.update(__version__.encode())
+        digest.update(d3m_version().encode())
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        """
+        :return: the stored entry, as given to put, or None. A hit marks the entry as recently used.
+        """
+        path = self.path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, key, entry):
+        """
+        Store an entry, written to a temporary file first so that concurrent validations never
+        read it partially.
+
+        :param entry: dict serializable to JSON
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.path(key))
+        except OSError as e:
+            logging.warning(
+                f"Could not write to the pipeline cache {self.directory}: {e}"
+            )
+
+    def evict(self):
+        """
+        Remove the least recently used verdicts until the cache holds max_size bytes at most.
+
+        :return: number of verdicts removed
+        """
+        try:
+            entries = [
+                (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                for entry in os.scandir(self.directory)
+                if entry.name.endswith(".json")
+            ]
+        except FileNotFoundError:
+            return 0
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        removed = 0
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+            removed += 1
+        return removed
+
+
+class _RecordingHandler(logging.Handler):
+    """
+    Records the messages of the threads validating a pipeline log, each in its own list, so that
+    concurrent validations do not record the messages of each other.
+
+    Being installed once, and never removed, it needs no lock around the logger handlers.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(logging.Formatter("%(message)s"))
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def recording(self):
+        """
+        :return: context manager of the list of the records of the current thread
+        """
+        records = self._local.records = list()
+        try:
+            yield records
+        finally:
+            self._local.records = None
+
+    def emit(self, record):
+        records = getattr(self._local, "records", None)
+        if records is not None:
+            records.append([record.levelno, record.name, self.format(record)])
+
+    def handle(self, record):
+        super().handle(record)
+        # this handler must not hide the messages shown by logging.lastResort without any other
+        if (
+            logging.lastResort is not None
+            and record.levelno >= logging.lastResort.level
+            and not self._has_other_handlers(logging.getLogger(record.name))
+        ):
+            logging.lastResort.handle(record)
+
+    def _has_other_handlers(self, logger):
+        while logger is not None:
+            if any(handler is not self for handler in logger.handlers):
+                return True
+            if not logger.propagate:
+                break
+            logger = logger.parent
+        return False
+
+
+_recording_handler = None
+_recording_handler_lock = threading.Lock()
+
+
+def _recording_handler_of(logger):
+    """
+    :return: the recording handler, added to the logger on first use
+    """
+    global _recording_handler
+    with _recording_handler_lock:
+        if _recording_handler is None:
+            _recording_handler = _RecordingHandler()
+            logger.addHandler(_recording_handler)
+    return _recording_handler
+
+
+def _replay(records):
+    for levelno, name, message in records:
+        logger = logging.getLogger() if name == "root" else logging.getLogger(name)
+        logger.log(levelno, message)
+
+
+def is_pipeline_valid_cached(pipeline_uri, cache, **flags):
+    """
+    is_pipeline_valid, whose verdict is read from and stored in the cache.
+
+    :param cache: VerdictCache
+    :param flags: allow_2017_format, check_bare_2018_format and enforce_2018_format, the defaults
+    of is_pipeline_valid otherwise
+    """
+    with open(pipeline_uri, "rb") as f:
+        content = f.read()
+
+    if any(name not in flags for name in FLAG_NAMES):
+        from . import pipeline_logs_validator
+
+        flags = dict(
+            dict(
+                allow_2017_format=pipeline_logs_validator.ALLOW_2017_FORMAT,
+                check_bare_2018_format=pipeline_logs_validator.CHECK_BARE_2018_FORMAT,
+                enforce_2018_format=pipeline_logs_validator.ENFORCE_2018_FORMAT,
+            ),
+            **flags,
+        )
+
+    key = cache.key(content, flags)
+    entry = cache.get(key)
+    if entry is not None:
+        _replay(entry["log"])
+        return entry["valid"]
+
+    from . import pipeline_logs_validator
+
+    handler = _recording_handler_of(pipeline_logs_validator.logger)
+    with handler.recording() as records:
+        valid = pipeline_logs_validator.is_pipeline_valid(
+            pipeline_uri, pipeline=json.loads(content.decode()), **flags
+        )
+
+    valid = bool(valid)
+    cache.put(key, dict(valid=valid, log=records, pipeline_uri=pipeline_uri))
+    return valid
@@ -23,7 +23,7 @@ ALLOW_2017_FORMAT = False
 CHECK_BARE_2018_FORMAT = True
 ENFORCE_2018_FORMAT = True
 
-logger = logging.Logger(__name__)
+logger = logging.getLogger(__name__)
 
 
 class NoPrimitiveCheckResolver(Resolver):
@@ -45,14 +45,20 @@ def is_pipeline_valid(
     allow_2017_format=ALLOW_2017_FORMAT,
     check_bare_2018_format=CHECK_BARE_2018_FORMAT,
     enforce_2018_format=ENFORCE_2018_FORMAT,
+    pipeline=None,
 ):
-    pipeline = load_json(pipeline_uri)
+    """
+    :param pipeline: description of the pipeline, loaded from pipeline_uri if None. The file is
+    parsed once, for all the checks.
+    """
+    if pipeline is None:
+        pipeline = load_json(pipeline_uri)
 
     # If we allow 2017 format, return True if the pipeline is valid
     format_2017_valid = False
     if allow_2017_format:
         format_2017_valid = is_pipeline_valid_old_schema(pipeline)
-        logging.info(f"2017 pipeline format, valid={format_2017_valid}")
+        logger.info(f"2017 pipeline format, valid={format_2017_valid}")
 
         if format_2017_valid:
             return True
@@ -62,12 +68,12 @@ def is_pipeline_valid(
         valid_2018 = True
         if check_bare_2018_format:
             bare_2018_valid = is_pipeline_valid_bare(pipeline)
-            logging.info(f"2018 'bare' format, valid={bare_2018_valid}")
+            logger.info(f"2018 'bare' format, valid={bare_2018_valid}")
             valid_2018 &= bare_2018_valid
 
         if enforce_2018_format:
-            full_2018_valid = is_pipeline_valid_full_validation(pipeline_uri)
-            logging.info(f"2018 full format, valid={full_2018_valid}")
+            full_2018_valid = is_pipeline_valid_full_validation(pipeline_uri, pipeline)
+            logger.info(f"2018 full format, valid={full_2018_valid}")
             valid_2018 &= full_2018_valid
 
         return valid_2018
@@ -75,23 +81,33 @@ def is_pipeline_valid(
     # If we come here, either the 2017 test didn't pass, or no check was performed
     # If the 2017 test didn't happen, no test was performed so it's invalid by default
     if not allow_2017_format:
-        logging.error("No check performed")
+        logger.error("No check performed")
 
     return False
 
 
-def is_pipeline_valid_full_validation(pipeline_path):
+def is_pipeline_valid_full_validation(pipeline_path, pipeline=None):
+    """
+    :param pipeline: description of the pipeline, parsed from pipeline_path if None
+    """
     resolver = NoPrimitiveCheckResolver()
 
+    if not pipeline_path.endswith((".yml", ".json")):
+        logger.error("Unknown file extension.")
+        return False
+
     try:
-        with open(pipeline_path, "r") as pipeline_file:
-            if pipeline_path.endswith(".yml"):
-                pipeline = Pipeline.from_yaml(pipeline_file, resolver=resolver)
-            elif pipeline_path.endswith(".json"):
-                pipeline = Pipeline.from_json(pipeline_file, resolver=resolver)
-            else:
-                logger.error("Unknown file extension.")
-                return False
+        if pipeline is None:
+            with open(pipeline_path, "r") as pipeline_file:
+                if pipeline_path.endswith(".yml"):
+                    import yaml
+
+                    pipeline = yaml.safe_load(pipeline_file)
+                else:
+                    pipeline = json.load(pipeline_file)
+
+        # what Pipeline.from_json and Pipeline.from_yaml do once the file is parsed
+        pipeline = Pipeline.from_json_structure(pipeline, resolver=resolver)
 
     except Exception:
         logger.exception(
@@ -130,10 +146,10 @@ def is_pipeline_valid_old_schema(pipeline):
 
     for field, constraint in required_fields.items():
         if field not in pipeline:
-            logging.error(f"Missing field {field}")
+            logger.error(f"Missing field {field}")
             valid = False
         elif not constraint(pipeline[field]):
-            logging.error(f"Field {field} has an incorrect value.")
+            logger.error(f"Field {field} has an incorrect value.")
             valid = False
 
     if not valid:
@@ -143,14 +159,12 @@ def is_pipeline_valid_old_schema(pipeline):
         [x for x in pipeline["primitives"] if pipeline["primitives"].count(x) > 1]
     )
     if len(duplicate_primitives) > 0:
-        logging.error(
+        logger.error(
             f"Found duplicate primitives in the primitive set: {duplicate_primitives}"
         )
         valid = False
 
-    logging.info(
-        f'Log file for pipeline of rank {pipeline["pipeline_rank"]} was valid.'
-    )
+    logger.info(f'Log file for pipeline of rank {pipeline["pipeline_rank"]} was valid.')
     return valid
 
 
@@ -173,10 +187,10 @@ def is_pipeline_valid_bare(pipeline):
 
     for field, cond in required_fields.items():
         if field not in pipeline:
-            logging.error(f"Missing field {field}")
+            logger.error(f"Missing field {field}")
             valid = False
         elif not cond(pipeline[field]):
-            logging.error(f"Field {field} has an incorrect value.")
+            logger.error(f"Field {field} has an incorrect value.")
             valid = False
 
     return valid
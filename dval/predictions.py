@@ -18,7 +18,15 @@ True
 >>> p.score(groundtruth_path)
 [Score(target='Hall_Of_Fame', metric='f1', scorevalue=0.691369766848)]
 
-Option 2: Using the wrapper functions
+Option 2: Using a scoring context, to validate and score many files of a SCORE directory
+>>> from dval.predictions import ScoringContext
+>>> context = ScoringContext(path_to_score_root)
+>>> context.is_valid(result_file_path)
+True
+>>> context.score(result_file_path)
+[Score(target='Hall_Of_Fame', metric='f1', scorevalue=0.691369766848)]
+
+Option 3: Using the wrapper functions
 >>> from dval import predictions.is_predictions_file_valid, score_predictions_file
 >>> is_predictions_file_valid(result_file_path, path_to_score_root)
 True
@@ -34,8 +42,17 @@ import pandas
 
 from . import schemas
 from .file_checker import FileChecker
-from .metrics import METRICS_DICT, valid_metric, apply_metric
+from .metrics import (
+    METRICS_DICT,
+    apply_metric,
+    bootstrap_counts,
+    bootstrap_metric,
+    confidence_interval,
+    find_metric_context,
+    valid_metric,
+)
 from .score import Score, Scores, MxeScore
+from .profiling import Profiler, phase
 from .validation_type_checks import (
     valid_index,
     valid_boolean,
@@ -47,6 +64,117 @@ from .validation_type_checks import (
 )
 
 
+class ScoringContext:
+    """
+    The schemas, sorted targets, target labels and baseline score of a SCORE directory, loaded once
+    to validate and score any number of predictions.
+    """
+
+    def __init__(self, path_to_score_root, targets_filepath=None, indices_file=None):
+        self.score_root = Path(path_to_score_root)
+        with phase("load schemas"):
+            self.ds = schemas.D3MDataStructure(
+                root=self.score_root, indices_file=indices_file
+            )
+        self.indices_path = indices_file
+
+        with phase("load targets"):
+            self.ds.load_targets(targets_filepath)
+        self._target_labels = dict()
+
+        with phase("load baseline score"):
+            try:
+                self.baseline_score = self.ds.get_baseline_score()
+            except FileNotFoundError:
+                self.baseline_score = "None"
+
+    def load_targets(self, targets_filepath=None):
+        """
+        Load other targets than the current ones, if any
+        """
+        if targets_filepath is None:
+            return
+        if Path(targets_filepath).resolve() != Path(self.ds.targets_path).resolve():
+            with phase("load targets"):
+                self.ds.load_targets(targets_filepath)
+            self._target_labels = dict()
+
+    def target_labels(self, target):
+        """
+        :return: the unique labels of a target
+        """
+        if target not in self._target_labels:
+            self._target_labels[target] = self.ds.targets_df[target].unique()
+        return self._target_labels[target]
+
+    def memory_usage(self):
+        """
+        :return: number of bytes of the targets, expected index and target labels held by the context
+        """
+        memory = self.ds.targets_df.memory_usage(index=True, deep=True).sum()
+        if self.ds._expected_index is not None:
+            memory += self.ds._expected_index.memory_usage(deep=True)
+        memory += sum(labels.nbytes for labels in self._target_labels.values())
+        return int(memory)
+
+    def predictions(self, predictions, separator=None):
+        """
+        :param predictions: path to a predictions file, or predictions already loaded in a
+        pandas.DataFrame
+        :return: Predictions
+        """
+        if isinstance(predictions, pandas.DataFrame):
+            return Predictions(
+                None, self.score_root, scoring_context=self, frame=predictions
+            )
+        return Predictions(
+            predictions,
+            self.score_root,
+            separator=separator or Predictions.SEPARATOR,
+            scoring_context=self,
+        )
+
+    def is_valid(self, predictions):
+        """
+        :param predictions: path to a predictions file or pandas.DataFrame
+        """
+        return self.predictions(predictions).is_valid()
+
+    def score(
+        self,
+        predictions,
+        check_valid=True,
+        score_mxe=False,
+        bootstrap=0,
+        seed=None,
+        profile=False,
+    ):
+        """
+        :param predictions: path to a predictions file or pandas.DataFrame
+        :param profile: record the time and memory of the scoring phases in the profile attribute
+        of the scores, see dval.profiling
+        :raises: InvalidPredictionsError if check_valid and the predictions are not valid
+        :return: Scores
+        """
+        if profile:
+            with Profiler() as profiler:
+                scores = self.score(
+                    predictions, check_valid, score_mxe, bootstrap, seed
+                )
+            scores.profile = profiler.to_json()
+            return scores
+
+        predictions = self.predictions(predictions)
+        if check_valid:
+            with phase("validate"):
+                valid = predictions.is_valid()
+            if not valid:
+                logging.error("Invalid predictions file")
+                raise InvalidPredictionsError("Invalid predictions file")
+
+        return predictions.score(None, score_mxe, bootstrap=bootstrap, seed=seed)
+
+
 class Predictions:
     SEPARATOR = ","
 
@@ -56,42 +184,68 @@ class Predictions:
         path_to_score_root,
         separator=SEPARATOR,
         indices_file=None,
+        scoring_context=None,
+        frame=None,
     ):
+        """
+        :param scoring_context: ScoringContext of the SCORE directory, loaded from
+        path_to_score_root if None
+        :param frame: predictions already loaded, instead of reading result_file_path
+        """
         self.result_file_path = result_file_path
 
-        self.score_root = Path(path_to_score_root)
-        self.ds = schemas.D3MDataStructure(
-            root=self.score_root, indices_file=indices_file
-        )
+        if scoring_context is None:
+            scoring_context = ScoringContext(
+                path_to_score_root, indices_file=indices_file
+            )
+        self.context = scoring_context
+        self.score_root = scoring_context.score_root
+        self.ds = scoring_context.ds
         self.dataset_schema_path = self.ds.dataschema.filepath
         self.problem_schema_path = self.ds.problemschema.filepath
 
-        self.indices_path = indices_file
+        self.indices_path = scoring_context.indices_path
         self.separator = separator
-        self._load_data()
-        self.ds.load_targets()
+        self._load_data(frame)
 
     def is_valid(self):
         # Check the shape of the predictions first
-        valid = self._is_file_readable() and self._is_header_valid()
+        with phase("validate header"):
+            valid = self._is_file_readable() and self._is_header_valid()
 
         # Then compute the other checks
-        return valid and self._is_index_valid() and self._are_targets_valid()
+        if valid:
+            with phase("validate index"):
+                valid = self._is_index_valid()
+        return bool(valid and self._are_targets_valid())
 
-    def score(self, targets_filepath, score_mxe=False):
+    def score(
+        self,
+        targets_filepath,
+        score_mxe=False,
+        bootstrap=0,
+        seed=None,
+        confidence_level=0.95,
+    ):
+        """
+        :param bootstrap: number of bootstrap resamples used to compute a confidence interval
+        of every score, none if 0
+        :param seed: seed of the bootstrap resamples, all the metrics being scored on the same resamples
+        :param confidence_level: confidence level of the bootstrap confidence intervals
+        """
         scores = list()
         # Score = namedtuple('Score', ['target', 'metric', 'scorevalue'])
 
-        self.ds.load_targets(targets_filepath)
-
-        try:
-            baseline_score = self.ds.get_baseline_score()
-        except FileNotFoundError:
-            baseline_score = "None"
+        self.context.load_targets(targets_filepath)
+        baseline_score = self.context.baseline_score
 
         # scoring_metrics = self.ds.metrics
         scoring_metrics = self.ds.problemschema.metrics_wparams
 
+        # Metrics computed by a scoring context share its state for a given target,
+        # e.g. all the label-based classification metrics share one confusion matrix
+        contexts = dict()
+
         for metric in scoring_metrics:
             if not valid_metric(metric["metric"]):
                 logging.error(
@@ -99,64 +253,197 @@ class Predictions:
                 )
                 continue
 
-            if "pos_label" in metric["params"]:
-                # no pos_label specified for metric f1, setting to '1'
-                metric["params"]["pos_label"] = int(metric["params"]["pos_label"])
+            metric, applicability = self._prepare_metric(metric)
 
             # In the metric is applicable to all, need to
-            if (
-                "applicabilityToTarget" in metric["params"]
-                and metric["params"]["applicabilityToTarget"] == "allTargets"
-            ):
-
-                # Reorder and align the targets and the predictions columns
-                gt_l = [self.ds.targets_df[target] for target in self.ds.target_names]
-                pred_l = [self.frame[target] for target in self.ds.target_names]
-
-                # Transpose them into a list of rows
-                gt_l = np.transpose(gt_l)
-                pred_l = np.transpose(pred_l)
-
-                # Apply the metric on the array
-                value = apply_metric(metric["metric"], gt_l, pred_l, **metric["params"])
-                score = Score("allTargets", metric["metric"], value, baseline_score)
-            else:
-                for target in self.ds.target_names:
+            if applicability == "allTargets":
+
+                with phase(f"metric {metric['metric']} allTargets"):
+                    # Reorder and align the targets and the predictions columns
+                    gt_l = [
+                        self.ds.targets_df[target] for target in self.ds.target_names
+                    ]
+                    pred_l = [self.frame[target] for target in self.ds.target_names]
+
+                    # Transpose them into a list of rows
+                    gt_l = np.transpose(gt_l)
+                    pred_l = np.transpose(pred_l)
+
+                    # Apply the metric on the array
                     value = apply_metric(
-                        metric["metric"],
-                        self.ds.targets_df[target],
-                        self.frame[target],
-                        **metric["params"],
+                        metric["metric"], gt_l, pred_l, **metric["params"]
                     )
-                    score = Score(target, metric["metric"], value, baseline_score)
-            score.transform_normalize()
-            scores.append(score)
+                    metric_scores = [
+                        Score("allTargets", metric["metric"], value, baseline_score)
+                    ]
+                    if bootstrap:
+                        self._set_confidence_intervals(
+                            metric_scores,
+                            metric,
+                            gt_l,
+                            pred_l,
+                            bootstrap,
+                            seed,
+                            confidence_level,
+                        )
+            else:
+                for target in self.ds.target_names:
+                    with phase(f"metric {metric['metric']} {target}"):
+                        metric_scores = self._score_target(
+                            metric,
+                            target,
+                            contexts,
+                            baseline_score,
+                            bootstrap,
+                            seed,
+                            confidence_level,
+                        )
+            with phase(f"transform normalize {metric['metric']}"):
+                for score in metric_scores:
+                    score.transform_normalize()
+            scores.extend(metric_scores)
 
         # Add the multi cross entropy if desired, and if the problem is a classification problem
         if score_mxe:
             if self.ds.problemschema.task_type == "classification":
                 # MXE handles only one target currently
-                value = apply_metric(
-                    "crossEntropyNonBinarized",
-                    self.ds.targets_df[target],
-                    self.frame[target],
-                )
+                with phase("metric crossEntropyNonBinarized"):
+                    value = apply_metric(
+                        "crossEntropyNonBinarized",
+                        self.ds.targets_df[target],
+                        self.frame[target],
+                    )
                 score = MxeScore(value)
                 scores.append(score)
             else:
                 logging.warning(f"Ignoring MXE. Task is not a classification task")
         return Scores(scores)
 
-    def _load_data(self):
+    def _score_target(
+        self,
+        metric,
+        target,
+        contexts,
+        baseline_score,
+        bootstrap,
+        seed,
+        confidence_level,
+    ):
+        """
+        :param contexts: scoring contexts of the targets, shared by the metrics they compute
+        :return: the list of scores of a metric on a target
+        """
+        context_class = find_metric_context(metric["metric"])
+        if context_class is not None:
+            if (context_class, target) not in contexts:
+                contexts[(context_class, target)] = context_class(
+                    self.ds.targets_df[target], self.frame[target]
+                )
+            value = contexts[(context_class, target)].apply_metric(
+                metric["metric"], **metric["params"]
+            )
+        else:
+            value = apply_metric(
+                metric["metric"],
+                self.ds.targets_df[target],
+                self.frame[target],
+                **metric["params"],
+            )
+        metric_scores = self._metric_scores(target, metric, value, baseline_score)
+        if bootstrap:
+            self._set_confidence_intervals(
+                metric_scores,
+                metric,
+                self.ds.targets_df[target],
+                self.frame[target],
+                bootstrap,
+                seed,
+                confidence_level,
+            )
+        return metric_scores
+
+    @staticmethod
+    def _prepare_metric(metric):
+        """
+        :return: a copy of the metric of the problem schema with normalized parameters, and its
+        applicabilityToTarget, which is not a parameter of the metric function
+        """
+        metric = dict(metric, params=dict(metric["params"]))
+        applicability = metric["params"].pop("applicabilityToTarget", None)
+        Predictions._normalize_params(metric)
+        return metric, applicability
+
+    @staticmethod
+    def _normalize_params(metric):
+        if "pos_label" in metric["params"]:
+            # no pos_label specified for metric f1, setting to '1'
+            try:
+                metric["params"]["pos_label"] = int(metric["params"]["pos_label"])
+            except ValueError:
+                # non-integer labels are matched as strings
+                pass
+
+    @staticmethod
+    def _metric_scores(target, metric, value, baseline_score):
+        """
+        :return: the list of scores of a metric on a target. A metric parameter given as a list,
+        e.g. several K values for precisionAtTopK, produces one score per parameter value.
+        """
+        list_params = {
+            name: param
+            for name, param in metric["params"].items()
+            if isinstance(param, (list, tuple))
+        }
+        if not list_params:
+            return [Score(target, metric["metric"], value, baseline_score)]
+
+        ((name, param_values),) = list_params.items()
+        return [
+            Score(target, metric["metric"], v, baseline_score, {name: param_value})
+            for param_value, v in zip(param_values, value)
+        ]
+
+    @staticmethod
+    def _set_confidence_intervals(
+        scores, metric, ground_truth, predicted, num_resamples, seed, confidence_level,
+    ):
+        """
+        Set the bootstrap confidence intervals of the scores of a metric on a target, one per
+        parameter value if the metric parameter is a list.
+        """
+        resample_scores = np.concatenate(
+            [
+                bootstrap_metric(
+                    metric["metric"],
+                    ground_truth,
+                    predicted,
+                    counts,
+                    **metric["params"],
+                )
+                for counts in bootstrap_counts(len(ground_truth), num_resamples, seed)
+            ]
+        )
+        intervals = confidence_interval(resample_scores, confidence_level)
+        for score, bounds in zip(scores, intervals.reshape(len(scores), 2)):
+            lower, upper = (None if np.isnan(b) else float(b) for b in bounds)
+            score.set_confidence_interval(lower, upper, confidence_level)
+
+    def _load_data(self, frame=None):
         """
             Load the predicted targets, sort them by index if any
         """
 
-        self.frame = pandas.read_csv(self.result_file_path, delimiter=self.separator)
+        with phase("load predictions"):
+            if frame is not None:
+                self.frame = frame.copy()
+            else:
+                self.frame = self.ds.read_csv(
+                    self.result_file_path, delimiter=self.separator
+                )
 
-        index_name = self.ds.dataschema.index_name
-        if index_name in self.frame.columns:
-            self.frame.sort_values(by=index_name, inplace=True)
+            index_name = self.ds.dataschema.index_name
+            if index_name in self.frame.columns:
+                self.frame.sort_values(by=index_name, inplace=True)
 
     def _is_header_valid(self):
         """
@@ -187,6 +474,18 @@ class Predictions:
         return valid
 
     def _are_targets_valid(self):
+        return self._are_columns_valid(self.frame, self.ds, self.context.target_labels)
+
+    @staticmethod
+    def _are_columns_valid(frame, ds, target_labels):
+        """
+        Check the types of the target columns of predictions, also used on every chunk of
+        predictions by the streaming scorer.
+
+        :param ds: D3MDataStructure
+        :param target_labels: function returning the unique labels of a categorical target
+        :return: bool
+        """
         valid_types = [
             "boolean",
             "integer",
@@ -199,42 +498,46 @@ class Predictions:
             "geojson",
         ]
 
-        target_types = self.ds.target_types
+        target_types = ds.target_types
 
         for target, ttype in target_types.items():
-            column = self.frame[target]
-            if target == self.ds.index_name:
-                return valid_index(column)
-            elif ttype == "boolean":
-                return valid_boolean(column)
-            elif ttype == "real":
-                return valid_real(column)
-            elif ttype == "integer":
-                return valid_integer(column)
-            elif ttype == "string":
-                return valid_string(column)
-            elif ttype == "categorical":
-                authorized_labels = None
-                try:
-                    authorized_labels = self.ds.targets_df[target].unique()
-                except AttributeError:
-                    logging.exception(
-                        f"Wrong categorical values, actual: {self.ds.targets_df[target]} expected: ",
-                        exc_info=False,
+            with phase(f"validate {ttype} {target}"):
+                column = frame[target]
+                if target == ds.index_name:
+                    return valid_index(column)
+                elif ttype == "boolean":
+                    return valid_boolean(column)
+                elif ttype == "real":
+                    return valid_real(column)
+                elif ttype == "integer":
+                    return valid_integer(column)
+                elif ttype == "string":
+                    return valid_string(column)
+                elif ttype == "categorical":
+                    authorized_labels = None
+                    try:
+                        authorized_labels = target_labels(target)
+                    except AttributeError:
+                        logging.exception(
+                            f"Wrong categorical values, actual: {ds.targets_df[target]} expected: ",
+                            exc_info=False,
+                        )
+                        return False
+                    return valid_categorical(
+                        column, authorized_labels=authorized_labels
                     )
+                elif ttype == "dateTime":
+                    return valid_datetime(column)
+                elif ttype in valid_types:
+                    pass
+                else:
+                    logging.error(f"type: {ttype} is not supported.")
                     return False
-                return valid_categorical(
-                    column, authorized_labels=authorized_labels.tolist()
-                )
-            elif ttype == "dateTime":
-                return valid_datetime(column)
-            elif ttype in valid_types:
-                pass
-            else:
-                logging.error(f"type: {ttype} is not supported.")
-                return False
 
     def _is_file_readable(self):
+        if self.result_file_path is None:
+            # predictions given as a frame
+            return True
         FileChecker(self.result_file_path).check_exists_read(self.result_file_path)
         logging.info("Predictions file exists and is readable.")
         return True
@@ -251,13 +554,62 @@ def score_predictions_file(
     check_valid=True,
     score_mxe=False,
     indices_file=None,
+    stream=False,
+    chunksize=None,
+    bootstrap=0,
+    seed=None,
+    profile=False,
 ):
-    predictions = Predictions(result_file, score_dir_path, indices_file=indices_file)
-    if check_valid and not predictions.is_valid():
-        logging.error("Invalid predictions file")
-        raise InvalidPredictionsError("Invalid predictions file")
-
-    return predictions.score(groundtruth_path, score_mxe)
+    """
+    :param profile: record the time and memory of the phases of the scoring in the profile
+    attribute of the scores, see dval.profiling
+    """
+    if stream and bootstrap:
+        raise ValueError("Bootstrap confidence intervals are not computed with stream")
+    if stream and indices_file:
+        raise ValueError("Subset indices are not supported with stream")
+
+    if profile:
+        with Profiler() as profiler:
+            scores = score_predictions_file(
+                result_file,
+                score_dir_path,
+                groundtruth_path,
+                check_valid=check_valid,
+                score_mxe=score_mxe,
+                indices_file=indices_file,
+                stream=stream,
+                chunksize=chunksize,
+                bootstrap=bootstrap,
+                seed=seed,
+            )
+        scores.profile = profiler.to_json()
+        return scores
+
+    if stream:
+        # Score in chunks, without loading the files in memory
+        from .streaming import DEFAULT_CHUNKSIZE, stream_score_predictions_file
+
+        with phase("score in chunks"):
+            return stream_score_predictions_file(
+                result_file,
+                score_dir_path,
+                groundtruth_path,
+                check_valid=check_valid,
+                score_mxe=score_mxe,
+                chunksize=chunksize or DEFAULT_CHUNKSIZE,
+            )
+
+    context = ScoringContext(
+        score_dir_path, groundtruth_path, indices_file=indices_file
+    )
+    return context.score(
+        result_file,
+        check_valid=check_valid,
+        score_mxe=score_mxe,
+        bootstrap=bootstrap,
+        seed=seed,
+    )
 
 
 class InvalidPredictionsError(Exception):
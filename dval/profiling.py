@@ -0,0 +1,151 @@
+# Contents subject to LICENSE.txt at project root
+
+"""
+Wall time, CPU time and peak traced memory of the phases of a validation or a scoring.
+
+The code marks its phases with `phase(name)`, which does nothing unless a Profiler is active:
+
+    >>> with Profiler() as profiler:
+    ...     with phase("load targets"):
+    ...         pass
+    >>> [p["name"] for p in profiler.phases]
+    ['load targets']
+
+Phases can be nested. The peak memory of a phase is the peak of the memory traced by tracemalloc
+during the phase, above the traced memory at its start. Tracing the memory slows the code down:
+it is only measured on Python 3.9+, which can reset the traced peak, and can be turned off.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Profiler recording the phases, if any
+_profiler = None
+
+
+class Profiler:
+    """
+    Records the phases run while active, in the order they end.
+
+    :param trace_memory: whether to measure the peak traced memory of every phase
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory and hasattr(tracemalloc, "reset_peak")
+        self.phases = list()
+        self._open_phases = list()
+        self._origin = None
+        self._previous_profiler = None
+        self._started_tracing = False
+
+    def __enter__(self):
+        global _profiler
+        self._previous_profiler, _profiler = _profiler, self
+        if self._origin is None:
+            # the phases start from the first activation
+            self._origin = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, *exc_info):
+        global _profiler
+        _profiler = self._previous_profiler
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def phase(self, name):
+        record = dict(
+            name=name,
+            depth=len(self._open_phases),
+            start=time.perf_counter() - self._origin,
+        )
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # the peak so far belongs to the enclosing phase
+            if self._open_phases:
+                parent = self._open_phases[-1]
+                parent["_peak"] = max(parent["_peak"], peak)
+            tracemalloc.reset_peak()
+            record["_start_memory"] = record["_peak"] = current
+        self._open_phases.append(record)
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_time"] = time.perf_counter() - wall_start
+            record["cpu_time"] = time.process_time() - cpu_start
+            self._open_phases.pop()
+
+            record["peak_memory"] = None
+            if self.trace_memory:
+                peak = max(record.pop("_peak"), tracemalloc.get_traced_memory()[1])
+                record["peak_memory"] = peak - record.pop("_start_memory")
+                if self._open_phases:
+                    parent = self._open_phases[-1]
+                    parent["_peak"] = max(parent["_peak"], peak)
+                tracemalloc.reset_peak()
+            self.phases.append(record)
+
+    def to_json(self):
+        """
+        :return: the phases in the order they started, as dicts of name, depth, start, wall_time,
+        cpu_time (seconds) and peak_memory (bytes, None if not traced)
+        """
+        return sorted(self.phases, key=lambda record: record["start"])
+
+
+class _NoPhase:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+def phase(name):
+    """
+    :return: context manager recording a phase in the active profiler, if any
+    """
+    if _profiler is None:
+        return _NO_PHASE
+    return _profiler.phase(name)
+
+
+def chrome_trace(profiles):
+    """
+    Trace of profiled phases in the Chrome trace event format, which chrome://tracing, Perfetto
+    and speedscope read.
+
+    :param profiles: list of (name, phases) pairs, phases as returned by Profiler.to_json, every
+    profile being shown as a thread
+    :return: dict to be written in JSON
+    """
+    events = list()
+    for tid, (name, phases) in enumerate(profiles):
+        events.append(
+            dict(name="thread_name", ph="M", pid=0, tid=tid, args=dict(name=name))
+        )
+        for record in phases:
+            events.append(
+                dict(
+                    name=record["name"],
+                    ph="X",
+                    pid=0,
+                    tid=tid,
+                    ts=record["start"] * 1e6,
+                    dur=record["wall_time"] * 1e6,
+                    args=dict(
+                        cpu_time=record["cpu_time"], peak_memory=record["peak_memory"]
+                    ),
+                )
+            )
+    return dict(traceEvents=events, displayTimeUnit="ms")
@@ -5,10 +5,12 @@ Representations of v3 D3M schemas and data structures.
 """
 
 import json
+import logging
+import os
+import re
 from pathlib import Path
 
 import pandas
-from d3m.metadata.problem import parse_problem_description
 
 
 class DatasetSchema:
@@ -57,6 +59,191 @@ class DatasetSchema:
         return expected_fields
 
 
+class ProblemDocConstant:
+    """
+    A constant of a problemDoc, e.g. a task type or a metric, standing for the d3m enumeration
+    value of the same name: the problemDoc string is given by unparse().
+    """
+
+    def __init__(self, name, string):
+        self.name = name
+        self._string = string
+
+    def unparse(self):
+        return self._string
+
+    def __eq__(self, other):
+        return isinstance(other, ProblemDocConstant) and self.name == other.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __repr__(self):
+        return f"<{type(self).__name__}.{self.name}>"
+
+
+def _constants(names):
+    """
+    :param names: dict of {problemDoc string: constant name}
+    :return: dict of {problemDoc string: ProblemDocConstant}
+    """
+    return {string: ProblemDocConstant(name, string) for string, name in names.items()}
+
+
+TASK_TYPES = _constants(
+    {
+        "classification": "CLASSIFICATION",
+        "regression": "REGRESSION",
+        "clustering": "CLUSTERING",
+        "linkPrediction": "LINK_PREDICTION",
+        "vertexClassification": "VERTEX_CLASSIFICATION",
+        "vertexNomination": "VERTEX_NOMINATION",
+        "communityDetection": "COMMUNITY_DETECTION",
+        "graphMatching": "GRAPH_MATCHING",
+        "timeSeriesForecasting": "TIME_SERIES_FORECASTING",
+        "collaborativeFiltering": "COLLABORATIVE_FILTERING",
+        "objectDetection": "OBJECT_DETECTION",
+        "semiSupervisedClassification": "SEMISUPERVISED_CLASSIFICATION",
+        "semiSupervisedRegression": "SEMISUPERVISED_REGRESSION",
+    }
+)
+
+TASK_SUBTYPES = _constants(
+    {
+        None: "NONE",
+        "binary": "BINARY",
+        "multiClass": "MULTICLASS",
+        "multiLabel": "MULTILABEL",
+        "univariate": "UNIVARIATE",
+        "multivariate": "MULTIVARIATE",
+        "overlapping": "OVERLAPPING",
+        "nonOverlapping": "NONOVERLAPPING",
+    }
+)
+
+# d3m names of the problemDoc metrics, the other metrics scored by dval being named like
+# rootMeanSquaredErrorAvg -> ROOT_MEAN_SQUARED_ERROR_AVG
+D3M_PERFORMANCE_METRIC_NAMES = {
+    "accuracy": "ACCURACY",
+    "precision": "PRECISION",
+    "recall": "RECALL",
+    "f1": "F1",
+    "f1Micro": "F1_MICRO",
+    "f1Macro": "F1_MACRO",
+    "rocAuc": "ROC_AUC",
+    "rocAucMicro": "ROC_AUC_MICRO",
+    "rocAucMacro": "ROC_AUC_MACRO",
+    "meanSquaredError": "MEAN_SQUARED_ERROR",
+    "rootMeanSquaredError": "ROOT_MEAN_SQUARED_ERROR",
+    "meanAbsoluteError": "MEAN_ABSOLUTE_ERROR",
+    "rSquared": "R_SQUARED",
+    "normalizedMutualInformation": "NORMALIZED_MUTUAL_INFORMATION",
+    "jaccardSimilarityScore": "JACCARD_SIMILARITY_SCORE",
+    "precisionAtTopK": "PRECISION_AT_TOP_K",
+    "objectDetectionAP": "OBJECT_DETECTION_AVERAGE_PRECISION",
+    "hammingLoss": "HAMMING_LOSS",
+}
+
+
+def _constant_name(metric):
+    """
+    :return: upper snake case name of a camel case metric, e.g. objectDetectionAPs -> OBJECT_DETECTION_APS
+    """
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", metric).upper()
+
+
+def _performance_metrics():
+    from .metrics import METRICS_DICT
+    from .transformations import METRIC_RANGES_DICT
+
+    names = {
+        metric: _constant_name(metric)
+        for metric in list(METRICS_DICT) + list(METRIC_RANGES_DICT)
+    }
+    names.update(D3M_PERFORMANCE_METRIC_NAMES)
+    return _constants(names)
+
+
+PERFORMANCE_METRICS = _performance_metrics()
+
+
+def parse_problem_doc(filepath):
+    """
+    Read a problemDoc.json into the structure returned by d3m's parse_problem_description, for
+    the fields used by ProblemSchema, without importing d3m. Unlike d3m, the parameters of the
+    metrics are kept as they are named in the problemDoc, e.g. K.
+
+    :return: dict with the "problem" task type and performance metrics, and the "inputs" targets
+    :raises: KeyError if a required field, task type or metric is unknown
+    """
+    with open(filepath) as problem_doc_file:
+        problem_doc = json.load(problem_doc_file)
+
+    performance_metrics = list()
+    for performance_metric in problem_doc["inputs"]["performanceMetrics"]:
+        # any other key than "metric" is a parameter, e.g. K or applicabilityToTarget
+        params = {
+            name: value
+            for name, value in performance_metric.items()
+            if name != "metric"
+        }
+        # d3m's default positive label
+        if performance_metric["metric"] in ["f1", "precision", "recall"]:
+            params.setdefault("pos_label", "1")
+
+        performance_metrics.append(
+            {
+                "metric": PERFORMANCE_METRICS[performance_metric["metric"]],
+                "params": params,
+            }
+        )
+
+    data = problem_doc["inputs"]["data"]
+    if not isinstance(data, list):
+        data = [data]
+
+    inputs = list()
+    for problem_input in data:
+        targets = list()
+        for target in problem_input.get("targets", []):
+            targets.append(
+                {
+                    "target_index": target["targetIndex"],
+                    "resource_id": target["resID"],
+                    "column_index": target["colIndex"],
+                    "column_name": target["colName"],
+                }
+            )
+            if "numClusters" in target:
+                targets[-1]["clusters_number"] = target["numClusters"]
+        inputs.append({"dataset_id": problem_input["datasetID"], "targets": targets})
+
+    about = problem_doc["about"]
+    return {
+        "id": about["problemID"],
+        "version": about.get("problemVersion", "1.0"),
+        "name": about["problemName"],
+        "problem": {
+            "task_type": TASK_TYPES[about["taskType"]],
+            "task_subtype": TASK_SUBTYPES[about.get("taskSubType")],
+            "performance_metrics": performance_metrics,
+        },
+        "inputs": inputs,
+    }
+
+
+def validate_problem_doc(filepath):
+    """
+    Validate a problemDoc.json against the d3m problem schema. d3m is only imported by this
+    validation, which ProblemSchema does not run.
+
+    :raises: the error raised by d3m if the problemDoc is not valid
+    """
+    from d3m.metadata.problem import parse_problem_description
+
+    parse_problem_description(os.path.abspath(filepath))
+
+
 class ProblemSchema:
     """
     Adapter class representing a v3 Problem Schema
@@ -64,7 +251,7 @@ class ProblemSchema:
 
     def __init__(self, uri):
         self.filepath = uri
-        self.problem = parse_problem_description(self.filepath)
+        self.problem = parse_problem_doc(self.filepath)
 
     @property
     def targets(self):
@@ -143,6 +330,20 @@ class D3MDataStructure:
     RELATIVE_PATH_TO_TARGETS = "targets.csv"
     RELATIVE_PATH_TO_BASELINE_SCORES = "baseline_scores.csv"
 
+    # pandas dtypes of the column types of the data schema, the other types being inferred
+    COLUMN_DTYPES = {"categorical": "category", "real": "float64", "integer": "int64"}
+    INDEX_DTYPE = "int64"
+
+    # categories read as these strings are booleans, as in pandas.read_csv
+    BOOLEAN_CATEGORIES = {
+        "True": True,
+        "TRUE": True,
+        "true": True,
+        "False": False,
+        "FALSE": False,
+        "false": False,
+    }
+
     def __init__(self, **kwargs):
 
         self.root = Path(kwargs[self.ROOT_TO_SCORE_ARG])
@@ -155,6 +356,9 @@ class D3MDataStructure:
         self.baseline_scores_path = self.root / self.RELATIVE_PATH_TO_BASELINE_SCORES
         self.indices_path = None
 
+        # read from the test data on first use
+        self._expected_index = None
+
         if "indices_file" in kwargs:
             self.indices_path = kwargs["indices_file"]
 
@@ -178,7 +382,7 @@ class D3MDataStructure:
         if targets_path:
             self.targets_path = targets_path
 
-        self.targets_df = pandas.read_csv(self.targets_path)
+        self.targets_df = self.read_csv(self.targets_path, usecols=self.expected_header)
 
         if self.dataschema.index_name in self.targets_df.columns:
             self.targets_df.sort_values(by=self.dataschema.index_name, inplace=True)
@@ -186,6 +390,57 @@ class D3MDataStructure:
         self.targets_index = self.targets_df.index
         self.number_targets = len(self.targets_index)
 
+    @property
+    def column_dtypes(self):
+        """
+        :return: pandas dtypes of the index and of the targets, from their types in the data schema
+        :rtype: dict
+        """
+        dtypes = {
+            name: self.COLUMN_DTYPES[ttype]
+            for name, ttype in self.target_types.items()
+            if ttype in self.COLUMN_DTYPES
+        }
+        dtypes[self.dataschema.index_name] = self.INDEX_DTYPE
+        return dtypes
+
+    def read_csv(self, path, usecols=None, **kwargs):
+        """
+        Read a predictions or targets file with the column types declared in the data schema.
+
+        A file which does not parse with these types, e.g. with a missing index or a wrong column,
+        is read with the types inferred by pandas, all columns included, so that it can be validated.
+        :param usecols: columns to read from a file parsing with the declared types
+        :return: pandas.DataFrame
+        """
+        try:
+            frame = pandas.read_csv(
+                path, dtype=self.column_dtypes, usecols=usecols, **kwargs
+            )
+            for name in frame.select_dtypes("category"):
+                frame[name] = self._typed_categories(frame[name])
+            return frame
+        except (ValueError, TypeError) as e:
+            logging.info(f"Inferring the column types of {path}: {e}")
+            return pandas.read_csv(path, **kwargs)
+
+    def _typed_categories(self, column):
+        """
+        Categories are read as strings: numeric and boolean labels are converted, like the labels
+        of an untyped column.
+        :raises: ValueError if distinct strings are the same label, e.g. "1" and "01"
+        """
+        categories = column.cat.categories
+        try:
+            labels = pandas.to_numeric(categories)
+        except (ValueError, TypeError):
+            if not categories.isin(list(self.BOOLEAN_CATEGORIES)).all():
+                return column
+            labels = categories.map(self.BOOLEAN_CATEGORIES)
+        return column.cat.rename_categories(labels).cat.reorder_categories(
+            sorted(labels)
+        )
+
     def get_baseline_score(self, baseline_scores_path=None):
         if baseline_scores_path:
             self.baseline_scores_path = baseline_scores_path
@@ -207,11 +462,17 @@ class D3MDataStructure:
     def expected_index(self):
         """
         Extracts the expected index from the test data tables/learningData.csv
+
+        Only the index column of the test data is read, once per data structure.
         :return: expected index of the predictions file
-        :rtype: pandas.Series
+        :rtype: pandas.Index
         """
-        testdata_df = pandas.read_csv(self.testdata_path)
-        return testdata_df.index
+        if self._expected_index is None:
+            testdata_df = pandas.read_csv(
+                self.testdata_path, usecols=[self.dataschema.index_name]
+            )
+            self._expected_index = testdata_df.index
+        return self._expected_index
 
     @property
     def expected_header(self):
@@ -16,10 +16,17 @@ class MxeScore:
 class Score:
     """ Represents the score: according to a metric or transformed and normalized"""
 
-    def __init__(self, target, metric, scorevalue, baseline_scorevalue=None):
+    def __init__(
+        self, target, metric, scorevalue, baseline_scorevalue=None, params=None
+    ):
         self.target = target
         self.metric = metric
 
+        # metric parameters are only reported when they distinguish scores of the same metric,
+        # e.g. one precisionAtTopK score per K
+        if params:
+            self.params = params
+
         self.scorevalue = scorevalue
 
         # baseline_scorevalue may be None but will be represented under string format
@@ -33,6 +40,16 @@ class Score:
 
         self.transformed_normalized_scorevalue = None
 
+    def set_confidence_interval(self, lower, upper, confidence_level):
+        """ Set the bootstrap confidence interval of the score
+
+        :param lower: lower bound, None if no resample could be scored
+        :param upper: upper bound, None if no resample could be scored
+        :param confidence_level: confidence level of the interval, e.g. 0.95
+        """
+        self.confidence_interval = [lower, upper]
+        self.confidence_level = confidence_level
+
     @property
     def json(self):
         """
@@ -87,6 +104,8 @@ class Scores(Collection):
     def __init__(self, scores):
         super().__init__()
         self.scores = scores
+        # phases of the scoring, when profiled
+        self.profile = None
 
     def __iter__(self):
         return iter(self.scores)
@@ -0,0 +1,355 @@
+# Contents subject to LICENSE.txt at project root
+
+"""
+Validate and score predictions files from a long-running process.
+
+Usage:
+    dval serve [--host 127.0.0.1] [--port 8765] [--socket path] [--max-memory MB]
+
+The server keeps the scoring context of the last used SCORE directories in memory, within
+--max-memory, and answers HTTP requests on localhost or on a Unix socket:
+
+    POST /validate  {"score_dir": ..., "predictions_file": ...}
+        -> {"valid": true}
+    POST /score     {"score_dir": ..., "predictions_file": ..., "validation": true, "mxe": false,
+                     "bootstrap": 0, "seed": null}
+        -> the JSON of Scores.to_json
+    GET  /status
+        -> {"version": ..., "contexts": [...], "memory": ...}
+
+Both POST requests also accept "ground_truth_file" and "subset_indices". Paths are read by the
+server: relative paths are relative to its working directory.
+
+The valid_predictions and score commands forward their predictions files to a running server with
+`--server host:port` or `--server unix:path`, or the DVAL_SERVER environment variable.
+"""
+
+import http.client
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_MEMORY = 1024 * 2 ** 20
+UNIX_SOCKET_PREFIX = "unix:"
+
+
+class ScoringContextCache:
+    """
+    Scoring contexts of the least recently used SCORE directories, whose memory usage is kept
+    under max_memory bytes. The most recently used context is kept whatever its size.
+    """
+
+    def __init__(self, max_memory=DEFAULT_MAX_MEMORY):
+        self.max_memory = max_memory
+        self._contexts = OrderedDict()
+        self._memory = dict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._contexts)
+
+    @property
+    def memory(self):
+        return sum(self._memory.values())
+
+    def keys(self):
+        return list(self._contexts)
+
+    @contextmanager
+    def context(self, score_dir, targets_filepath=None, indices_file=None):
+        """
+        Scoring context of a SCORE directory, loaded on first use. Requests on the same context
+        are handled one at a time.
+
+        :return: context manager of the ScoringContext
+        """
+        from .predictions import ScoringContext
+
+        key = (
+            os.path.realpath(score_dir),
+            targets_filepath and os.path.realpath(targets_filepath),
+            indices_file and os.path.realpath(indices_file),
+        )
+        with self._lock:
+            if key not in self._contexts:
+                self._contexts[key] = (threading.Lock(), None)
+            self._contexts.move_to_end(key)
+            context_lock, _ = self._contexts[key]
+
+        with context_lock:
+            _, context = self._contexts.get(key, (None, None))
+            if context is None:
+                try:
+                    context = ScoringContext(score_dir, targets_filepath, indices_file)
+                except Exception:
+                    with self._lock:
+                        self._contexts.pop(key, None)
+                    raise
+                with self._lock:
+                    self._contexts[key] = (context_lock, context)
+            try:
+                yield context
+            finally:
+                # the context may have read the test data index and target labels meanwhile
+                self._resize(key, context.memory_usage())
+
+    def _resize(self, key, memory):
+        with self._lock:
+            if key in self._contexts:
+                self._memory[key] = memory
+            for lru_key in list(self._contexts):
+                if self.memory <= self.max_memory or lru_key == key:
+                    break
+                logging.info(f"Evicting the scoring context of {lru_key[0]}")
+                del self._contexts[lru_key]
+                self._memory.pop(lru_key, None)
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/status":
+            return self.send_json(404, dict(error=f"Unknown path {self.path}"))
+        cache = self.server.cache
+        self.send_json(
+            200,
+            dict(
+                version=__import__(__package__).__version__,
+                contexts=[key[0] for key in cache.keys()],
+                memory=cache.memory,
+            ),
+        )
+
+    def do_POST(self):
+        handlers = {"/validate": self.validate, "/score": self.score}
+        try:
+            if self.path not in handlers:
+                raise RequestError(404, f"Unknown path {self.path}")
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length).decode())
+                score_dir = request["score_dir"]
+                predictions_file = request["predictions_file"]
+            except (ValueError, KeyError, TypeError) as e:
+                raise RequestError(400, f"Invalid request: {e!r}")
+
+            with self.server.cache.context(
+                score_dir,
+                request.get("ground_truth_file"),
+                request.get("subset_indices"),
+            ) as context:
+                status, body = handlers[self.path](context, predictions_file, request)
+        except RequestError as e:
+            status, body = e.status, json.dumps(dict(error=str(e)))
+        except FileNotFoundError as e:
+            status, body = (
+                404,
+                json.dumps(dict(error=f"Could not find file {e.filename}")),
+            )
+        except Exception as e:
+            logging.exception(e)
+            status, body = 500, json.dumps(dict(error=repr(e)))
+        self.send_body(status, body)
+
+    @staticmethod
+    def validate(context, predictions_file, request):
+        try:
+            valid = context.is_valid(predictions_file)
+        except Exception as e:
+            logging.exception(e)
+            valid = False
+        return 200, json.dumps(dict(valid=bool(valid)))
+
+    @staticmethod
+    def score(context, predictions_file, request):
+        try:
+            scores = context.score(
+                predictions_file,
+                check_valid=request.get("validation", True),
+                score_mxe=request.get("mxe", False),
+                bootstrap=request.get("bootstrap", 0),
+                seed=request.get("seed"),
+            )
+        except Exception as e:
+            logging.exception(
+                f"Predictions file {predictions_file} could not be scored. try validating your file first"
+            )
+            return 422, json.dumps(dict(error=repr(e)))
+        return 200, scores.to_json()
+
+    def send_json(self, status, content):
+        self.send_body(status, json.dumps(content))
+
+    def send_body(self, status, body):
+        body = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # the address of a Unix socket client is empty
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} {format % args}")
+
+
+class ScoringHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, cache):
+        super().__init__(address, RequestHandler)
+        self.cache = cache
+
+
+class ScoringUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, cache):
+        super().__init__(path, RequestHandler)
+        self.cache = cache
+
+
+def make_server(
+    host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, max_memory=None
+):
+    """
+    :param socket_path: path to a Unix socket to listen on instead of host:port
+    :param max_memory: memory in bytes of the cached scoring contexts
+    :return: server, to be run with serve_forever()
+    """
+    cache = ScoringContextCache(
+        DEFAULT_MAX_MEMORY if max_memory is None else max_memory
+    )
+    if socket_path is not None:
+        return ScoringUnixServer(socket_path, cache)
+    return ScoringHTTPServer((host, port), cache)
+
+
+def server_address(server):
+    """
+    :return: address of the server, as given to Client
+    """
+    if isinstance(server, ScoringUnixServer):
+        return UNIX_SOCKET_PREFIX + server.server_address
+    return "{}:{}".format(*server.server_address[:2])
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, max_memory=None):
+    """
+    Handle requests until interrupted.
+    """
+    server = make_server(host, port, socket_path, max_memory)
+    print(f"Serving on {server_address(server)}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path is not None:
+            os.remove(socket_path)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class Client:
+    """
+    Requests to a running server.
+
+    :param address: "host:port" or "unix:path/to/socket"
+    """
+
+    def __init__(self, address, timeout=None):
+        self.address = address
+        self.timeout = timeout
+
+    def connection(self):
+        if self.address.startswith(UNIX_SOCKET_PREFIX):
+            return UnixHTTPConnection(
+                self.address[len(UNIX_SOCKET_PREFIX) :], timeout=self.timeout
+            )
+        host, _, port = self.address.rpartition(":")
+        return http.client.HTTPConnection(host, int(port), timeout=self.timeout)
+
+    def request(self, method, path, content=None):
+        """
+        :return: (HTTP status, decoded JSON response)
+        """
+        connection = self.connection()
+        try:
+            body = None if content is None else json.dumps(content)
+            headers = {"Content-Type": "application/json"} if body else {}
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read().decode())
+        finally:
+            connection.close()
+
+    def status(self):
+        return self.request("GET", "/status")[1]
+
+    def is_valid(self, score_dir, predictions_file, **options):
+        """
+        :return: whether the predictions file is valid
+        :raises: FileNotFoundError if the server cannot find a file of the SCORE directory
+        """
+        status, response = self.post("/validate", score_dir, predictions_file, options)
+        return response["valid"]
+
+    def score(self, score_dir, predictions_file, **options):
+        """
+        :param options: validation, mxe, bootstrap, seed, ground_truth_file or subset_indices
+        :return: the scores, as in Scores.to_json, or None if the file could not be scored
+        :raises: FileNotFoundError if the server cannot find a file of the SCORE directory
+        """
+        status, response = self.post("/score", score_dir, predictions_file, options)
+        if status != 200:
+            logging.error(
+                f"Predictions file {predictions_file} could not be scored: {response['error']}"
+            )
+            return None
+        return response
+
+    def post(self, path, score_dir, predictions_file, options):
+        # paths are sent absolute, the server may run from another directory
+        content = dict(
+            score_dir=os.path.abspath(score_dir),
+            predictions_file=os.path.abspath(predictions_file),
+        )
+        for name in ["ground_truth_file", "subset_indices"]:
+            if options.get(name) is not None:
+                options[name] = os.path.abspath(options[name])
+        content.update(options)
+
+        status, response = self.request("POST", path, content)
+        if status == 404:
+            raise FileNotFoundError(response["error"])
+        if status not in (200, 422):
+            raise RuntimeError(f"Server error {status}: {response['error']}")
+        return status, response
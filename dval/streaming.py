@@ -0,0 +1,589 @@
+# Contents subject to LICENSE.txt at project root
+
+"""
+Score predictions files which are too large to be loaded in memory.
+
+The predictions and the ground truth are read in aligned chunks, and every metric is computed
+from an accumulator fed chunk by chunk:
+
+* the label-based classification metrics, the ROC AUC family and the MXE are computed from the
+  counts of the distinct (ground truth, predicted) pairs,
+* the regression metrics from the regression sums of every column,
+* the precision at top K from the top K candidates of the ground truth and of the predictions.
+
+The memory use is bounded by the chunk size, and by the number of distinct pairs for the
+classification metrics. The other metrics can not be accumulated and are not computed.
+
+Predictions listed in the order of the ground truth are read along with it. Otherwise, the rows
+of both files are first partitioned on disk by their index, and every partition is joined in memory.
+The regression scores then only match the in-memory scores up to floating point rounding.
+
+USAGE:
+>>> from dval.streaming import StreamingPredictions
+>>> p = StreamingPredictions(result_file_path, path_to_score_root, chunksize=100000)
+>>> p.score(groundtruth_path)
+[Score(target='Hall_Of_Fame', metric='f1', scorevalue=0.691369766848)]
+"""
+
+import logging
+import pickle
+import tempfile
+from itertools import zip_longest
+from pathlib import Path
+
+import numpy as np
+import pandas
+
+from . import schemas
+from .metrics import (
+    METRICS_DICT,
+    ClassificationContext,
+    RegressionContext,
+    RegressionSums,
+    RocAucContext,
+    apply_metric,
+    find_metric,
+    find_metric_context,
+    valid_metric,
+    _precision_at_top_k,
+    _top_k_indices,
+)
+from .predictions import InvalidPredictionsError, Predictions
+from .score import MxeScore, Score, Scores
+from .validation_type_checks import valid_index
+
+# A multiple of the regression block size, so that the regression sums of a file are
+# accumulated over the same blocks as in memory.
+DEFAULT_CHUNKSIZE = 16 * RegressionSums.BLOCK_SIZE
+
+
+class PairCounts:
+    """
+    Accumulates the counts of the distinct (ground truth, predicted) pairs of a target.
+
+    The classification and ROC AUC contexts and the MXE weigh every distinct pair by its count,
+    which gives the same scores as the samples themselves.
+    """
+
+    MULTI_TARGET = False
+
+    def __init__(self):
+        self.counts = None
+        self._contexts = dict()
+
+    @classmethod
+    def from_metrics(cls, metrics):
+        return cls()
+
+    def update(self, ground_truth, predicted, index=None):
+        chunk = pandas.DataFrame({"ground_truth": ground_truth, "predicted": predicted})
+        chunk_counts = chunk.groupby(
+            ["ground_truth", "predicted"], sort=False, dropna=False
+        ).size()
+
+        if self.counts is None:
+            self.counts = chunk_counts
+        else:
+            self.counts = self.counts.add(chunk_counts, fill_value=0).astype(np.int64)
+        self._contexts.clear()
+
+    def apply_metric(self, metric, **kwargs):
+        ground_truth = self.counts.index.get_level_values(0).to_numpy()
+        predicted = self.counts.index.get_level_values(1).to_numpy()
+        counts = self.counts.to_numpy()
+
+        context_class = find_metric_context(metric)
+        if context_class is None:
+            return apply_metric(
+                metric, ground_truth, predicted, counts=counts, **kwargs
+            )
+
+        if context_class not in self._contexts:
+            self._contexts[context_class] = context_class(
+                ground_truth, predicted, counts
+            )
+        return self._contexts[context_class].apply_metric(metric, **kwargs)
+
+
+class RegressionAccumulator:
+    """Accumulates the regression sums of one or several target columns"""
+
+    MULTI_TARGET = True
+
+    def __init__(self):
+        self.sums = RegressionSums()
+
+    @classmethod
+    def from_metrics(cls, metrics):
+        return cls()
+
+    def update(self, ground_truth, predicted, index=None):
+        self.sums.update(ground_truth, predicted)
+
+    def apply_metric(self, metric, **kwargs):
+        return RegressionContext.from_sums(self.sums).apply_metric(metric, **kwargs)
+
+
+class TopKAccumulator:
+    """
+    Accumulates the K greatest entries of the ground truth and of the predictions.
+
+    The candidates are kept in the order of their index, or in file order without index, so
+    that ties are broken as they are in memory, in favour of the later entry.
+    """
+
+    MULTI_TARGET = False
+
+    def __init__(self, k):
+        self.k = k
+        self.rows = 0
+        self.ground_truth = self._empty()
+        self.predicted = self._empty()
+
+    @classmethod
+    def from_metrics(cls, metrics):
+        """
+        :raises: TypeError if a metric has another parameter than K, as precision_at_top_K_meta
+        """
+        for m in metrics:
+            unknown = set(m["params"]) - {"K"}
+            if unknown:
+                raise TypeError(
+                    f"Unexpected parameters {sorted(unknown)} of metric {m['metric']}"
+                )
+        return cls(max(int(np.max(m["params"].get("K", 20))) for m in metrics))
+
+    @staticmethod
+    def _empty():
+        return np.empty(0), np.empty(0, dtype=np.int64)
+
+    def _top_candidates(self, candidates, chunk, keys):
+        values, candidate_keys = candidates
+        values = np.concatenate([values, np.asarray(chunk, dtype=np.float64)])
+        keys = np.concatenate([candidate_keys, keys])
+
+        order = np.argsort(keys, kind="mergesort")
+        values, keys = values[order], keys[order]
+        top = np.sort(_top_k_indices(values, self.k))
+        return values[top], keys[top]
+
+    def update(self, ground_truth, predicted, index=None):
+        if index is None:
+            index = np.arange(self.rows, self.rows + len(ground_truth))
+        self.ground_truth = self._top_candidates(self.ground_truth, ground_truth, index)
+        self.predicted = self._top_candidates(self.predicted, predicted, index)
+        self.rows += len(ground_truth)
+
+    def _top_keys(self, candidates):
+        values, keys = candidates
+        return keys[_top_k_indices(values, self.k)]
+
+    def apply_metric(self, metric, K=20):
+        precisions = _precision_at_top_k(
+            self._top_keys(self.ground_truth),
+            self._top_keys(self.predicted),
+            np.atleast_1d(K).astype(int),
+        )
+        return precisions if np.ndim(K) > 0 else precisions[0]
+
+
+CONTEXT_ACCUMULATORS = {
+    ClassificationContext: PairCounts,
+    RocAucContext: PairCounts,
+    RegressionContext: RegressionAccumulator,
+}
+
+STANDALONE_ACCUMULATORS = {
+    "crossEntropyNonBinarized": PairCounts,
+    "precisionAtTopK": TopKAccumulator,
+}
+
+
+def find_accumulator(metric):
+    """
+    :return: the accumulator class computing the metric chunk by chunk, None if the metric
+    can not be accumulated
+    """
+    context_class = find_metric_context(metric)
+    if context_class in CONTEXT_ACCUMULATORS:
+        return CONTEXT_ACCUMULATORS[context_class]
+    try:
+        return find_metric(metric, STANDALONE_ACCUMULATORS)
+    except KeyError:
+        return None
+
+
+def aligned_chunks(
+    predictions_path, targets_path, index_name, chunksize, separator=","
+):
+    """
+    Read the ground truth and the predictions in chunks of the same rows.
+
+    Both files must list the rows in the same order, which is checked on the index of every chunk.
+
+    :return: generator of (ground truth chunk, predictions chunk) pairs of DataFrames
+    :raises: InvalidPredictionsError if the files have a different number of rows,
+    UnalignedRowsError if they have a different row order
+    """
+    predictions = pandas.read_csv(
+        predictions_path, delimiter=separator, chunksize=chunksize
+    )
+    targets = pandas.read_csv(targets_path, chunksize=chunksize)
+
+    with predictions, targets:
+        for targets_chunk, predictions_chunk in zip_longest(targets, predictions):
+            if targets_chunk is None or predictions_chunk is None:
+                raise InvalidPredictionsError(
+                    "The predictions file and the ground truth have a different number of rows"
+                )
+            if index_name in targets_chunk and index_name in predictions_chunk:
+                if not np.array_equal(
+                    targets_chunk[index_name].to_numpy(),
+                    predictions_chunk[index_name].to_numpy(),
+                ):
+                    raise UnalignedRowsError(
+                        "The predictions are not listed in the order of the ground truth"
+                    )
+            yield targets_chunk, predictions_chunk
+
+
+def partitioned_chunks(
+    predictions_path, targets_path, index_name, chunksize, separator=","
+):
+    """
+    Read the ground truth and the predictions in chunks of the same rows, whatever their row order.
+
+    The rows of both files are first partitioned on disk by a hash of their index, in partitions
+    of about ``chunksize`` rows. Every pair of partitions is then joined on the index.
+
+    :return: generator of (ground truth chunk, predictions chunk) pairs of DataFrames,
+    each sorted by index
+    :raises: InvalidPredictionsError if the files do not have the same indexes
+    """
+    num_rows = sum(
+        len(chunk)
+        for chunk in pandas.read_csv(
+            targets_path, usecols=[index_name], chunksize=chunksize
+        )
+    )
+    num_partitions = max(1, -(-num_rows // chunksize))
+
+    with tempfile.TemporaryDirectory() as directory:
+        targets_partitions = _partition(
+            targets_path, ",", index_name, chunksize, num_partitions, directory
+        )
+        predictions_partitions = _partition(
+            predictions_path,
+            separator,
+            index_name,
+            chunksize,
+            num_partitions,
+            directory,
+        )
+
+        for targets_path, predictions_path in zip(
+            targets_partitions, predictions_partitions
+        ):
+            targets_chunk = _load_partition(targets_path, index_name)
+            predictions_chunk = _load_partition(predictions_path, index_name)
+            if targets_chunk is None and predictions_chunk is None:
+                continue
+            if (
+                targets_chunk is None
+                or predictions_chunk is None
+                or not np.array_equal(
+                    targets_chunk[index_name].to_numpy(),
+                    predictions_chunk[index_name].to_numpy(),
+                )
+            ):
+                raise InvalidPredictionsError("Missing indexes in predictions file")
+            yield targets_chunk, predictions_chunk
+
+
+def _partition(path, separator, index_name, chunksize, num_partitions, directory):
+    """
+    Split the rows of a CSV file in partitions on the hash of their index, each appended to
+    a file of pickled DataFrames.
+
+    :return: the list of the partition paths
+    """
+    partitions = [
+        Path(tempfile.mkstemp(dir=directory, suffix=".pkl")[1])
+        for _ in range(num_partitions)
+    ]
+    for chunk in pandas.read_csv(path, delimiter=separator, chunksize=chunksize):
+        codes = (
+            pandas.util.hash_pandas_object(chunk[index_name], index=False).to_numpy()
+            % num_partitions
+        )
+        for code, rows in chunk.groupby(codes):
+            with open(partitions[code], "ab") as partition:
+                pickle.dump(rows, partition)
+    return partitions
+
+
+def _load_partition(path, index_name):
+    """:return: the rows of a partition sorted by index, None if it is empty"""
+    chunks = list()
+    with open(path, "rb") as partition:
+        while True:
+            try:
+                chunks.append(pickle.load(partition))
+            except EOFError:
+                break
+    if not chunks:
+        return None
+    return pandas.concat(chunks).sort_values(by=index_name, kind="mergesort")
+
+
+class StreamingPredictions:
+    SEPARATOR = Predictions.SEPARATOR
+
+    def __init__(
+        self,
+        result_file_path,
+        path_to_score_root,
+        separator=SEPARATOR,
+        chunksize=DEFAULT_CHUNKSIZE,
+    ):
+        self.result_file_path = result_file_path
+
+        self.score_root = Path(path_to_score_root)
+        self.ds = schemas.D3MDataStructure(root=self.score_root)
+
+        self.separator = separator
+        self.chunksize = chunksize
+
+    def _plan(self, scoring_metrics, score_mxe):
+        """
+        :return: the plan of the scores, a list of (metric, [(target, accumulator key)]) with
+        accumulator keys (accumulator class, target), and the metrics of every accumulator class
+        """
+        plan = list()
+        for metric in scoring_metrics:
+            if not valid_metric(metric["metric"]):
+                logging.error(
+                    f"Invalid metric {metric}.\nAvailable metrics: {METRICS_DICT.keys()}"
+                )
+                continue
+
+            metric, applicability = Predictions._prepare_metric(metric)
+            accumulator_class = find_accumulator(metric["metric"])
+            all_targets = applicability == "allTargets"
+            if accumulator_class is None or (
+                all_targets and not accumulator_class.MULTI_TARGET
+            ):
+                logging.error(
+                    f"Metric {metric['metric']} can not be computed in streaming mode, skipping it"
+                )
+                continue
+
+            if all_targets:
+                targets = ["allTargets"]
+            else:
+                targets = self.ds.target_names
+            plan.append(
+                (metric, [(target, (accumulator_class, target)) for target in targets])
+            )
+
+        if score_mxe and self.ds.problemschema.task_type == "classification":
+            # MXE handles only one target currently
+            target = self.ds.target_names[-1]
+            plan.append((None, [(target, (PairCounts, target))]))
+
+        metrics_by_accumulator = dict()
+        for metric, keys in plan:
+            for _, (accumulator_class, _) in keys:
+                metrics_by_accumulator.setdefault(accumulator_class, list())
+                if metric is not None:
+                    metrics_by_accumulator[accumulator_class].append(metric)
+        return plan, metrics_by_accumulator
+
+    def _accumulate(self, chunks, plan, metrics_by_accumulator, target_labels=None):
+        """
+        :param target_labels: unique labels of every categorical target, to validate every chunk
+        of predictions and the number of their rows, None not to validate them
+        :return: the accumulators of the plan, fed with every chunk
+        """
+        accumulators = {
+            key: key[0].from_metrics(metrics_by_accumulator[key[0]])
+            for _, keys in plan
+            for _, key in keys
+        }
+
+        index_name = self.ds.dataschema.index_name
+        rows = 0
+        # whether each column has an empty entry, None before the first chunk
+        nulls = None
+        for targets_chunk, predictions_chunk in chunks:
+            if target_labels is not None and not self._is_chunk_valid(
+                predictions_chunk, target_labels
+            ):
+                raise InvalidPredictionsError("Invalid predictions file")
+            rows += len(predictions_chunk)
+            chunk_nulls = pandas.isnull(predictions_chunk).any()
+            nulls = chunk_nulls if nulls is None else nulls | chunk_nulls
+
+            index = None
+            if index_name in targets_chunk:
+                index = targets_chunk[index_name].to_numpy()
+            for (_, target), accumulator in accumulators.items():
+                accumulator.update(
+                    self._columns(targets_chunk, target),
+                    self._columns(predictions_chunk, target),
+                    index,
+                )
+
+        if target_labels is not None and not self._is_index_complete(rows, nulls):
+            raise InvalidPredictionsError("Invalid predictions file")
+        return accumulators
+
+    def _columns(self, chunk, target):
+        if target == "allTargets":
+            return chunk[self.ds.target_names].to_numpy()
+        return chunk[target].to_numpy()
+
+    def _target_labels(self, targets_filepath):
+        """
+        :return: the unique labels of every categorical target of the ground truth, read in chunks
+        """
+        categorical = [
+            target
+            for target, ttype in self.ds.target_types.items()
+            if ttype == "categorical"
+        ]
+        labels = {target: list() for target in categorical}
+        if categorical:
+            for chunk in pandas.read_csv(
+                targets_filepath, usecols=categorical, chunksize=self.chunksize
+            ):
+                for target in categorical:
+                    labels[target].append(chunk[target].unique())
+        return {
+            target: pandas.unique(np.concatenate(target_labels))
+            for target, target_labels in labels.items()
+            if target_labels
+        }
+
+    def _is_chunk_valid(self, predictions_chunk, target_labels):
+        """
+        The checks of Predictions.is_valid on a chunk of predictions: header, index and target
+        columns. The empty entries are checked on all the chunks, by _is_index_complete.
+        """
+        headers = set(predictions_chunk)
+        expected = set(self.ds.expected_header)
+        if headers != expected:
+            logging.error(f"Invalid header. Found {headers}, expected {expected}")
+            return False
+        if not valid_index(predictions_chunk[self.ds.dataschema.index_name]):
+            return False
+        return Predictions._are_columns_valid(
+            predictions_chunk, self.ds, lambda target: target_labels.get(target, [])
+        )
+
+    def _is_index_complete(self, rows, nulls):
+        """
+        The predictions have the index of the ground truth, checked chunk by chunk: they cover
+        the expected index if they have as many rows.
+
+        :param nulls: pandas.Series, whether each column of the predictions has an empty entry,
+        None without any row. As in Predictions.is_valid, the predictions are invalid if every
+        column has one.
+        """
+        if nulls is not None and nulls.all():
+            logging.error(f"Certain entries are invalid or empty")
+            return False
+        if rows != len(self.ds.expected_index):
+            logging.error("Missing indexes in predictions file")
+            return False
+        return True
+
+    def score(self, targets_filepath, score_mxe=False, check_valid=True):
+        """
+        Score the predictions in one pass over the chunks of the predictions and of the ground truth.
+
+        Every metric which can be accumulated gets the same score as with Predictions.score.
+        The predictions are partitioned by index first if they are not in the order of the
+        ground truth.
+
+        :param targets_filepath: ground truth file, the targets of the SCORE directory if None
+        :raises: InvalidPredictionsError if check_valid and a chunk of predictions is invalid,
+        or the predictions do not cover the expected index
+        """
+        if targets_filepath is None:
+            targets_filepath = self.ds.targets_path
+        target_labels = self._target_labels(targets_filepath) if check_valid else None
+
+        try:
+            baseline_score = self.ds.get_baseline_score()
+        except FileNotFoundError:
+            baseline_score = "None"
+
+        scoring_metrics = self.ds.problemschema.metrics_wparams
+        plan, metrics_by_accumulator = self._plan(scoring_metrics, score_mxe)
+
+        reader_args = (
+            self.result_file_path,
+            targets_filepath,
+            self.ds.dataschema.index_name,
+            self.chunksize,
+            self.separator,
+        )
+        try:
+            accumulators = self._accumulate(
+                aligned_chunks(*reader_args),
+                plan,
+                metrics_by_accumulator,
+                target_labels,
+            )
+        except UnalignedRowsError:
+            logging.info("Partitioning the predictions and the ground truth by index")
+            accumulators = self._accumulate(
+                partitioned_chunks(*reader_args),
+                plan,
+                metrics_by_accumulator,
+                target_labels,
+            )
+
+        scores = list()
+        for metric, keys in plan:
+            if metric is None:
+                ((_, key),) = keys
+                value = accumulators[key].apply_metric("crossEntropyNonBinarized")
+                scores.append(MxeScore(value))
+                continue
+
+            for target, key in keys:
+                value = accumulators[key].apply_metric(
+                    metric["metric"], **metric["params"]
+                )
+                if target == "allTargets":
+                    metric_scores = [
+                        Score(target, metric["metric"], value, baseline_score)
+                    ]
+                else:
+                    metric_scores = Predictions._metric_scores(
+                        target, metric, value, baseline_score
+                    )
+                for score in metric_scores:
+                    score.transform_normalize()
+                scores.extend(metric_scores)
+
+        return Scores(scores)
+
+
+def stream_score_predictions_file(
+    result_file,
+    score_dir_path,
+    groundtruth_path,
+    check_valid=True,
+    score_mxe=False,
+    chunksize=DEFAULT_CHUNKSIZE,
+):
+    return StreamingPredictions(result_file, score_dir_path, chunksize=chunksize).score(
+        groundtruth_path, score_mxe=score_mxe, check_valid=check_valid
+    )
+
+
+class UnalignedRowsError(InvalidPredictionsError):
+    pass
@@ -85,6 +85,8 @@ METRIC_RANGES_DICT = {
     "precisionAtTopK": None,
     "objectDetectionAP": None,
     "object_detection_average_precision": None,
+    "objectDetectionAPs": None,
+    "objectDetectionMAP": CenterizedNormalizedScoreTransformation(0, 1, False),
     "precision": CenterizedNormalizedScoreTransformation(0, 1, False),
     "recall": CenterizedNormalizedScoreTransformation(0, 1, False),
 }
@@ -1,110 +1,348 @@
 # Contents subject to LICENSE.txt at project root
 
+import datetime
 import logging
+import warnings
+from collections import Counter
 
+import numpy as np
+import pandas
 from dateutil.parser import parse as dt_parse
+from pandas.api.types import (
+    infer_dtype,
+    is_bool_dtype,
+    is_float_dtype,
+    is_integer_dtype,
+    is_numeric_dtype,
+    is_unsigned_integer_dtype,
+)
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:
+    try:
+        # pandas < 2.2
+        from pandas._libs.tslibs.parsing import guess_datetime_format
+    except ImportError:
+        # pandas < 0.25, as pinned by d3m
+        from pandas._libs.tslibs.parsing import (
+            _guess_datetime_format as guess_datetime_format,
+        )
+
+
+class ColumnValidation:
+    """
+    Verdict of the validation of a column, true if the column is valid.
+
+    The positions of the invalid entries, if any, are given by ``invalid_positions``.
+    """
+
+    def __init__(self, valid, invalid_positions=()):
+        self.valid = bool(valid)
+        self.invalid_positions = np.asarray(invalid_positions, dtype=np.int64)
+
+    def __bool__(self):
+        return self.valid
+
+    def __repr__(self):
+        return f"ColumnValidation(valid={self.valid}, invalid_positions={self.invalid_positions.tolist()})"
+
+
+# Integer literals as accepted by int(), and those of a nonnegative integer
+INTEGER_LITERAL = r"^\s*[+-]?\d(?:_?\d)*\s*$"
+NONNEGATIVE_INTEGER_LITERAL = r"^\s*(?:\+?\d(?:_?\d)*|-0(?:_?0)*)\s*$"
+
+# Number of unique values from which the format of a datetime column is inferred
+DATETIME_FORMAT_SAMPLE_SIZE = 10
 
 
 def valid_index(index_column):
-    for entry in index_column:
-        try:
-            val = int(entry)
-            if val < 0:
-                logging.error(f"{val} is not a valid index value.")
-                return False
-        except ValueError:
-            logging.error(f"{entry} is not a valid index value.")
-            return False
+    column = _as_series(index_column)
+    if is_bool_dtype(column) or is_unsigned_integer_dtype(column):
+        invalid = np.zeros(len(column), dtype=bool)
+    elif is_integer_dtype(column):
+        invalid = column.to_numpy() < 0
+    elif is_float_dtype(column):
+        values = column.to_numpy()
+        with np.errstate(invalid="ignore"):
+            invalid = ~np.isfinite(values) | (np.trunc(values) < 0)
+    elif _is_string_column(column):
+        invalid = ~_is_integer_literal(column, NONNEGATIVE_INTEGER_LITERAL)
+    else:
+        invalid = _invalid_entries(column, _is_index_entry)
 
-    return True
+    return _verdict(
+        column, invalid, lambda entry: f"{entry} is not a valid index value."
+    )
 
 
 def valid_boolean(boolean_column):
-    unique_entries = set()
-    for entry in boolean_column:
-        if not is_castable_to_type(entry, int) and not isinstance(entry, str):
-            logging.error(
-                f"{entry} is not a string or an integer which is required of boolean types."
-            )
-            return False
-
-        unique_entries.add(entry)
+    column = _as_series(boolean_column)
+    verdict = _verdict(
+        column,
+        _invalid_labels(column),
+        lambda entry: f"{entry} is not a string or an integer which is required of boolean types.",
+    )
+    if not verdict:
+        return verdict
 
+    unique_entries = set(column.unique())
     if len(unique_entries) > 2:
         logging.error(
             f"The set of unqiue entries: {unique_entries} has more than two elements"
             f"which is too many to be interpreted as boolean."
         )
-        return False
-    return True
+        return ColumnValidation(False)
+    return verdict
 
 
 def valid_real(float_column):
-    for entry in float_column:
-        if not is_castable_to_type(entry, float):
-            logging.error(f"The entry: {entry} could not be converted to a float.")
-            return False
-    return True
+    column = _as_series(float_column)
+    if is_numeric_dtype(column):
+        invalid = np.zeros(len(column), dtype=bool)
+    else:
+        # only the entries which do not parse as numbers are checked one by one, float()
+        # accepting a few more formats, e.g. "1_000"
+        invalid = pandas.to_numeric(column, errors="coerce").isna().to_numpy(copy=True)
+        suspects = np.flatnonzero(invalid)
+        invalid[suspects] = _invalid_entries(
+            column.iloc[suspects], lambda entry: is_castable_to_type(entry, float)
+        )
+
+    return _verdict(
+        column,
+        invalid,
+        lambda entry: f"The entry: {entry} could not be converted to a float.",
+    )
 
 
 def valid_integer(int_column):
-    for entry in int_column:
-        if not is_castable_to_type(entry, int) or float(entry) != float(int(entry)):
-            logging.error(f"The entry: {entry} could not be converted to an integer")
-            return False
-    return True
+    column = _as_series(int_column)
+    if is_bool_dtype(column) or is_integer_dtype(column):
+        invalid = np.zeros(len(column), dtype=bool)
+    elif is_float_dtype(column):
+        values = column.to_numpy()
+        with np.errstate(invalid="ignore"):
+            invalid = ~np.isfinite(values) | (np.mod(values, 1) != 0)
+    elif _is_string_column(column):
+        invalid = ~_is_integer_literal(column)
+    else:
+        invalid = _invalid_entries(column, _is_integer_entry)
+
+    return _verdict(
+        column,
+        invalid,
+        lambda entry: f"The entry: {entry} could not be converted to an integer",
+    )
 
 
 def valid_string(text_column):
-    for entry in text_column:
-        if not isinstance(entry, str):
-            logging.error(f"The entry: {entry} is not a string.")
-            return False
-    return True
+    column = _as_series(text_column)
+    if _is_string_column(column):
+        invalid = column.isna().to_numpy()
+    elif is_numeric_dtype(column):
+        invalid = np.ones(len(column), dtype=bool)
+    else:
+        invalid = _invalid_entries(column, lambda entry: isinstance(entry, str))
+
+    return _verdict(
+        column, invalid, lambda entry: f"The entry: {entry} is not a string."
+    )
 
 
 def valid_categorical(cat_column, authorized_labels=None):
+    column = _as_series(cat_column)
+    verdict = _verdict(
+        column,
+        _invalid_labels(column),
+        lambda entry: f"The entry: {entry} could not be converted to an integer or a string.",
+    )
+    if not verdict:
+        return verdict
+
     # "Invalid" means that the predicted categorical value doesn't appear in the
     # targets.csv file
-    invalid_values_detected = False
-
-    for entry in cat_column:
-        if not is_castable_to_type(entry, int) and not isinstance(entry, str):
-            logging.error(
-                f"The entry: {entry} could not be converted to an integer or a string."
+    if authorized_labels is not None and len(authorized_labels):
+        unknown = ~column.isin(authorized_labels).to_numpy()
+        if unknown.any():
+            unknown_counts = column[unknown].value_counts(dropna=False)
+            logging.warning(
+                f"Some categorical entries didn't match any entry in the targets file: "
+                f"{unknown.sum()} entries, {len(unknown_counts)} unknown labels "
+                f"{_most_frequent(unknown_counts)}"
             )
-            return False
-
-        if authorized_labels and entry not in authorized_labels:
-            invalid_values_detected = True
-
-    if invalid_values_detected:
-        logging.warning(
-            f"Some categorical entries didn't match any entry in the targets file"
-        )
 
-    return True
+    return verdict
 
 
 def valid_datetime(datetime_column):
-    for entry in datetime_column:
+    column = _as_series(datetime_column)
+    if _is_string_column(column):
+        not_strings = column.isna().to_numpy()
+    else:
+        not_strings = _invalid_entries(column, lambda entry: isinstance(entry, str))
 
-        if not isinstance(entry, str):
-            logging.error(f"The entry: {entry} is not a string.")
-            return False
+    verdict = _verdict(
+        column, not_strings, lambda entry: f"The entry: {entry} is not a string."
+    )
+    if not verdict:
+        return verdict
 
-        try:
-            dt_parse(entry)
-        except ValueError:
-            logging.error(f"The entry: {entry} is not in a valid datetime format.")
-            return False
+    # the same timestamps repeat across the series of a time series problem, so only
+    # the unique values are parsed
+    codes, uniques = pandas.factorize(column)
+    invalid_uniques = ~_parses_as_datetime(np.asarray(uniques, dtype=object))
 
-    return True
+    return _verdict(
+        column,
+        invalid_uniques[codes],
+        lambda entry: f"The entry: {entry} is not in a valid datetime format.",
+    )
 
 
 def is_castable_to_type(value, vtype):
     try:
         vtype(value)
-    except ValueError:
+    except (ValueError, TypeError, OverflowError):
         return False
     return True
+
+
+def _as_series(column):
+    if isinstance(column, pandas.Series):
+        return column
+    return pandas.Series(list(column), dtype=None if len(column) else object)
+
+
+def _is_string_column(column):
+    """
+    :return: True if all the entries are strings, the missing entries aside
+    """
+    return infer_dtype(column, skipna=True) == "string"
+
+
+def _is_integer_literal(column, pattern=INTEGER_LITERAL):
+    missing = column.isna().to_numpy()
+
+    # plain digits need no regular expression
+    literal = np.array(column.str.isdecimal(), dtype=bool) & ~missing
+    others = np.flatnonzero(~literal & ~missing)
+    literal[others] = np.array(column.iloc[others].str.match(pattern), dtype=bool)
+    return literal
+
+
+def _is_index_entry(entry):
+    return is_castable_to_type(entry, int) and int(entry) >= 0
+
+
+def _is_integer_entry(entry):
+    return is_castable_to_type(entry, int) and float(entry) == float(int(entry))
+
+
+def _invalid_labels(column):
+    """
+    :return: boolean mask of the entries which are neither strings nor castable to int
+    """
+    if isinstance(column.dtype, pandas.CategoricalDtype):
+        # the categories are checked once, the missing entries being invalid
+        invalid_categories = _invalid_labels(pandas.Series(column.cat.categories))
+        return np.append(invalid_categories, True)[column.cat.codes.to_numpy()]
+    if is_bool_dtype(column) or is_integer_dtype(column):
+        return np.zeros(len(column), dtype=bool)
+    if is_float_dtype(column):
+        return ~np.isfinite(column.to_numpy())
+    if _is_string_column(column):
+        return column.isna().to_numpy()
+    return _invalid_entries(
+        column, lambda entry: is_castable_to_type(entry, int) or isinstance(entry, str)
+    )
+
+
+def _most_frequent(value_counts, num_values=10):
+    """
+    :return: the most frequent values with their counts, e.g. "{'a': 3, 'b': 1}"
+    """
+    shown = value_counts.head(num_values).to_dict()
+    if len(value_counts) > num_values:
+        return f"{shown} and {len(value_counts) - num_values} more"
+    return f"{shown}"
+
+
+def _parses_as_datetime(values):
+    """
+    The strings matching the datetime format inferred from a sample are parsed at once by pandas,
+    the others one by one by dateutil. So are the years pandas parses beyond the range of
+    dateutil, e.g. year 0.
+
+    :param values: array of strings
+    :return: boolean mask of the strings which dateutil parses as datetimes
+    """
+    parsed = np.zeros(len(values), dtype=bool)
+
+    datetime_format = _infer_datetime_format(values[:DATETIME_FORMAT_SAMPLE_SIZE])
+    if datetime_format is not None:
+        try:
+            timestamps = pandas.to_datetime(
+                pandas.Series(values, dtype=object),
+                format=datetime_format,
+                errors="coerce",
+            )
+            parsed = timestamps.dt.year.between(
+                datetime.MINYEAR, datetime.MAXYEAR
+            ).to_numpy(copy=True)
+            # which pandas parses whatever the format, unlike dateutil
+            parsed &= ~np.isin(values, ["now", "today"])
+        except (ValueError, AttributeError):
+            # e.g. mixed time zones, rejected or parsed as objects without .dt
+            pass
+
+    for position in np.flatnonzero(~parsed):
+        try:
+            dt_parse(values[position])
+            parsed[position] = True
+        except (ValueError, OverflowError):
+            pass
+    return parsed
+
+
+def _infer_datetime_format(sample):
+    """
+    :return: the datetime format guessed for most of the sample strings, None if there is none
+    """
+    with warnings.catch_warnings():
+        # e.g. day first formats
+        warnings.simplefilter("ignore", category=UserWarning)
+        formats = Counter(guess_datetime_format(value) for value in sample)
+    formats.pop(None, None)
+    if not formats:
+        return None
+    return formats.most_common(1)[0][0]
+
+
+def _invalid_entries(column, is_valid_entry):
+    """
+    Check the entries one by one, for the columns of mixed types only
+
+    :return: boolean mask of the invalid entries
+    """
+    return np.fromiter(
+        (not is_valid_entry(entry) for entry in column), dtype=bool, count=len(column)
+    )
+
+
+def _verdict(column, invalid, message):
+    """
+    Log the first invalid entry of a column, if any
+
+    :param invalid: boolean mask of the invalid entries
+    :param message: function formatting the error message of an invalid entry
+    :return: ColumnValidation
+    """
+    invalid_positions = np.flatnonzero(invalid)
+    if len(invalid_positions):
+        first = invalid_positions[0]
+        logging.error(
+            f"{message(column.iloc[first])} "
+            f"({len(invalid_positions)} invalid entries, the first one at row {first})"
+        )
+    return ColumnValidation(not len(invalid_positions), invalid_positions)
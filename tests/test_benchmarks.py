@@ -0,0 +1,51 @@
+import importlib.util
+import unittest
+from pathlib import Path
+
+from dval.metrics import METRICS_DICT
+
+BENCHMARKS_PATH = Path(__file__).parent.parent / "benchmarks/run_benchmarks.py"
+
+spec = importlib.util.spec_from_file_location("run_benchmarks", BENCHMARKS_PATH)
+run_benchmarks = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(run_benchmarks)
+
+
+class TestBenchmarks(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.results = run_benchmarks.run_benchmarks(sizes=[200], repeat=1)
+
+    def testEveryMetric(self):
+        metrics = {name.split("/")[1] for name in self.results if "metrics/" in name}
+        self.assertEqual(metrics, set(METRICS_DICT))
+
+    def testScoring(self):
+        for task in ["binary", "multiclass", "regression"]:
+            result = self.results[f"scoring/score_predictions_file/{task}/200"]
+            self.assertGreater(result["peak_memory"], 0)
+
+    def testStartup(self):
+        for name in ["startup/version", "startup/valid_predictions"]:
+            self.assertGreater(self.results[name]["seconds"], 0)
+
+    def testCompare(self):
+        baseline = {
+            "a": {"seconds": 1.0, "peak_memory": 100},
+            "b": {"seconds": 1.0},
+            "c": {"seconds": 1e-5},
+        }
+        results = {
+            "a": {"seconds": 1.2, "peak_memory": 200},
+            "b": {"seconds": 2.0},
+            "c": {"seconds": 1e-4},
+            "d": {"seconds": 5.0},
+        }
+        self.assertEqual(
+            run_benchmarks.compare(results, baseline, tolerance=0.5),
+            [("a", "peak_memory", 100, 200), ("b", "seconds", 1.0, 2.0)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
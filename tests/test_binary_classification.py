@@ -1,6 +1,15 @@
 import unittest
 
-from dval.metrics import accuracy, f1, roc_auc, METRICS_DICT
+from dval.metrics import (
+    accuracy,
+    f1,
+    precision,
+    recall,
+    roc_auc,
+    ClassificationContext,
+    RocAucContext,
+    METRICS_DICT,
+)
 
 GROUND_TRUTH = [1, 1, 0, 1, 1, 0, 0, 0, 1, 0, 1, 1]
 GROUND_TRUTH_LABEL = ["a", "a", "b", "a", "a", "b", "b", "b", "a", "b", "a", "a"]
@@ -203,5 +212,70 @@ class TestROCAUCLabels(unittest.TestCase):
         )
 
 
+class TestROCAUCScores(unittest.TestCase):
+    def testScores(self):
+        self.assertEqual(0.75, roc_auc([0, 0, 1, 1], [0.1, 0.4, 0.35, 0.8]))
+
+    def testTiedScores(self):
+        # the (0.5, 0.5) positive/negative pair counts as half
+        self.assertEqual(0.875, roc_auc([0, 1, 0, 1], [0.5, 0.5, 0.2, 0.9]))
+
+    def testSingleClass(self):
+        with self.assertRaises(ValueError):
+            roc_auc([1, 1, 1], [0.1, 0.4, 0.35])
+
+    def testSharedContext(self):
+        context = RocAucContext(GROUND_TRUTH_LABEL, PREDICTED_OK_LABEL)
+        for metric in ["rocAucMicro", "rocAucMacro"]:
+            self.assertAlmostEqual(
+                0.48571428571428565, context.apply_metric(metric),
+            )
+        self.assertAlmostEqual(
+            0.48571428571428565, context.apply_metric("rocAuc", pos_label="b")
+        )
+
+
+class TestPrecisionRecall(unittest.TestCase):
+    def testOk(self):
+        # tp=4, fp=3, fn=3
+        self.assertEqual(4 / 7, precision(GROUND_TRUTH, PREDICTED_OK))
+        self.assertEqual(4 / 7, recall(GROUND_TRUTH, PREDICTED_OK))
+
+    def testOkLabel0(self):
+        # tp=2, fp=3, fn=3
+        self.assertEqual(2 / 5, precision(GROUND_TRUTH, PREDICTED_OK, pos_label=0))
+        self.assertEqual(2 / 5, recall(GROUND_TRUTH, PREDICTED_OK, pos_label=0))
+
+    def testOkB(self):
+        self.assertEqual(7 / 12, precision(GROUND_TRUTH, PREDICTED_OK_B))
+        self.assertEqual(1.0, recall(GROUND_TRUTH, PREDICTED_OK_B))
+        self.assertEqual(0.0, precision(GROUND_TRUTH, PREDICTED_OK_B, pos_label=0))
+
+    def testInvalidLabel(self):
+        with self.assertRaises(ValueError):
+            precision(GROUND_TRUTH_LABEL, PREDICTED_OK_LABEL)
+
+
+class TestClassificationContext(unittest.TestCase):
+    def testConfusionMatrix(self):
+        context = ClassificationContext(GROUND_TRUTH_LABEL, PREDICTED_OK_LABEL)
+        self.assertEqual(context.labels.tolist(), ["a", "b"])
+        self.assertEqual(context.confusion_matrix.tolist(), [[4, 3], [3, 2]])
+
+    def testMetrics(self):
+        context = ClassificationContext(GROUND_TRUTH, PREDICTED_OK)
+        for metric in ["accuracy", "f1", "f1Micro", "f1Macro", "precision", "recall"]:
+            self.assertEqual(
+                context.apply_metric(metric),
+                METRICS_DICT[metric](GROUND_TRUTH, PREDICTED_OK),
+            )
+
+    def testStringPosLabel(self):
+        context = ClassificationContext(GROUND_TRUTH, PREDICTED_OK)
+        self.assertEqual(
+            context.apply_metric("f1", pos_label="0"), f1(GROUND_TRUTH, PREDICTED_OK, 0)
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,9 @@
+import contextlib
+import io
+import json
 import os
 import sys
+import tempfile
 import unittest
 from glob import glob
 
@@ -10,14 +14,47 @@ TEST_DIR_PATH = os.path.dirname(CURRENT_PATH)
 
 
 class TestCmdValidPipelines(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
     def testFileNotFound(self):
         sys.argv[1:] = ["valid_pipelines", ""]
         with self.assertRaises(SystemExit):
             main()
 
+    def testFileNotFoundContinues(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sys.argv[1:] = [
+                "valid_pipelines",
+                "--cache-dir",
+                tmpdir,
+                "missing_first.json",
+                "missing_second.json",
+            ]
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout), self.assertRaises(
+                SystemExit
+            ) as exit_context:
+                main()
+        self.assertEqual(
+            str(exit_context.exception), "ERROR: At least one pipeline log is invalid. "
+        )
+        self.assertEqual(
+            [line.split() for line in stdout.getvalue().splitlines()[:2]],
+            [
+                ["missing_first.json", "valid=False"],
+                ["missing_second.json", "valid=False"],
+            ],
+        )
+
     def testNotValidate(self):
         sys.argv[1:] = [
             "valid_pipelines",
+            "--cache-dir",
+            self.cache_dir.name,
             os.path.join(TEST_DIR_PATH, "pipelinelogs/missing_rank.json"),
             "--allow-2017-format",
         ]
@@ -27,6 +64,8 @@ class TestCmdValidPipelines(unittest.TestCase):
     def testOk(self):
         sys.argv[1:] = [
             "valid_pipelines",
+            "--cache-dir",
+            self.cache_dir.name,
             os.path.join(TEST_DIR_PATH, "pipelinelogs/correct_pipeline.json"),
             "--allow-2017-format",
         ]
@@ -35,6 +74,33 @@ class TestCmdValidPipelines(unittest.TestCase):
         except Exception:
             self.fail("valid_pipelines raised an exception")
 
+    def testJobs(self):
+        pipeline_logs = sorted(glob(os.path.join(TEST_DIR_PATH, "pipelinelogs/*.json")))
+        outputs = []
+        for jobs in ["1", "2"]:
+            sys.argv[1:] = [
+                "valid_pipelines",
+                "--no-cache",
+                "-j",
+                jobs,
+                "--allow-2017-format",
+            ] + pipeline_logs
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout), self.assertRaises(SystemExit):
+                main()
+            outputs.append(stdout.getvalue().splitlines())
+
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(
+            [line.split()[0] for line in outputs[1][:-1]], pipeline_logs,
+        )
+        self.assertTrue(all("valid=" in line for line in outputs[1][:-1]))
+        self.assertTrue(
+            outputs[1][-1].endswith(
+                f"invalid pipeline logs out of {len(pipeline_logs)}"
+            )
+        )
+
 
 class TestCmdValidPredictions(unittest.TestCase):
     def testFileNotFound(self):
@@ -69,6 +135,21 @@ class TestCmdValidPredictions(unittest.TestCase):
         except Exception:
             self.fail("valid_predictions raised an exception")
 
+    def testJobs(self):
+        sys.argv[1:] = [
+            "valid_predictions",
+            "-d",
+            os.path.join(TEST_DIR_PATH, "data/185_baseball"),
+            "-j",
+            "2",
+            os.path.join(TEST_DIR_PATH, "data/185_baseball/mitll_predictions.csv"),
+            os.path.join(TEST_DIR_PATH, "data/185_baseball/mitll_predictions.csv"),
+        ]
+        try:
+            main()
+        except SystemExit:
+            self.fail("valid_predictions -j raised an exception")
+
 
 class TestCmdValidGeneratedProblem(unittest.TestCase):
     def testLabelsNotValid(self):
@@ -123,6 +204,119 @@ class TestCmdScore(unittest.TestCase):
         except SystemExit:
             self.fail("score raised an exception")
 
+    def testManyFiles(self):
+        sys.argv[1:] = [
+            "score",
+            "-d",
+            os.path.join(TEST_DIR_PATH, "data/185_baseball"),
+            os.path.join(TEST_DIR_PATH, "data/185_baseball/mitll_predictions.csv"),
+            os.path.join(TEST_DIR_PATH, "data/185_baseball/mitll_predictions.csv"),
+        ]
+        try:
+            main()
+        except SystemExit:
+            self.fail("score raised an exception")
+
+    def testJobs(self):
+        predictions_file = os.path.join(
+            TEST_DIR_PATH, "data/185_baseball/mitll_predictions.csv"
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outfile = os.path.join(tmpdir, "scores.json")
+            sys.argv[1:] = [
+                "score",
+                "-d",
+                os.path.join(TEST_DIR_PATH, "data/185_baseball"),
+                "-j",
+                "2",
+                "-o",
+                outfile,
+                predictions_file,
+                "missing_predictions.csv",
+                predictions_file,
+            ]
+            main()
+
+            with open(outfile) as f:
+                results = json.load(f)
+
+        # in the order of the predictions files, with the errors isolated
+        self.assertEqual(
+            [r["predictions_file"] for r in results],
+            [predictions_file, "missing_predictions.csv", predictions_file],
+        )
+        self.assertIsNone(results[1]["scores"])
+        self.assertEqual(results[0]["scores"], results[2]["scores"])
+
+    def testStream(self):
+        sys.argv[1:] = [
+            "score",
+            "-d",
+            os.path.join(TEST_DIR_PATH, "data/185_baseball"),
+            "--stream",
+            "--chunksize",
+            "50",
+            os.path.join(TEST_DIR_PATH, "data/185_baseball/mitll_predictions.csv"),
+        ]
+        try:
+            main()
+        except SystemExit:
+            self.fail("score --stream raised an exception")
+
+    def testBootstrap(self):
+        sys.argv[1:] = [
+            "score",
+            "-d",
+            os.path.join(TEST_DIR_PATH, "data/185_baseball"),
+            "--bootstrap",
+            "20",
+            "--seed",
+            "0",
+            os.path.join(TEST_DIR_PATH, "data/185_baseball/mitll_predictions.csv"),
+        ]
+        try:
+            main()
+        except SystemExit:
+            self.fail("score --bootstrap raised an exception")
+
+    def testProfile(self):
+        predictions_file = os.path.join(
+            TEST_DIR_PATH, "data/185_baseball/mitll_predictions.csv"
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outfile = os.path.join(tmpdir, "scores.json")
+            trace_file = os.path.join(tmpdir, "trace.json")
+            sys.argv[1:] = [
+                "score",
+                "-d",
+                os.path.join(TEST_DIR_PATH, "data/185_baseball"),
+                "-o",
+                outfile,
+                "--profile-trace",
+                trace_file,
+                predictions_file,
+            ]
+            main()
+
+            with open(outfile) as f:
+                output = json.load(f)
+            with open(trace_file) as f:
+                trace = json.load(f)
+
+        self.assertEqual(
+            [p["name"] for p in output["score_dir_profile"]],
+            ["load schemas", "load targets", "load baseline score"],
+        )
+        (result,) = output["results"]
+        self.assertEqual(len(result["scores"]), 1)
+        phases = [p["name"] for p in result["profile"]]
+        self.assertEqual(phases[:2], ["load predictions", "validate"])
+        self.assertIn("metric F1_MACRO Hall_of_Fame", phases)
+        self.assertEqual(
+            len(trace["traceEvents"]),
+            len(phases) + len(output["score_dir_profile"]) + 2,
+        )
+
     def testScoreDirectoryNotFound(self):
         sys.argv[1:] = [
             "score",
@@ -1,6 +1,11 @@
 import os
+import shutil
+import tempfile
 import unittest
 from glob import glob
+from unittest import mock
+
+import pandas as pd
 
 from dval import generated_problems
 
@@ -61,6 +66,107 @@ class TestGenProblems(unittest.TestCase):
                 == True
             )
 
+    def test_jobs(self):
+        subdirs = glob(os.path.join(self.generated_problems_path, "*_*"))
+        subdirs = [subdir for subdir in subdirs if os.path.isdir(subdir)]
+
+        assert len(subdirs) > 0
+        for subdir in subdirs:
+            results = [
+                os.path.join(
+                    self.generated_problems_path,
+                    "result_generated_problems_{}_{}.csv".format(
+                        os.path.basename(subdir), jobs
+                    ),
+                )
+                for jobs in [1, 2]
+            ]
+            assert generated_problems.check_generated_problems_directory(
+                subdir, results[0], jobs=1
+            ) == generated_problems.check_generated_problems_directory(
+                subdir, results[1], jobs=2
+            )
+            if os.path.exists(results[0]):
+                with open(results[0]) as first, open(results[1]) as second:
+                    assert first.read() == second.read()
+
+    def test_scan_problem_subdirectories(self):
+        problem_ids = pd.Series(
+            ["discovered_problem_1", "discovered_problem_2", "discovered_problem_3"]
+        )
+        index = generated_problems.scan_problem_subdirectories(
+            os.path.join(self.generated_problems_path, "missing_ssapi"), problem_ids
+        )
+        assert index["is_dir"].tolist() == [True, True, False]
+        assert index["has_schema"].tolist() == [True, True, False]
+        assert index["has_ssapi"].tolist() == [True, False, False]
+
+    def test_schema_validation(self):
+        subdir = os.path.join(self.generated_problems_path, "correct_submission")
+        schema_path = os.path.join(subdir, "discovered_problem_1", "schema.json")
+        with mock.patch(
+            "dval.generated_problems.validate_problem_doc",
+            side_effect=ValueError("Invalid taskType"),
+        ) as validate_problem_doc:
+            assert (
+                generated_problems.problem_schema_error(schema_path)
+                == "Invalid taskType"
+            )
+            # an invalid problem schema is only a warning
+            assert generated_problems.check_generated_problems_directory(
+                subdir,
+                os.path.join(
+                    self.generated_problems_path,
+                    "result_generated_problems_schema_validation.csv",
+                ),
+            )
+        validate_problem_doc.assert_any_call(schema_path)
+
+    def test_manifest(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            problems_dir = os.path.join(tmpdir, "problems")
+            shutil.copytree(
+                os.path.join(self.generated_problems_path, "correct_submission"),
+                problems_dir,
+            )
+            manifest_file = os.path.join(tmpdir, "manifest.json")
+            results = [os.path.join(tmpdir, "result{}.csv".format(i)) for i in range(3)]
+
+            assert generated_problems.check_generated_problems_directory(
+                problems_dir, results[0], manifest_file=manifest_file
+            )
+            assert os.path.exists(manifest_file)
+
+            # the unchanged subdirectories are not checked again
+            with mock.patch(
+                "dval.generated_problems.map_schema_errors",
+                wraps=generated_problems.map_schema_errors,
+            ) as map_schema_errors:
+                assert generated_problems.check_generated_problems_directory(
+                    problems_dir, results[1], manifest_file=manifest_file
+                )
+                map_schema_errors.assert_called_once_with([], 1)
+            with open(results[0]) as first, open(results[1]) as second:
+                assert first.read() == second.read()
+
+            changed_dir = os.path.join(problems_dir, "discovered_problem_2")
+            os.remove(os.path.join(changed_dir, "ssapi.yml"))
+            with mock.patch(
+                "dval.generated_problems.map_schema_errors",
+                wraps=generated_problems.map_schema_errors,
+            ) as map_schema_errors:
+                assert not generated_problems.check_generated_problems_directory(
+                    problems_dir, results[2], manifest_file=manifest_file
+                )
+                map_schema_errors.assert_called_once_with(
+                    [os.path.join(changed_dir, "schema.json")], 1
+                )
+            with open(results[2]) as f:
+                assert f.read().splitlines()[1:] == [
+                    "discovered_problem_1,auto,yes,True",
+                    "discovered_problem_2,user,no,False",
+                ]
+
     def tearDown(self):
         subdirs = glob(
             os.path.join(self.generated_problems_path, "result_generated_problems_*")
@@ -1,7 +1,13 @@
 import math
 import unittest
 
+import numpy as np
+
 from dval.metrics import (
+    accuracy,
+    bootstrap_counts,
+    bootstrap_metric,
+    confidence_interval,
     f1_micro,
     f1_macro,
     roc_auc_micro,
@@ -249,6 +255,21 @@ class TestMXE(unittest.TestCase):
             expected_mxe,
         )
 
+    def testBinaryNonBinarized(self):
+        # ["a", "b"] classes, the last prediction is a label unknown to the ground truth
+        ground_truth = ["a", "b", "a", "b"]
+        predicted = ["a", "b", "b", "c"]
+        # a: (log2(1) + log2(1 / eps)) / 2, b: (log2(1) + log2(2 * eps / eps)) / 2
+        expected_mxe = (-math.log2(2 ** -100) / 2 + 1 / 2) / 2
+        self.assertAlmostEqual(
+            METRICS_DICT["crossEntropyNonBinarized"](ground_truth, predicted),
+            expected_mxe,
+        )
+
+    def testUnknownGroundTruthClass(self):
+        with self.assertRaises(KeyError):
+            mxe(["a", "e"], [[1, 0, 0], [0, 1, 0]], ["a", "b", "c"])
+
 
 class TestF1Micro(unittest.TestCase):
     def runTest(self):
@@ -362,5 +383,49 @@ class TestJaccSim(unittest.TestCase):
         )
 
 
+class TestBootstrap(unittest.TestCase):
+    def setUp(self):
+        self.counts = np.vstack(list(bootstrap_counts(len(GROUND_TRUTH), 50, seed=0)))
+
+    def resample_scores(self, metric):
+        ground_truth, predicted = np.array(GROUND_TRUTH), np.array(PREDICTED_OK)
+        scores = list()
+        for multiplicities in self.counts:
+            rows = np.repeat(np.arange(len(GROUND_TRUTH)), multiplicities)
+            try:
+                scores.append(metric(ground_truth[rows], predicted[rows]))
+            except ValueError:
+                scores.append(np.nan)
+        return scores
+
+    def testCounts(self):
+        self.assertEqual(self.counts.shape, (50, len(GROUND_TRUTH)))
+        self.assertTrue((self.counts.sum(axis=1) == len(GROUND_TRUTH)).all())
+        np.testing.assert_array_equal(
+            self.counts, next(bootstrap_counts(len(GROUND_TRUTH), 50, seed=0))
+        )
+
+    def testBatchedMetrics(self):
+        for name, metric in [
+            ("accuracy", accuracy),
+            ("f1Micro", f1_micro),
+            ("f1Macro", f1_macro),
+            ("rocAucMicro", roc_auc_micro),
+            ("rocAucMacro", roc_auc_macro),
+            ("jaccardSimilarityScore", jacc_sim),
+        ]:
+            with self.subTest(metric=name):
+                np.testing.assert_allclose(
+                    bootstrap_metric(name, GROUND_TRUTH, PREDICTED_OK, self.counts),
+                    self.resample_scores(metric),
+                )
+
+    def testConfidenceInterval(self):
+        scores = bootstrap_metric("f1Macro", GROUND_TRUTH, PREDICTED_OK, self.counts)
+        lower, upper = confidence_interval(scores)
+        self.assertLessEqual(lower, f1_macro(GROUND_TRUTH, PREDICTED_OK))
+        self.assertGreaterEqual(upper, f1_macro(GROUND_TRUTH, PREDICTED_OK))
+
+
 if __name__ == "__main__":
     unittest.main()
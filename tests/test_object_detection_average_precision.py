@@ -1,7 +1,10 @@
+import json
 import unittest
 
 import numpy as np
+import pandas
 
+from dval import object_detection_ap
 from dval.metrics import apply_metric
 
 GROUND_TRUTH = [
@@ -175,5 +178,110 @@ class TestObjDetAvgP(unittest.TestCase):
         )
 
 
+class TestMatching(unittest.TestCase):
+    def testDuplicateDetections(self):
+        # The most confident detection of a box is the true positive, the others are false positives
+        predicted = [
+            ["img_00285.png", 500, 450, 550, 500, 0.2],
+            ["img_00285.png", 500, 450, 550, 500, 0.9],
+            ["img_00225.png", 100, 200, 300, 300, 0.5],
+            ["img_00285.png", 501, 450, 550, 500, 0.7],
+        ]
+        recall, precision, _ = apply_metric(
+            "objectDetectionAP", predicted, GROUND_TRUTH
+        )
+
+        np.testing.assert_array_equal([1 / 3, 1 / 3, 2 / 3, 2 / 3], recall)
+        np.testing.assert_array_equal([1.0, 1 / 2, 2 / 3, 2 / 4], precision)
+
+    def testImageWithoutGroundTruth(self):
+        predicted = [["img_00000.png", 500, 450, 550, 500]]
+        with self.assertRaises(KeyError):
+            apply_metric("objectDetectionAP", predicted, GROUND_TRUTH)
+
+    def testBatches(self):
+        rng = np.random.RandomState(0)
+        ground_truth = [
+            [f"img_{i % 5}.png"] + rng.randint(0, 100, size=4).tolist()
+            for i in range(20)
+        ]
+        predicted = [
+            [f"img_{i % 5}.png"] + rng.randint(0, 100, size=4).tolist() + [rng.rand()]
+            for i in range(50)
+        ]
+        expected = apply_metric("objectDetectionAP", predicted, ground_truth)
+
+        max_pairs = object_detection_ap.MAX_PAIRS
+        object_detection_ap.MAX_PAIRS = 7
+        try:
+            computed = apply_metric("objectDetectionAP", predicted, ground_truth)
+        finally:
+            object_detection_ap.MAX_PAIRS = max_pairs
+
+        np.testing.assert_array_equal(expected[0], computed[0])
+        np.testing.assert_array_equal(expected[1], computed[1])
+
+
+class TestMultiThreshold(unittest.TestCase):
+    def testSameAsSingleThreshold(self):
+        thresholds = [0.1, 0.5, 0.9]
+        aps = apply_metric(
+            "objectDetectionAPs", PREDICTED_OK, GROUND_TRUTH, ovthresh=thresholds
+        )
+
+        expected = [
+            apply_metric("objectDetectionAP", PREDICTED_OK, GROUND_TRUTH, ovthresh=t)[2]
+            for t in thresholds
+        ]
+        self.assertEqual(expected, aps)
+        # serializable in the scores
+        self.assertEqual(json.loads(json.dumps(aps)), aps)
+
+    def testMAP(self):
+        self.assertEqual(
+            0.0, apply_metric("objectDetectionMAP", PREDICTED_BAD, GROUND_TRUTH)
+        )
+
+        aps = apply_metric("objectDetectionAPs", PREDICTED_OK, GROUND_TRUTH)
+        self.assertEqual(10, len(aps))
+        self.assertAlmostEqual(
+            np.mean(aps), apply_metric("objectDetectionMAP", PREDICTED_OK, GROUND_TRUTH)
+        )
+
+
+class TestParseBoxes(unittest.TestCase):
+    def testStringCoordinates(self):
+        frame = pandas.DataFrame(
+            [
+                ["img_00285.png", "500, 450, 550, 500", 0.5],
+                ["img_00225.png", "1,2,3,4", 1],
+            ]
+        )
+        image_ids, bbox, confidence = object_detection_ap.parse_boxes(frame)
+
+        np.testing.assert_array_equal(["img_00285.png", "img_00225.png"], image_ids)
+        np.testing.assert_array_equal([[500, 450, 550, 500], [1, 2, 3, 4]], bbox)
+        self.assertEqual(np.float64, bbox.dtype)
+        np.testing.assert_array_equal([0.5, 1.0], confidence)
+
+    def testCoordinateColumns(self):
+        image_ids, bbox, confidence = object_detection_ap.parse_boxes(GROUND_TRUTH)
+
+        self.assertEqual((3, 4), bbox.shape)
+        self.assertIsNone(confidence)
+
+    def testFrames(self):
+        expected = apply_metric("objectDetectionAP", PREDICTED_OK_STR, GROUND_TRUTH)
+        computed = apply_metric(
+            "objectDetectionAP",
+            pandas.DataFrame(PREDICTED_OK_STR),
+            pandas.DataFrame(GROUND_TRUTH),
+        )
+
+        np.testing.assert_array_equal(expected[0], computed[0])
+        np.testing.assert_array_equal(expected[1], computed[1])
+        self.assertEqual(expected[2], computed[2])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,180 @@
+import importlib.util
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from dval.cli import main
+from dval.pipeline_cache import (
+    VerdictCache,
+    _RecordingHandler,
+    is_pipeline_valid_cached,
+)
+
+D3M_INSTALLED = importlib.util.find_spec("d3m") is not None
+
+TEST_DIR_PATH = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_FILE = os.path.join(
+    TEST_DIR_PATH, "pipelines/new_format/pass/full_pipeline_rank1.json"
+)
+FLAGS = dict(
+    allow_2017_format=False, check_bare_2018_format=True, enforce_2018_format=True
+)
+
+
+class TestVerdictCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = VerdictCache(self.tmpdir.name)
+        patcher = mock.patch("dval.pipeline_cache.d3m_version", return_value="2019.4.4")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def testKey(self):
+        key = self.cache.key(b"{}", FLAGS)
+        self.assertEqual(self.cache.key(b"{}", dict(FLAGS)), key)
+        self.assertNotEqual(self.cache.key(b"{ }", FLAGS), key)
+        self.assertNotEqual(
+            self.cache.key(b"{}", dict(FLAGS, allow_2017_format=True)), key
+        )
+        with mock.patch("dval.pipeline_cache.d3m_version", return_value="2019.6.7"):
+            self.assertNotEqual(self.cache.key(b"{}", FLAGS), key)
+        with mock.patch("dval.pipeline_cache.__version__", "2019.6.7"):
+            self.assertNotEqual(self.cache.key(b"{}", FLAGS), key)
+
+    def testEviction(self):
+        for i, key in enumerate(["a", "b", "c"]):
+            self.cache.put(key, dict(valid=True, log=[]))
+            os.utime(self.cache.path(key), (i, i))
+        # "a" becomes the most recently used
+        self.assertEqual(self.cache.get("a"), dict(valid=True, log=[]))
+
+        self.cache.max_size = 2 * os.path.getsize(self.cache.path("a"))
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("c"))
+
+    def testHit(self):
+        with open(PIPELINE_FILE, "rb") as f:
+            key = self.cache.key(f.read(), FLAGS)
+        self.cache.put(key, dict(valid=False, log=[[40, "root", "Stored message"]]))
+
+        with mock.patch("logging.Logger.log") as log:
+            self.assertFalse(
+                is_pipeline_valid_cached(PIPELINE_FILE, self.cache, **FLAGS)
+            )
+        log.assert_called_once_with(40, "Stored message")
+
+
+class TestRecordingHandler(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("dval.tests.recording")
+        # isolated from the handlers of the root logger, e.g. those of pytest
+        self.logger.propagate = False
+        self.addCleanup(setattr, self.logger, "propagate", True)
+        # other tests disable logging
+        self.addCleanup(logging.disable, logging.root.manager.disable)
+        logging.disable(logging.NOTSET)
+        self.handler = _RecordingHandler()
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def testThreads(self):
+        barrier = threading.Barrier(2)
+        records = dict()
+
+        def validate(name):
+            with self.handler.recording() as records[name]:
+                barrier.wait()
+                self.logger.error(name)
+                barrier.wait()
+
+        with mock.patch("logging.lastResort") as last_resort:
+            last_resort.level = logging.WARNING
+            threads = [threading.Thread(target=validate, args=(name,)) for name in "ab"]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.logger.error("not recorded")
+
+        self.assertEqual(
+            records,
+            dict(
+                a=[[logging.ERROR, "dval.tests.recording", "a"]],
+                b=[[logging.ERROR, "dval.tests.recording", "b"]],
+            ),
+        )
+
+    def testLastResort(self):
+        with mock.patch("logging.lastResort") as last_resort:
+            last_resort.level = logging.WARNING
+            with self.handler.recording():
+                self.logger.error("shown")
+                self.logger.info("hidden")
+        self.assertEqual(
+            [call[0][0].getMessage() for call in last_resort.handle.call_args_list],
+            ["shown"],
+        )
+
+        other_handler = logging.NullHandler()
+        self.logger.addHandler(other_handler)
+        self.addCleanup(self.logger.removeHandler, other_handler)
+        with mock.patch("logging.lastResort") as last_resort:
+            last_resort.level = logging.WARNING
+            self.logger.error("shown by the other handler")
+        last_resort.handle.assert_not_called()
+
+
+@unittest.skipUnless(D3M_INSTALLED, "requires d3m")
+class TestIsPipelineValidCached(unittest.TestCase):
+    def testUnchangedFile(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = VerdictCache(tmpdir)
+            self.assertTrue(is_pipeline_valid_cached(PIPELINE_FILE, cache, **FLAGS))
+            self.assertEqual(len(os.listdir(tmpdir)), 1)
+
+            with mock.patch(
+                "dval.pipeline_logs_validator.is_pipeline_valid"
+            ) as is_pipeline_valid:
+                self.assertTrue(is_pipeline_valid_cached(PIPELINE_FILE, cache, **FLAGS))
+            is_pipeline_valid.assert_not_called()
+
+    def testChangedFile(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = VerdictCache(tmpdir)
+            pipeline_file = os.path.join(tmpdir, "pipeline.json")
+            with open(PIPELINE_FILE) as f:
+                pipeline = json.load(f)
+            with open(pipeline_file, "w") as f:
+                json.dump(pipeline, f)
+            self.assertTrue(is_pipeline_valid_cached(pipeline_file, cache, **FLAGS))
+
+            del pipeline["pipeline_rank"]
+            with open(pipeline_file, "w") as f:
+                json.dump(pipeline, f)
+            self.assertFalse(is_pipeline_valid_cached(pipeline_file, cache, **FLAGS))
+
+
+@unittest.skipUnless(D3M_INSTALLED, "requires d3m")
+class TestCmdValidPipelinesCache(unittest.TestCase):
+    def testCache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sys.argv[1:] = ["valid_pipelines", "--cache-dir", tmpdir, PIPELINE_FILE]
+            main()
+            self.assertEqual(len(os.listdir(tmpdir)), 1)
+
+            os.remove(os.path.join(tmpdir, os.listdir(tmpdir)[0]))
+            sys.argv.append("--no-cache")
+            main()
+            self.assertEqual(os.listdir(tmpdir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,7 @@ from dval.pipeline_logs_validator import (
     is_pipeline_valid_full_validation,
 )
 from glob import glob
+from unittest import mock
 
 from dval.pipeline_logs_validator import (
     load_json,
@@ -169,3 +170,12 @@ def test_new_format_is_pipeline_valid_pass():
         assert is_pipeline_valid(file, True, False, True) == True
         assert is_pipeline_valid(file, True, True, False) == True
         assert is_pipeline_valid(file, True, True, True) == True
+
+
+def test_is_pipeline_valid_single_parse():
+    files = glob("tests/pipelines/new_format/pass/*.json")
+    assert len(files) > 0
+    for file in files:
+        with mock.patch("builtins.open", wraps=open) as opened:
+            assert is_pipeline_valid(file, True, True, True) == True
+        assert opened.call_count == 1
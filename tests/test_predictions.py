@@ -1,7 +1,18 @@
+import json
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
-from dval.predictions import Predictions
+import pandas
+
+from dval.predictions import (
+    InvalidPredictionsError,
+    Predictions,
+    ScoringContext,
+    score_predictions_file,
+)
 
 
 class TestPredictions(unittest.TestCase):
@@ -42,6 +53,122 @@ class TestPredictions(unittest.TestCase):
                     expected_result = float(expected_result)
                     self.assertEqual(score.scorevalue, expected_result)
 
+    def testScoreBootstrap(self):
+        for name, test_case in self.test_cases.items():
+            scores = test_case.score(
+                test_case.score_root / "targets.csv", bootstrap=20, seed=0
+            )
+            for score in scores:
+                lower, upper = score.confidence_interval
+                self.assertLessEqual(lower, upper)
+                self.assertEqual(score.confidence_level, 0.95)
+
+            # the same seed gives the same resamples
+            same_scores = test_case.score(
+                test_case.score_root / "targets.csv", bootstrap=20, seed=0
+            )
+            self.assertEqual(
+                [s.confidence_interval for s in scores],
+                [s.confidence_interval for s in same_scores],
+            )
+
+
+def copy_score_dir(score_root, tmp_dir, performance_metrics):
+    """
+    :return: copy of a SCORE directory in tmp_dir, with other performance metrics
+    """
+    copy = Path(tmp_dir) / score_root.name
+    shutil.copytree(score_root, copy)
+    problem_doc_path = copy / "problem_TEST/problemDoc.json"
+    problem_doc = json.loads(problem_doc_path.read_text())
+    problem_doc["inputs"]["performanceMetrics"] = performance_metrics
+    problem_doc_path.write_text(json.dumps(problem_doc))
+    return copy
+
+
+class TestProblemDocMetrics(unittest.TestCase):
+    def testAllTargets(self):
+        score_root = Path(__file__).parent / "data/22_handgeometry"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            copy = copy_score_dir(
+                score_root,
+                tmp_dir,
+                [
+                    {
+                        "metric": "rootMeanSquaredErrorAvg",
+                        "applicabilityToTarget": "allTargets",
+                    },
+                    {"metric": "rootMeanSquaredError"},
+                ],
+            )
+            scores = ScoringContext(copy).score(copy / "mitll_predictions.csv")
+
+        all_targets, target = list(scores)
+        self.assertEqual(all_targets.target, "allTargets")
+        self.assertEqual(all_targets.metric, "ROOT_MEAN_SQUARED_ERROR_AVG")
+        self.assertAlmostEqual(all_targets.scorevalue, target.scorevalue)
+
+
+class TestScoringContext(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.score_root = Path(__file__).parent / "data/185_baseball"
+        cls.result_file = cls.score_root / "mitll_predictions.csv"
+        cls.context = ScoringContext(cls.score_root)
+
+    def testScore(self):
+        expected = Predictions(self.result_file, self.score_root).score(
+            self.score_root / "targets.csv"
+        )
+        scores = self.context.score(self.result_file)
+        self.assertEqual(scores.to_json(), expected.to_json())
+
+    def testManyFiles(self):
+        context = ScoringContext(self.score_root)
+        self.assertTrue(context.is_valid(self.result_file))
+
+        # the SCORE directory is not read again
+        with mock.patch("pandas.read_csv", wraps=pandas.read_csv) as read_csv:
+            for _ in range(3):
+                self.assertTrue(context.is_valid(self.result_file))
+                context.score(self.result_file)
+        self.assertEqual(
+            [call[0][0] for call in read_csv.call_args_list], [self.result_file] * 6
+        )
+
+    def testProfile(self):
+        scores = score_predictions_file(
+            self.result_file, self.score_root, None, profile=True
+        )
+        self.assertEqual(
+            [p["name"] for p in scores.profile if p["depth"] == 0],
+            [
+                "load schemas",
+                "load targets",
+                "load baseline score",
+                "load predictions",
+                "validate",
+                "metric F1_MACRO Hall_of_Fame",
+                "transform normalize F1_MACRO",
+            ],
+        )
+        self.assertEqual(
+            scores.to_json(), self.context.score(self.result_file).to_json()
+        )
+
+    def testFrame(self):
+        frame = pandas.read_csv(self.result_file)
+        self.assertTrue(self.context.is_valid(frame))
+        self.assertEqual(
+            self.context.score(frame).to_json(),
+            self.context.score(self.result_file).to_json(),
+        )
+
+    def testInvalidFrame(self):
+        frame = pandas.read_csv(self.result_file).iloc[1:]
+        with self.assertRaises(InvalidPredictionsError):
+            self.context.score(frame)
+
 
 if __name__ == "__main__":
     unittest.main()
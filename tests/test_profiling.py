@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+
+from dval.profiling import Profiler, chrome_trace, phase
+
+
+class TestProfiler(unittest.TestCase):
+    def testInactive(self):
+        with phase("not recorded") as record:
+            self.assertIsNone(record)
+
+    def testNestedPhases(self):
+        with Profiler() as profiler:
+            with phase("outer"):
+                with phase("inner"):
+                    array = np.ones(2 ** 20)
+                del array
+            with phase("last"):
+                pass
+        with phase("not recorded"):
+            pass
+
+        phases = profiler.to_json()
+        self.assertEqual([p["name"] for p in phases], ["outer", "inner", "last"])
+        self.assertEqual([p["depth"] for p in phases], [0, 1, 0])
+        outer, inner, last = phases
+        self.assertGreaterEqual(outer["wall_time"], inner["wall_time"])
+        if profiler.trace_memory:
+            # the peak of the inner phase is also the peak of the outer one
+            self.assertGreaterEqual(inner["peak_memory"], 8 * 2 ** 20)
+            self.assertGreaterEqual(outer["peak_memory"], inner["peak_memory"])
+            self.assertLess(last["peak_memory"], 2 ** 20)
+
+    def testChromeTrace(self):
+        with Profiler(trace_memory=False) as profiler:
+            with phase("load"):
+                pass
+        trace = chrome_trace([("file", profiler.to_json())])
+        metadata, event = trace["traceEvents"]
+        self.assertEqual(metadata["args"], {"name": "file"})
+        self.assertEqual((event["name"], event["ph"], event["tid"]), ("load", "X", 0))
+        self.assertIsNone(event["args"]["peak_memory"])
+
+
+if __name__ == "__main__":
+    unittest.main()
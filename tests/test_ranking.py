@@ -0,0 +1,81 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas
+
+from dval.metrics import precision_at_top_K_meta, METRICS_DICT
+from dval.predictions import ScoringContext
+
+GROUND_TRUTH = [4, 3, 2, 1, 0]
+PREDICTED_BEST = [9, 8, 7, 6, 5]
+PREDICTED_OK = [0, 4, 2, 3, 1]
+PREDICTED_BAD = [0, 1, 2, 3, 4]
+
+GROUND_TRUTH_TIES = [1, 1, 1, 0, 0]
+PREDICTED_TIES = [0, 0, 1, 1, 1]
+
+
+class TestPrecisionAtTopK(unittest.TestCase):
+    def testBest(self):
+        self.assertEqual(1.0, precision_at_top_K_meta(GROUND_TRUTH, PREDICTED_BEST, 3))
+        self.assertEqual(
+            1.0, METRICS_DICT["precisionAtTopK"](GROUND_TRUTH, PREDICTED_BEST, K=3)
+        )
+
+    def testOk(self):
+        self.assertEqual(2 / 3, precision_at_top_K_meta(GROUND_TRUTH, PREDICTED_OK, 3))
+        self.assertEqual(0.75, precision_at_top_K_meta(GROUND_TRUTH, PREDICTED_OK, 4))
+
+    def testBad(self):
+        self.assertEqual(0.0, precision_at_top_K_meta(GROUND_TRUTH, PREDICTED_BAD, 2))
+
+    def testMultipleK(self):
+        self.assertEqual(
+            [0.0, 2 / 3, 0.75, 1.0],
+            precision_at_top_K_meta(GROUND_TRUTH, PREDICTED_OK, K=[1, 3, 4, 5]),
+        )
+
+    def testKLargerThanSize(self):
+        self.assertEqual(0.5, precision_at_top_K_meta(GROUND_TRUTH, PREDICTED_OK, 10))
+
+    def testTies(self):
+        # ties are broken in favour of the later entries: the top 2 are [2, 1] and [4, 3]
+        self.assertEqual(
+            [0.0, 0.0, 1 / 3],
+            precision_at_top_K_meta(GROUND_TRUTH_TIES, PREDICTED_TIES, [1, 2, 3]),
+        )
+
+
+class TestPrecisionAtTopKProblemDoc(unittest.TestCase):
+    def testListOfK(self):
+        score_root = Path(__file__).parent / "data/22_handgeometry"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            copy = Path(tmp_dir) / score_root.name
+            shutil.copytree(score_root, copy)
+            problem_doc_path = copy / "problem_TEST/problemDoc.json"
+            problem_doc = json.loads(problem_doc_path.read_text())
+            problem_doc["inputs"]["performanceMetrics"] = [
+                {"metric": "precisionAtTopK", "K": [5, 10]}
+            ]
+            problem_doc_path.write_text(json.dumps(problem_doc))
+
+            scores = ScoringContext(copy).score(copy / "mitll_predictions.csv")
+            ground_truth = pandas.read_csv(copy / "targets.csv")["WRISTBREADTH"]
+            predicted = pandas.read_csv(copy / "mitll_predictions.csv")["WRISTBREADTH"]
+
+        self.assertEqual([score.params for score in scores], [{"K": 5}, {"K": 10}])
+        self.assertEqual(
+            [score.scorevalue for score in scores],
+            precision_at_top_K_meta(ground_truth, predicted, K=[5, 10]),
+        )
+        self.assertEqual(
+            [score["params"] for score in json.loads(scores.to_json())],
+            [{"K": 5}, {"K": 10}],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
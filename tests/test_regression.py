@@ -2,7 +2,15 @@ import unittest
 
 import numpy as np
 
-from dval.metrics import l2, avg_l2, l1, r2, METRICS_DICT
+from dval.metrics import (
+    l2,
+    avg_l2,
+    l1,
+    r2,
+    METRICS_DICT,
+    RegressionContext,
+    RegressionSums,
+)
 
 GROUND_TRUTH = [0.5, 6, 2, 5.6]
 PREDICTED_BEST = [0.5, 6, 2, 5.6]
@@ -119,5 +127,72 @@ class TestR2(unittest.TestCase):
         )
 
 
+class TestRegressionContext(unittest.TestCase):
+    def testMetrics(self):
+        context = RegressionContext(GROUND_TRUTH, PREDICTED_OK)
+
+        self.assertAlmostEqual(
+            l2(GROUND_TRUTH, PREDICTED_OK),
+            context.apply_metric("rootMeanSquaredError"),
+        )
+        self.assertAlmostEqual(
+            l1(GROUND_TRUTH, PREDICTED_OK), context.apply_metric("meanAbsoluteError")
+        )
+        self.assertAlmostEqual(
+            r2(GROUND_TRUTH, PREDICTED_OK), context.apply_metric("rSquared")
+        )
+
+    def testConstantGroundTruth(self):
+        self.assertEqual(1.0, r2([3, 3, 3], [3, 3, 3]))
+        self.assertEqual(0.0, r2([3, 3, 3], [3, 3, 4]))
+
+    def testBlockwiseSums(self):
+        rng = np.random.RandomState(0)
+        ground_truth = rng.normal(1e6, 1.0, size=10 ** 5)
+        predicted = ground_truth + rng.normal(size=10 ** 5)
+
+        sums = RegressionSums(ground_truth, predicted)
+        centered = ground_truth - ground_truth.mean()
+
+        self.assertEqual(10 ** 5, sums.count)
+        self.assertAlmostEqual(
+            np.sum(centered * centered) / sums.centered_squares[0], 1.0
+        )
+        self.assertAlmostEqual(
+            np.sum((predicted - ground_truth) ** 2) / sums.squared_error[0], 1.0
+        )
+
+    def testTiedResamples(self):
+        # resamples drawing rows of the same ground truth only, which cancel in the
+        # weighted sums of squares
+        rng = np.random.RandomState(0)
+        ground_truth = rng.normal(1234.5678, 100.0, size=1000)
+        predicted = ground_truth + rng.normal(size=1000)
+        counts = np.zeros((50, 1000))
+        counts[np.arange(50), rng.randint(0, 1000, size=50)] = 1000
+
+        context = RegressionContext(ground_truth, predicted, counts)
+        np.testing.assert_array_equal(context.apply_metric("rSquared"), 0.0)
+
+        # and rows of the same ground truth in blocks of other values, whose means differ
+        # by their rounding
+        block_size = RegressionSums.BLOCK_SIZE
+        RegressionSums.BLOCK_SIZE = 7
+        try:
+            for seed in range(20):
+                rng = np.random.RandomState(seed)
+                ground_truth = rng.normal(0, 1000.0, size=70)
+                ground_truth[rng.randint(0, 70, size=10)] = ground_truth[3]
+                counts = np.where(ground_truth == ground_truth[3], 5, 0)
+                context = RegressionContext(ground_truth, ground_truth + 1, counts)
+                self.assertEqual(context.apply_metric("rSquared"), 0.0)
+        finally:
+            RegressionSums.BLOCK_SIZE = block_size
+
+    def testInconsistentShapes(self):
+        with self.assertRaises(ValueError):
+            RegressionContext(GROUND_TRUTH, PREDICTED_OK[:3])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,7 +1,12 @@
+import json
+import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
-from dval import schemas
+import pandas
+
+from dval import metrics, schemas
 
 F1MACRO = "F1_MACRO"
 
@@ -28,6 +33,77 @@ class TestProblemSchema(unittest.TestCase):
         self.assertEqual(baseballmetrics[0]["metric"], F1MACRO)
         self.assertEqual(baseballmetrics[0]["params"], dict())
 
+    def testTaskType(self):
+        task_type = self.baseballProblemSchema.problem["problem"]["task_type"]
+        self.assertEqual(task_type.name, "CLASSIFICATION")
+        self.assertEqual(task_type.unparse(), "classification")
+
+
+class TestParseProblemDoc(unittest.TestCase):
+    def parse(self, performance_metrics, task_type="classification"):
+        problem_doc = {
+            "about": {
+                "problemID": "p",
+                "problemName": "p",
+                "taskType": task_type,
+                "taskSubType": "binary",
+            },
+            "inputs": {
+                "data": {
+                    "datasetID": "d",
+                    "targets": [
+                        {"targetIndex": 0, "resID": "0", "colIndex": 2, "colName": "t"}
+                    ],
+                },
+                "performanceMetrics": performance_metrics,
+            },
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "problemDoc.json"
+            path.write_text(json.dumps(problem_doc))
+            return schemas.parse_problem_doc(path)
+
+    def testParams(self):
+        problem = self.parse(
+            [
+                {"metric": "f1"},
+                {"metric": "precisionAtTopK", "K": [5, 10]},
+                {"metric": "f1Macro"},
+                {
+                    "metric": "rootMeanSquaredErrorAvg",
+                    "applicabilityToTarget": "allTargets",
+                },
+            ]
+        )
+        metrics = problem["problem"]["performance_metrics"]
+        self.assertEqual(
+            [metric["metric"].name for metric in metrics],
+            ["F1", "PRECISION_AT_TOP_K", "F1_MACRO", "ROOT_MEAN_SQUARED_ERROR_AVG"],
+        )
+        self.assertEqual(metrics[0]["params"], {"pos_label": "1"})
+        self.assertEqual(metrics[1]["params"], {"K": [5, 10]})
+        self.assertEqual(metrics[2]["params"], dict())
+        self.assertEqual(metrics[3]["params"], {"applicabilityToTarget": "allTargets"})
+
+    def testScoredMetrics(self):
+        # every metric scored by dval can be read from a problemDoc
+        for metric in metrics.METRICS_DICT:
+            problem = self.parse([{"metric": metric}])
+            name = problem["problem"]["performance_metrics"][0]["metric"].name
+            self.assertIs(metrics.find_metric(name), metrics.METRICS_DICT[metric])
+
+    def testTargets(self):
+        problem = self.parse([{"metric": "accuracy"}])
+        self.assertEqual(problem["problem"]["task_subtype"].name, "BINARY")
+        target = problem["inputs"][0]["targets"][0]
+        self.assertEqual((target["column_name"], target["column_index"]), ("t", 2))
+
+    def testUnknownNames(self):
+        with self.assertRaises(KeyError):
+            self.parse([{"metric": "f2"}])
+        with self.assertRaises(KeyError):
+            self.parse([{"metric": "accuracy"}], task_type="guessing")
+
 
 class TestDatasetSchema(unittest.TestCase):
     def testIndex(self):
@@ -60,6 +136,35 @@ class TestD3MDataStructure(unittest.TestCase):
     def testTargetTypes(self):
         self.assertEqual(self.obj.target_types, {"Hall_of_Fame": "categorical"})
 
+    def testExpectedIndex(self):
+        expected_index = self.obj.expected_index
+        testdata = pandas.read_csv(self.obj.testdata_path)
+        self.assertTrue(expected_index.equals(testdata.index))
+
+        # the test data is read once
+        with mock.patch("pandas.read_csv") as read_csv:
+            self.assertIs(self.obj.expected_index, expected_index)
+        read_csv.assert_not_called()
+
+    def testColumnDtypes(self):
+        self.assertEqual(
+            self.obj.column_dtypes, {"dse_index": "int64", "Hall_of_Fame": "category"}
+        )
+
+    def testReadCsv(self):
+        frame = self.obj.read_csv(self.obj.root / "mitll_predictions.csv")
+        self.assertEqual(frame["dse_index"].dtype, "int64")
+        self.assertIsInstance(frame["Hall_of_Fame"].dtype, pandas.CategoricalDtype)
+        self.assertEqual(list(frame["Hall_of_Fame"].cat.categories), [0, 1, 2])
+
+    def testReadCsvFallback(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            predictions = Path(tmpdir) / "predictions.csv"
+            predictions.write_text("dse_index,Hall_of_Fame\n1,0\n,1\n")
+            frame = self.obj.read_csv(predictions)
+        self.assertEqual(frame["dse_index"].dtype, "float64")
+        self.assertEqual(frame["Hall_of_Fame"].dtype, "int64")
+
     def testBaselineScores(self):
         self.assertEqual(round(self.obj.get_baseline_score(), 2), 0.69)
 
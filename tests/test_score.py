@@ -1,3 +1,4 @@
+import json
 import unittest
 
 from dval.score import Score
@@ -15,6 +16,18 @@ class TestScore(unittest.TestCase):
         expected_score += '"transformed_normalized_scorevalue": null}'
         self.assertEqual(str(score.json), expected_score)
 
+    def testJsonWithParams(self):
+        score = Score("Target", "PRECISION_AT_TOP_K", 0.4, None, {"K": 10})
+        self.assertEqual(json.loads(score.json)["params"], {"K": 10})
+
+    def testJsonWithConfidenceInterval(self):
+        score = Score("Target", "F1_MACRO", 0.4, 0.6)
+        self.assertNotIn("confidence_interval", json.loads(score.json))
+
+        score.set_confidence_interval(0.3, 0.5, 0.95)
+        self.assertEqual(json.loads(score.json)["confidence_interval"], [0.3, 0.5])
+        self.assertEqual(json.loads(score.json)["confidence_level"], 0.95)
+
     def testNormalizeScore(self):
         score = Score("Target", "F1_MACRO", 0.4, 0.6)
         normalized_score = score._normalize(0.4, 0.6, METRIC_RANGES_DICT["f1Macro"])
@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from dval.cli import main
+from dval.predictions import ScoringContext
+from dval.server import Client, ScoringContextCache, make_server, server_address
+
+SCORE_DIR = Path(__file__).parent / "data/185_baseball"
+PREDICTIONS_FILE = SCORE_DIR / "mitll_predictions.csv"
+
+
+def start_server(**kwargs):
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+
+
+class TestServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = start_server(port=0)
+        cls.client = Client(server_address(cls.server))
+
+    @classmethod
+    def tearDownClass(cls):
+        stop_server(cls.server)
+
+    def testScore(self):
+        expected = ScoringContext(SCORE_DIR).score(PREDICTIONS_FILE)
+        scores = self.client.score(SCORE_DIR, PREDICTIONS_FILE)
+        self.assertEqual(
+            json.dumps(scores, sort_keys=True, indent=4), expected.to_json()
+        )
+
+        # the SCORE directory is loaded once
+        self.client.score(SCORE_DIR, PREDICTIONS_FILE, mxe=True)
+        self.assertEqual(
+            self.client.status()["contexts"], [os.path.realpath(SCORE_DIR)]
+        )
+
+    def testValidate(self):
+        self.assertTrue(self.client.is_valid(SCORE_DIR, PREDICTIONS_FILE))
+        self.assertFalse(self.client.is_valid(SCORE_DIR, "missing_predictions.csv"))
+
+    def testErrors(self):
+        self.assertIsNone(self.client.score(SCORE_DIR, "missing_predictions.csv"))
+        with self.assertRaises(FileNotFoundError):
+            self.client.score("missing_directory", PREDICTIONS_FILE)
+        self.assertEqual(self.client.request("POST", "/score", dict())[0], 400)
+
+    def testUnixSocket(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            server = start_server(socket_path=os.path.join(tmpdir, "dval.sock"))
+            try:
+                client = Client(server_address(server))
+                self.assertTrue(client.is_valid(SCORE_DIR, PREDICTIONS_FILE))
+            finally:
+                stop_server(server)
+
+
+class TestScoringContextCache(unittest.TestCase):
+    def testEviction(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            other_dir = os.path.join(tmpdir, "185_baseball")
+            shutil.copytree(SCORE_DIR, other_dir)
+
+            cache = ScoringContextCache()
+            with cache.context(SCORE_DIR) as first:
+                pass
+            with cache.context(SCORE_DIR) as context:
+                self.assertIs(context, first)
+            self.assertEqual(cache.memory, first.memory_usage())
+
+            # the least recently used context is evicted beyond the memory cap
+            cache.max_memory = cache.memory
+            with cache.context(other_dir):
+                pass
+            self.assertEqual(cache.keys(), [(os.path.realpath(other_dir), None, None)])
+
+
+class TestCmdServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = start_server(port=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        stop_server(cls.server)
+
+    def testScore(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outfiles = [os.path.join(tmpdir, f"scores{i}.json") for i in range(2)]
+            for outfile, server_args in zip(
+                outfiles, [[], ["--server", server_address(self.server)]]
+            ):
+                sys.argv[1:] = ["score", "-d", str(SCORE_DIR), "-o", outfile]
+                sys.argv += server_args + [str(PREDICTIONS_FILE)]
+                main()
+
+            with open(outfiles[0]) as local, open(outfiles[1]) as forwarded:
+                self.assertEqual(json.load(local), json.load(forwarded))
+
+    def testValidPredictions(self):
+        sys.argv[1:] = [
+            "valid_predictions",
+            "-d",
+            str(SCORE_DIR),
+            "--server",
+            server_address(self.server),
+            str(PREDICTIONS_FILE),
+        ]
+        try:
+            main()
+        except SystemExit:
+            self.fail("valid_predictions raised an exception")
+
+    def testServerNotRunning(self):
+        sys.argv[1:] = [
+            "valid_predictions",
+            "-d",
+            str(SCORE_DIR),
+            "--server",
+            "unix:/nonexistent/dval.sock",
+            str(PREDICTIONS_FILE),
+        ]
+        with self.assertRaises(SystemExit):
+            main()
+
+
+if __name__ == "__main__":
+    unittest.main()
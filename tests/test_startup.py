@@ -0,0 +1,30 @@
+import subprocess
+import sys
+import unittest
+
+# The startup time of the command line is timed by benchmarks/run_benchmarks.py
+HEAVY_MODULES = ["d3m", "sklearn", "scipy", "concurrent.futures.process"]
+
+
+def loaded_modules(statement):
+    """
+    :return: the heavy modules loaded by a fresh interpreter running statement
+    """
+    code = f"import sys; {statement}; print(' '.join(sorted(sys.modules)))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], stdout=subprocess.PIPE, check=True
+    ).stdout.decode()
+    modules = output.split()
+    return [module for module in HEAVY_MODULES if module in modules]
+
+
+class TestStartup(unittest.TestCase):
+    def testImports(self):
+        self.assertEqual(loaded_modules("import dval.cli"), [])
+        self.assertEqual(loaded_modules("import dval.predictions"), [])
+        self.assertEqual(loaded_modules("import dval.schemas"), [])
+        self.assertEqual(loaded_modules("import dval.generated_problems"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
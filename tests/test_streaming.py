@@ -0,0 +1,153 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas
+
+from dval.metrics import f1_macro, precision_at_top_K_meta, roc_auc
+from dval.predictions import (
+    InvalidPredictionsError,
+    Predictions,
+    score_predictions_file,
+)
+from dval.streaming import (
+    PairCounts,
+    StreamingPredictions,
+    TopKAccumulator,
+    aligned_chunks,
+)
+
+
+class TestStreamingPredictions(unittest.TestCase):
+    def testSameScores(self):
+        path = Path(__file__).parent / "data"
+        for d in (i for i in path.iterdir() if i.is_dir()):
+            result_file = d / "mitll_predictions.csv"
+            expected = Predictions(result_file, d).score(d / "targets.csv")
+
+            for chunksize in (7, 1000):
+                scores = StreamingPredictions(
+                    result_file, d, chunksize=chunksize
+                ).score(d / "targets.csv")
+                self.assertEqual(len(expected), len(scores))
+                for expected_score, score in zip(expected, scores):
+                    self.assertEqual(expected_score.metric, score.metric)
+                    self.assertAlmostEqual(expected_score.scorevalue, score.scorevalue)
+
+
+class TestChunkValidation(unittest.TestCase):
+    def setUp(self):
+        self.score_root = Path(__file__).parent / "data/22_handgeometry"
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.predictions = pandas.read_csv(self.score_root / "mitll_predictions.csv")
+        self.targets = pandas.read_csv(self.score_root / "targets.csv")
+
+    def score(self, predictions, targets=None, check_valid=True):
+        predictions_file = Path(self.tmpdir.name) / "predictions.csv"
+        predictions.to_csv(predictions_file, index=False)
+        targets_file = self.score_root / "targets.csv"
+        if targets is not None:
+            targets_file = Path(self.tmpdir.name) / "targets.csv"
+            targets.to_csv(targets_file, index=False)
+        return StreamingPredictions(
+            predictions_file, self.score_root, chunksize=7
+        ).score(targets_file, check_valid=check_valid)
+
+    def testInvalidType(self):
+        predictions = self.predictions.astype({"WRISTBREADTH": object})
+        predictions.loc[30, "WRISTBREADTH"] = "wide"
+        with self.assertRaises(InvalidPredictionsError):
+            self.score(predictions)
+
+    def verdicts(self, predictions):
+        """
+        :return: the in-memory and the streamed validity of the predictions, without scoring
+        """
+        predictions_file = Path(self.tmpdir.name) / "predictions.csv"
+        predictions.to_csv(predictions_file, index=False)
+        in_memory = Predictions(predictions_file, self.score_root).is_valid()
+
+        targets_file = self.score_root / "targets.csv"
+        streaming = StreamingPredictions(predictions_file, self.score_root, chunksize=7)
+        chunks = aligned_chunks(predictions_file, targets_file, "dse_index", 7)
+        try:
+            streaming._accumulate(
+                chunks, [], {}, streaming._target_labels(targets_file)
+            )
+        except InvalidPredictionsError:
+            return in_memory, False
+        return in_memory, True
+
+    def testMissingEntry(self):
+        # only empty entries in every column are invalid
+        predictions = self.predictions.copy()
+        predictions.loc[30, "WRISTBREADTH"] = None
+        self.assertEqual(self.verdicts(predictions), (True, True))
+
+        predictions.loc[3, "dse_index"] = None
+        self.assertEqual(self.verdicts(predictions), (False, False))
+
+    def testMissingIndexes(self):
+        # the rows match the ground truth, but not the expected index of the test data
+        with self.assertRaises(InvalidPredictionsError):
+            self.score(self.predictions.iloc[:-3], self.targets.iloc[:-3])
+        self.score(self.predictions.iloc[:-3], self.targets.iloc[:-3], False)
+
+    def testSubsetIndices(self):
+        with self.assertRaises(ValueError):
+            score_predictions_file(
+                self.score_root / "mitll_predictions.csv",
+                self.score_root,
+                None,
+                indices_file=self.score_root / "targets.csv",
+                stream=True,
+            )
+
+
+class TestAccumulators(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.ground_truth = rng.randint(0, 2, size=100)
+        self.predicted = rng.randint(0, 2, size=100)
+        self.scores = rng.randint(0, 10, size=100) / 10
+        self.chunks = [slice(0, 30), slice(30, 31), slice(31, 100)]
+
+    def testPairCounts(self):
+        labels = PairCounts()
+        scores = PairCounts()
+        for chunk in self.chunks:
+            labels.update(self.ground_truth[chunk], self.predicted[chunk])
+            scores.update(self.ground_truth[chunk], self.scores[chunk])
+
+        self.assertEqual(
+            f1_macro(self.ground_truth, self.predicted), labels.apply_metric("f1Macro")
+        )
+        self.assertEqual(
+            roc_auc(self.ground_truth, self.scores), scores.apply_metric("rocAuc")
+        )
+
+    def testTopK(self):
+        top_k = TopKAccumulator(10)
+        for chunk in self.chunks:
+            top_k.update(self.scores[chunk], self.ground_truth[chunk])
+
+        self.assertEqual(
+            precision_at_top_K_meta(self.scores, self.ground_truth, K=[5, 10]),
+            top_k.apply_metric("precisionAtTopK", K=[5, 10]),
+        )
+
+    def testTopKParams(self):
+        metric = dict(metric="precisionAtTopK", params=dict(k=5))
+        with self.assertRaises(TypeError):
+            TopKAccumulator.from_metrics([metric])
+        with self.assertRaises(TypeError):
+            TopKAccumulator(10).apply_metric("precisionAtTopK", k=5)
+
+        metric["params"] = dict(K=[5, 10])
+        self.assertEqual(TopKAccumulator.from_metrics([metric]).k, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
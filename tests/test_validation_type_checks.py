@@ -0,0 +1,150 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas
+
+from dval.validation_type_checks import (
+    valid_boolean,
+    valid_categorical,
+    valid_datetime,
+    valid_index,
+    valid_integer,
+    valid_real,
+    valid_string,
+)
+
+
+class TestValidIndex(unittest.TestCase):
+    def testInteger(self):
+        self.assertTrue(valid_index(pandas.Series([0, 1, 2])))
+
+        result = valid_index(pandas.Series([0, -1, 2, -3]))
+        self.assertFalse(result)
+        np.testing.assert_array_equal(result.invalid_positions, [1, 3])
+
+    def testFloat(self):
+        self.assertTrue(valid_index(pandas.Series([0.0, 1.5, -0.5])))
+        result = valid_index(pandas.Series([0.0, np.nan, -1.0]))
+        np.testing.assert_array_equal(result.invalid_positions, [1, 2])
+
+    def testString(self):
+        self.assertTrue(valid_index(pandas.Series(["0", " 1 ", "+2", "-0"])))
+
+        result = valid_index(pandas.Series(["0", "1.0", "-1", "a", None]))
+        np.testing.assert_array_equal(result.invalid_positions, [1, 2, 3, 4])
+
+    def testMixed(self):
+        result = valid_index(pandas.Series([0, "1", "a", -2.0], dtype=object))
+        np.testing.assert_array_equal(result.invalid_positions, [2, 3])
+
+
+class TestValidReal(unittest.TestCase):
+    def testNumeric(self):
+        self.assertTrue(valid_real(pandas.Series([0.5, np.nan, 2])))
+        self.assertTrue(valid_real(pandas.Series([1, 2, 3])))
+
+    def testString(self):
+        self.assertTrue(valid_real(pandas.Series(["0.5", "nan", "1e3", "1_000"])))
+
+        result = valid_real(pandas.Series(["0.5", "a", "1,5"]))
+        self.assertFalse(result)
+        np.testing.assert_array_equal(result.invalid_positions, [1, 2])
+
+
+class TestValidInteger(unittest.TestCase):
+    def testFloat(self):
+        self.assertTrue(valid_integer(pandas.Series([1.0, -2.0])))
+
+        result = valid_integer(pandas.Series([1.0, 2.5, np.nan, np.inf]))
+        np.testing.assert_array_equal(result.invalid_positions, [1, 2, 3])
+
+    def testString(self):
+        self.assertTrue(valid_integer(pandas.Series(["1", "-2", " 3"])))
+
+        result = valid_integer(pandas.Series(["1", "2.0", "b"]))
+        np.testing.assert_array_equal(result.invalid_positions, [1, 2])
+
+    def testList(self):
+        self.assertTrue(valid_integer([1, 2, True]))
+        self.assertFalse(valid_integer([1, 2.5]))
+
+
+class TestValidBoolean(unittest.TestCase):
+    def testValid(self):
+        self.assertTrue(valid_boolean(pandas.Series([0, 1, 1])))
+        self.assertTrue(valid_boolean(pandas.Series(["yes", "no"])))
+
+    def testTooManyValues(self):
+        result = valid_boolean(pandas.Series([0, 1, 2]))
+        self.assertFalse(result)
+        self.assertEqual(len(result.invalid_positions), 0)
+
+    def testInvalidEntries(self):
+        result = valid_boolean(pandas.Series([0.0, np.nan]))
+        np.testing.assert_array_equal(result.invalid_positions, [1])
+
+
+class TestValidString(unittest.TestCase):
+    def testValid(self):
+        self.assertTrue(valid_string(pandas.Series(["a", "b"])))
+
+    def testInvalid(self):
+        result = valid_string(pandas.Series(["a", None, "c"]))
+        np.testing.assert_array_equal(result.invalid_positions, [1])
+
+        result = valid_string(pandas.Series([1, 2]))
+        np.testing.assert_array_equal(result.invalid_positions, [0, 1])
+
+
+class TestValidCategorical(unittest.TestCase):
+    def testKnownLabels(self):
+        column = pandas.Series(["a", "b", "a"])
+        self.assertTrue(valid_categorical(column, authorized_labels=["a", "b"]))
+        self.assertTrue(valid_categorical(column, authorized_labels=None))
+
+    def testUnknownLabels(self):
+        column = pandas.Series(["a", "c", "d", "c", "b"])
+        with mock.patch("logging.warning") as warning:
+            self.assertTrue(valid_categorical(column, authorized_labels=["a", "b"]))
+        self.assertIn(
+            "3 entries, 2 unknown labels {'c': 2, 'd': 1}", warning.call_args[0][0]
+        )
+
+    def testInvalidEntries(self):
+        result = valid_categorical(pandas.Series([1.0, np.nan]), authorized_labels=[1])
+        self.assertFalse(result)
+        np.testing.assert_array_equal(result.invalid_positions, [1])
+
+
+class TestValidDatetime(unittest.TestCase):
+    def testInferredFormat(self):
+        column = pandas.Series(["2020-01-01", "2020-01-02", "2020-01-01"] * 10)
+        self.assertTrue(valid_datetime(column))
+
+        result = valid_datetime(column.replace("2020-01-02", "2020-02-30"))
+        np.testing.assert_array_equal(result.invalid_positions, np.arange(1, 30, 3))
+
+    def testMixedFormats(self):
+        # rows not matching the inferred format fall back to dateutil
+        column = pandas.Series(["2020-01-01", "2020-01-02", "Jan 3 2020", "20200104"])
+        self.assertTrue(valid_datetime(column))
+
+        result = valid_datetime(pandas.Series(["2020-01-01", "today", "abc"]))
+        np.testing.assert_array_equal(result.invalid_positions, [1, 2])
+
+    def testOutOfRange(self):
+        # pandas parses year 0 with the inferred format, dateutil does not
+        result = valid_datetime(pandas.Series(["1990-05-18", "0000-01-01"]))
+        np.testing.assert_array_equal(result.invalid_positions, [1])
+
+        column = pandas.Series(["1990-05-18", "0001-01-01", "9999-12-31"])
+        self.assertTrue(valid_datetime(column))
+
+    def testNotStrings(self):
+        result = valid_datetime(pandas.Series(["2020-01-01", None, 3], dtype=object))
+        np.testing.assert_array_equal(result.invalid_positions, [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()